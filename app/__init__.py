@@ -1,9 +1,18 @@
 import os
 from flask import Flask
 from flask_login import LoginManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 from app.extensions import init_extensions, db, mail
 from app.routes import register_blueprints
+from app.utils.metrics import init_metrics
+from app.utils.query_profiler import init_query_profiler
+from app.utils.user_cache import init_user_cache
+from app.utils.rate_limit import init_rate_limit
+from app.utils.mail_queue import init_mail_queue
+from app.utils.storage_cleanup import init_document_purge
+from app.utils.logging_setup import configure_logging
+from app.utils.http_cache import apply_default_cache_headers
 import pymysql
 
 # Load environment variables
@@ -16,7 +25,7 @@ public_key_path = os.getenv('PUBLIC_KEY_PATH')
 pymysql.install_as_MySQLdb()
 
 # Fungsi untuk membuat aplikasi
-def create_app(config_name='default'):
+def create_app(config_name='default', config_overrides=None):
     app = Flask(__name__,
                 template_folder=os.path.join(os.getcwd(), 'app', 'templates'),
                 static_folder=os.path.join(os.getcwd(), 'app', 'static'))
@@ -28,20 +37,33 @@ def create_app(config_name='default'):
         app.config.from_object('config.DevelopmentConfig')
     else:
         app.config.from_object('config.ProductionConfig')
+
+    # Override konfigurasi (mis. database khusus untuk load test)
+    if config_overrides:
+        app.config.update(config_overrides)
     
+    # Alamat klien asli di balik reverse proxy (dipakai rate limit per IP).
+    # Hanya header dari proxy tepercaya sejumlah PROXY_FIX_X_FOR hop yang dipakai.
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    # Logging dikonfigurasi sekali, sebelum ekstensi lain
+    configure_logging(app)
+
     # Inisialisasi ekstensi dan blueprint
     init_extensions(app)
     register_blueprints(app)
     mail.init_app(app)
+    init_mail_queue(app)
+    init_metrics(app)
+    init_query_profiler(app)
+    init_user_cache(app)
+    init_rate_limit(app)
+    init_document_purge(app)
     
 
-    # Tambahkan header untuk mencegah cache
-    @app.after_request
-    def add_header(response):
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '-1'
-        return response
+    # Default no-store, kecuali route yang memasang kebijakan cache sendiri
+    app.after_request(apply_default_cache_headers)
 
     return app
 
@@ -51,9 +73,3 @@ def list_routes(app):
         print("Routes available:")
         for rule in app.url_map.iter_rules():
             print(f"Rule: {rule}")
-
-# Buat dan jalankan aplikasi
-app = create_app()
-
-# List routes setelah aplikasi siap
-list_routes(app)
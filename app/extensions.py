@@ -1,24 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_mail import Mail
+from app.utils.db_routing import RoutingSession
 
 mail = Mail()
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate_instance = Migrate()
 
 @login_manager.user_loader
 def load_user(user_id):
-    from app.models import User
-    return db.session.get(User, int(user_id))
+    # Snapshot immutable dari cache per proses; query hanya saat cache miss
+    from app.utils.user_cache import load_user_snapshot
+    return load_user_snapshot(int(user_id))
 
 
 def init_extensions(app):
     db.init_app(app)
-    bcrypt.init_app(app)
     login_manager.init_app(app)
     migrate_instance.init_app(app, db)
     login_manager.login_view = 'auth.login'
@@ -1,7 +1,8 @@
 import re
 import os
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.password_hashing import hash_password, verify_password, needs_rehash
+from app.utils.pdf_incremental import display_size
 from werkzeug.utils import secure_filename
 from app.extensions import db
 from sqlalchemy.exc import IntegrityError
@@ -11,6 +12,27 @@ from hashlib import sha256
 from datetime import datetime, timezone
 
 
+class DuplicateDocumentError(ValueError):
+    """Dokumen dengan file_hash yang sama sudah ada."""
+
+
+def violated_unique_column(error, table, columns):
+    """
+    Tentukan kolom unik mana yang dilanggar dari IntegrityError.
+    Mengenali pesan SQLite ("UNIQUE constraint failed: user.email"),
+    MySQL ("Duplicate entry ... for key 'user.email'" / "for key 'email'")
+    dan nama constraint PostgreSQL ("user_email_key").
+    Return None jika bukan pelanggaran pada salah satu kolom tersebut.
+    """
+    orig = getattr(error, 'orig', error)
+    diag = getattr(orig, 'diag', None)
+    message = str(getattr(diag, 'constraint_name', None) or orig).lower()
+    for column in columns:
+        pattern = rf"\b{table}\.{column}\b|for key '{column}'|\b{table}_{column}_key\b"
+        if re.search(pattern, message):
+            return column
+    return None
+
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -25,11 +47,19 @@ class User(db.Model, UserMixin):
         """Set hashed password after validation."""
         if not self._is_password_format_valid(password):
             raise ValueError("Password harus minimal 8 karakter dan mengandung angka.")
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
 
     def check_password(self, password):
-        """Verify the given password against the stored hash."""
-        return check_password_hash(self.password, password)
+        """
+        Verify the given password against the stored hash.
+        If the hash uses outdated parameters it is replaced in-place
+        (the caller commits), so cost changes roll out on next login.
+        """
+        if not verify_password(self.password, password):
+            return False
+        if needs_rehash(self.password):
+            self.password = hash_password(password)
+        return True
 
     @staticmethod
     def _is_username_format_valid(username):
@@ -63,31 +93,30 @@ class User(db.Model, UserMixin):
     def create_user(cls, username, email, password):
         """
         Create a new user with validated username and password.
+        Uniqueness is enforced by the database constraints (one INSERT, no
+        pre-check SELECTs), so concurrent registrations cannot race.
         Raises ValueError if validation fails or if username/email is not unique.
         """
         if not cls._is_username_format_valid(username):
             raise ValueError("Username tidak valid. Pastikan username minimal 3 karakter dan mengandung angka.")
-        
-        if not cls.is_username_unique(username):
-            raise ValueError("Username sudah terdaftar.")
-        
-        if not cls.is_email_unique(email):
-            raise ValueError("Email sudah terdaftar.")
-        
+
         if not cls._is_password_format_valid(password):
             raise ValueError("Password tidak valid. Password harus minimal 8 karakter dan mengandung angka.")
-        
-        
+
         new_user = cls(username=username, email=email)
         new_user.set_password(password)
 
-        
         try:
             db.session.add(new_user)
             db.session.commit()
             return new_user
-        except IntegrityError:
+        except IntegrityError as e:
             db.session.rollback()
+            violated = violated_unique_column(e, cls.__tablename__, ('username', 'email'))
+            if violated == 'username':
+                raise ValueError("Username sudah terdaftar.")
+            if violated == 'email':
+                raise ValueError("Email sudah terdaftar.")
             raise ValueError("Terjadi kesalahan saat menyimpan data. Coba lagi.")
         
         
@@ -110,8 +139,22 @@ class Document(db.Model):
     uploaded_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), nullable=False)
     status = db.Column(db.String(50), default='pending', nullable=False)
     doc_hash = db.Column(db.String(64), unique=True, nullable=False)  # Kolom baru untuk hash ID
+    page_count = db.Column(db.Integer, nullable=True)  # Diisi saat upload (PDF)
+    pdf_rendition_path = db.Column(db.String(500), nullable=True)  # Rendisi PDF untuk DOCX
+    conversion_status = db.Column(db.String(20), nullable=True)  # pending/done/failed/unavailable (DOCX)
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Soft delete; baris di-purge di background
 
     user = db.relationship('User', backref=db.backref('documents', lazy=True))
+    pages = db.relationship('DocumentPage', backref='document', lazy=True,
+                            order_by='DocumentPage.page_index', cascade='all, delete-orphan')
+
+    @classmethod
+    def active(cls):
+        """
+        Query dokumen yang belum dihapus. Dokumen dengan deleted_at terisi
+        menunggu purge (lihat app/utils/storage_cleanup.py).
+        """
+        return cls.query.filter(cls.deleted_at.is_(None))
 
     @classmethod
     def is_duplicate(cls, file_hash):
@@ -121,13 +164,14 @@ class Document(db.Model):
         return cls.query.filter_by(file_hash=file_hash).first() is not None
 
     @classmethod
-    def create_document(cls, user_id, filename, filepath, file_hash):
+    def create_document(cls, user_id, filename, filepath, file_hash, page_geometry=None, conversion_status=None):
         """
         Create a document record in the database with hash ID.
+        page_geometry: optional list of (width, height, rotation) per page,
+        stored together with the document in one commit.
+        Duplicate content is detected by the unique constraint on file_hash
+        (raises DuplicateDocumentError) instead of a separate SELECT.
         """
-        if cls.is_duplicate(file_hash):
-            raise ValueError("Dokumen dengan isi yang sama sudah diunggah sebelumnya.")
-
         # Generate doc_hash (hashed ID)
         raw_id = f"{user_id}-{file_hash}-{datetime.utcnow().isoformat()}"
         doc_hash = sha256(raw_id.encode()).hexdigest()
@@ -137,16 +181,57 @@ class Document(db.Model):
             filename=filename,
             filepath=filepath,
             file_hash=file_hash,
-            doc_hash=doc_hash
+            doc_hash=doc_hash,
+            conversion_status=conversion_status
         )
+        if page_geometry is not None:
+            new_document.set_page_geometry(page_geometry)
 
         try:
             db.session.add(new_document)
             db.session.commit()
             return new_document
-        except IntegrityError:
+        except IntegrityError as e:
             db.session.rollback()
+            if violated_unique_column(e, cls.__tablename__, ('file_hash',)) == 'file_hash':
+                raise DuplicateDocumentError("Dokumen dengan isi yang sama sudah diunggah sebelumnya.")
             raise ValueError("Terjadi kesalahan saat menyimpan dokumen.")
+
+    @property
+    def is_docx(self):
+        return self.filename.lower().endswith('.docx')
+
+    @property
+    def pdf_path(self):
+        """
+        PDF yang dipakai untuk stamping dan pratinjau: file asli untuk PDF,
+        rendisi hasil konversi untuk DOCX (None jika konversi belum selesai).
+        """
+        if not self.is_docx:
+            return self.filepath
+        return self.pdf_rendition_path if self.conversion_status == 'done' else None
+
+    def set_page_geometry(self, page_geometry):
+        """Ganti indeks geometri halaman dengan list (width, height, rotation)."""
+        self.page_count = len(page_geometry)
+        self.pages = [
+            DocumentPage(page_index=index, width=width, height=height, rotation=rotation)
+            for index, (width, height, rotation) in enumerate(page_geometry)
+        ]
+
+    def attach_pdf_rendition(self, rendition_path, status, page_geometry=None):
+        """Tautkan hasil konversi DOCX ke PDF (dipanggil worker konversi, tanpa commit)."""
+        self.pdf_rendition_path = rendition_path
+        self.conversion_status = status
+        if page_geometry is not None:
+            self.set_page_geometry(page_geometry)
+
+    def get_page(self, page_index):
+        """
+        Ambil geometri halaman tanpa membuka file PDF.
+        Return None jika geometri belum tersedia (dokumen lama / non-PDF).
+        """
+        return DocumentPage.query.filter_by(document_id=self.id, page_index=page_index).first()
         
     @classmethod
     def reset_auto_increment(cls):
@@ -158,6 +243,25 @@ class Document(db.Model):
             db.session.commit()
 
 
+class DocumentPage(db.Model):
+    """
+    Geometri per halaman (mediabox dan rotasi) yang diekstrak sekali saat upload.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False, index=True)
+    page_index = db.Column(db.Integer, nullable=False)
+    width = db.Column(db.Float, nullable=False)
+    height = db.Column(db.Float, nullable=False)
+    rotation = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('document_id', 'page_index', name='uq_document_page'),)
+
+    @property
+    def display_size(self):
+        """(width, height) halaman sebagaimana ditampilkan; /Rotate 90 atau 270 menukar sisi."""
+        return display_size(self.width, self.height, self.rotation)
+
+
 
 
 class Signature(db.Model):
@@ -211,3 +315,37 @@ class Signature(db.Model):
     
     
     
+
+
+class IdempotencyRecord(db.Model):
+    """
+    Respons pertama untuk request ber-header Idempotency-Key, per (user, key).
+    status_code NULL berarti request pertama masih diproses.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response_headers = db.Column(db.Text, nullable=True)  # JSON header yang diputar ulang
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'key', name='uq_idempotency_user_key'),)
+
+
+class UploadSession(db.Model):
+    """
+    Sesi upload resumable: chunk ditulis berurutan ke staging_path sampai
+    received_size == total_size, lalu difinalisasi menjadi Document.
+    """
+    id = db.Column(db.String(32), primary_key=True)  # token acak, dipakai di URL
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_size = db.Column(db.BigInteger, nullable=False, default=0)
+    staging_path = db.Column(db.String(500), nullable=False)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=True)  # terisi setelah finalisasi
+    locked_until = db.Column(db.DateTime, nullable=True)  # lease chunk/finalisasi yang sedang berjalan
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -2,6 +2,7 @@ from app.routes.auth import auth_bp
 from app.routes.dashboard import dashboard_bp
 from app.routes.document import document_bp
 from app.routes.signature import signature_bp
+from app.routes.metrics import metrics_bp
 
 
 
@@ -10,4 +11,5 @@ def register_blueprints(app):
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(document_bp, url_prefix='/documents')
     app.register_blueprint(signature_bp, url_prefix='/signature')  # Menambahkan url_prefix
+    app.register_blueprint(metrics_bp)
 
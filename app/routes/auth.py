@@ -4,10 +4,14 @@ from app.models import User
 from app.extensions import db
 from itsdangerous import URLSafeTimedSerializer
 from flask_mail import Message
-from app.extensions import mail
+from app.utils.mail_queue import enqueue_mail
+from app.utils.rate_limit import rate_limit, by_ip, by_ip_and_email
+from app.utils.user_cache import clear_user_cache
 from itsdangerous import BadSignature, SignatureExpired
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 # Utility functions for token generation and verification
 def generate_token(email, secret_key, salt):
@@ -32,7 +36,8 @@ def send_reset_email(email, reset_url, sender):
         body=f"Click the link to reset your password: {reset_url}",
         sender=sender
     )
-    mail.send(msg)
+    # Dikirim oleh thread background; request tidak menunggu SMTP
+    enqueue_mail(msg)
 
 
 # Blueprint setup
@@ -73,6 +78,7 @@ def register():
 
 # Login route
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', by_ip, by_ip_and_email, methods=('POST',))
 def login():
     # Jika pengguna sudah login, arahkan ke dashboard
     if current_user.is_authenticated:
@@ -93,10 +99,12 @@ def login():
         # Validasi email dan password
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
+            # Simpan hash baru jika parameter hashing berubah (rehash saat login)
+            if user in db.session.dirty:
+                db.session.commit()
             login_user(user)
 
-            # Log user ID dan cookie session
-            logging.info(f"User {user.id} berhasil login. Session: {request.cookies.get('session')}")
+            logger.info("User %s berhasil login.", user.id)
             
             # Respon jika request JSON (API)
             if request.is_json:
@@ -142,7 +150,7 @@ def forgot_password():
             flash('Email untuk reset password telah dikirim.', 'info')
         else:
             flash('Alamat email tidak ditemukan.', 'danger')
-            current_app.logger.warning(f"Permintaan reset password untuk email yang tidak terdaftar: {email}")
+            logger.warning("Permintaan reset password untuk email yang tidak terdaftar.")
 
         return redirect(url_for('auth.login'))
 
@@ -201,6 +209,8 @@ def delete_all_users():
         # Hapus semua pengguna
         User.query.delete()
         db.session.commit()
+        # Bulk delete tidak memicu event after_delete, jadi cache dikosongkan manual
+        clear_user_cache()
 
         # Reset AUTO_INCREMENT
         User.reset_auto_increment()
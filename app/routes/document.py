@@ -1,28 +1,52 @@
 import os
-from flask import Blueprint, request, redirect, url_for, render_template, flash, jsonify
+import re
+import shutil
+from flask import Blueprint, request, redirect, url_for, render_template, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from app.models import Document, Signature
+from app.models import Document, UploadSession, DuplicateDocumentError
 from app import db
-from app.utils.sign_token import sign_token
-from app.utils.verify_token import verify_token
 from werkzeug.exceptions import NotFound
 from sqlalchemy import text
 from flask import send_file
 import hashlib
 import mimetypes
+import tempfile
+import logging
+from datetime import datetime
+from app.utils.metrics import timed, span
+from app.utils.db_routing import read_replica
+from app.utils.idempotency import idempotent
+from app.utils import resumable_upload
+from app.utils.resumable_upload import DEFAULT_STAGING_FOLDER
+from app.utils.storage_cleanup import DEFAULT_UPLOAD_FOLDER, purge_deleted_documents, request_purge
+from app.utils.http_cache import send_cached_file, not_modified
+from app.utils.pdf_geometry import extract_page_geometry
+from app.utils.office_convert import schedule_conversion, find_converter
+from app.utils.page_preview import (
+    request_preview, prewarm_previews, PreviewUnavailable,
+    ALLOWED_SIZES, DEFAULT_SIZE, DEFAULT_PREVIEW_FOLDER
+)
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
 
-UPLOAD_FOLDER = os.path.abspath(os.path.join('app', 'static', 'uploads'))
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 MAX_FILE_SIZE_MB = 15
+CONTENT_HASH_HEADER = 'X-Content-SHA256'
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
 
 document_bp = Blueprint('document', __name__)
 
 
+def upload_folder():
+    """Folder dokumen yang diunggah (config UPLOAD_FOLDER)."""
+    return current_app.config.get('UPLOAD_FOLDER', DEFAULT_UPLOAD_FOLDER)
+
+
 def create_upload_folder_if_not_exists():
     """Create upload folder if it doesn't exist."""
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(upload_folder(), exist_ok=True)
 
 
 def allowed_file(filename):
@@ -32,6 +56,23 @@ def allowed_file(filename):
     return file_extension in ALLOWED_EXTENSIONS and mimetype
 
 
+def preview_settings():
+    """Folder cache dan jumlah worker pratinjau dari konfigurasi aplikasi."""
+    return (
+        current_app.config.get('PREVIEW_CACHE_FOLDER', DEFAULT_PREVIEW_FOLDER),
+        current_app.config.get('PREVIEW_MAX_WORKERS', 2),
+    )
+
+
+def conversion_not_ready(document):
+    """Respons untuk DOCX yang rendisi PDF-nya belum (atau tidak bisa) dibuat."""
+    if document.conversion_status == 'pending':
+        return jsonify({"error": "Dokumen sedang dikonversi ke PDF, coba lagi."}), 503, {"Retry-After": "2"}
+    return jsonify({"error": "Rendisi PDF untuk dokumen ini tidak tersedia.",
+                     "conversion_status": document.conversion_status}), 409
+
+
+@timed("file_hash")
 def generate_file_hash(file):
     """Generate SHA256 hash of the file."""
     hash_sha256 = hashlib.sha256()
@@ -42,14 +83,115 @@ def generate_file_hash(file):
     return hash_sha256.hexdigest()
 
 
+def save_and_hash(file, destination, chunk_size=65536):
+    """Write an uploaded file to destination while computing its SHA256 in the same pass."""
+    hash_sha256 = hashlib.sha256()
+    file.stream.seek(0)
+    with open(destination, 'wb') as output:
+        for chunk in iter(lambda: file.stream.read(chunk_size), b""):
+            hash_sha256.update(chunk)
+            output.write(chunk)
+    return hash_sha256.hexdigest()
+
+
+def claimed_content_hash():
+    """
+    SHA256 isi file dari header X-Content-SHA256 (opsional).
+    Return (hash, None) atau (None, pesan error) jika header tidak valid.
+    """
+    claimed = request.headers.get(CONTENT_HASH_HEADER)
+    if claimed is None:
+        return None, None
+    claimed = claimed.strip().lower()
+    if not SHA256_PATTERN.match(claimed):
+        return None, f'Invalid {CONTENT_HASH_HEADER} header.'
+    return claimed, None
+
+
+
+def store_document(temp_path, filename, file_hash, keep_source_on_error=False):
+    """
+    Simpan file yang sudah di-staging sebagai Document milik current_user.
+    File dipindah ke folder upload hanya setelah INSERT berhasil; jika gagal
+    (mis. DuplicateDocumentError) file staging dihapus, kecuali
+    ``keep_source_on_error`` (upload resumable yang boleh difinalisasi ulang).
+    Jika pemindahan file gagal, baris Document dihapus lagi.
+    """
+    filepath = os.path.join(upload_folder(), filename)
+
+    # Indeks geometri halaman diekstrak sekali di sini, bukan saat stamping
+    page_geometry = None
+    if filename.lower().endswith('.pdf'):
+        try:
+            page_geometry = extract_page_geometry(temp_path)
+        except Exception as e:
+            logger.warning("Geometri halaman %s tidak dapat dibaca: %s", filename, e)
+
+    # DOCX dikonversi ke PDF di background (hanya jika konverter tersedia)
+    conversion_status = None
+    if filename.lower().endswith('.docx'):
+        conversion_status = 'pending' if find_converter() else 'unavailable'
+
+    def create():
+        return Document.create_document(
+            user_id=current_user.id,
+            filename=filename,
+            filepath=filepath,
+            file_hash=file_hash,
+            page_geometry=page_geometry,
+            conversion_status=conversion_status
+        )
+
+    # Save document to database (duplikat ditolak oleh unique constraint file_hash)
+    try:
+        try:
+            new_document = create()
+        except DuplicateDocumentError:
+            # Isi yang sama milik dokumen yang sudah dihapus tapi belum di-purge
+            if not purge_deleted_documents(file_hash=file_hash, preview_folder=preview_settings()[0]):
+                raise
+            new_document = create()
+    except Exception:
+        if not keep_source_on_error:
+            os.remove(temp_path)
+        raise
+    try:
+        shutil.move(temp_path, filepath)
+    except OSError:
+        # Jangan tinggalkan baris tanpa file: percobaan ulang akan dianggap duplikat
+        db.session.delete(new_document)
+        db.session.commit()
+        raise
+
+    if conversion_status == 'pending':
+        schedule_conversion(current_app._get_current_object(), new_document.id, filepath)
+
+    # Render halaman awal di background agar UI penempatan QR langsung siap
+    if filename.lower().endswith('.pdf'):
+        cache_folder, max_workers = preview_settings()
+        prewarm_previews(filepath, file_hash, current_app.config.get('PREVIEW_PREWARM_PAGES', 2),
+                         cache_folder=cache_folder, max_workers=max_workers)
+    return new_document
+
 
 @document_bp.route('/upload', methods=['GET', 'POST'])
 @login_required
+@idempotent
 def upload_document():
     """
     Endpoint for uploading a document.
     """
     if request.method == 'POST':
+        # Hash yang diklaim klien dicek sebelum body multipart dibaca, sehingga
+        # duplikat ditolak tanpa memproses isi file
+        claimed_hash, header_error = claimed_content_hash()
+        if header_error:
+            flash(header_error, 'error')
+            return redirect(url_for('document.list_documents'))
+        if claimed_hash and Document.active().filter_by(file_hash=claimed_hash).first() is not None:
+            flash('A document with the same content already exists.', 'error')
+            return redirect(url_for('document.list_documents'))
+
         file = request.files.get('file')
 
         if not file or not allowed_file(file.filename):
@@ -62,25 +204,25 @@ def upload_document():
 
             # Generate file details
             filename = secure_filename(file.filename)
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            file_hash = generate_file_hash(file)
 
-            # Check for duplicate files
-            if Document.is_duplicate(file_hash):
-                flash('A document with the same content already exists.', 'error')
+            # Simpan ke file sementara sambil menghitung hash (satu kali baca);
+            # file final baru ditempati setelah INSERT berhasil, sehingga
+            # unggahan duplikat tidak menimpa file yang ada
+            fd, temp_path = tempfile.mkstemp(dir=upload_folder(), suffix='.upload')
+            os.close(fd)
+            with span("file_save"):
+                file_hash = save_and_hash(file, temp_path)
+
+            if claimed_hash and claimed_hash != file_hash:
+                os.remove(temp_path)
+                flash(f'Uploaded content does not match {CONTENT_HASH_HEADER}.', 'error')
                 return redirect(url_for('document.list_documents'))
 
-            # Save file locally
-            file.seek(0)  # Reset file pointer
-            file.save(filepath)
-
-            # Save document to database
-            new_document = Document.create_document(
-                user_id=current_user.id,
-                filename=filename,
-                filepath=filepath,
-                file_hash=file_hash
-            )
+            try:
+                new_document = store_document(temp_path, filename, file_hash)
+            except DuplicateDocumentError:
+                flash('A document with the same content already exists.', 'error')
+                return redirect(url_for('document.list_documents'))
 
             flash(f"Document uploaded successfully with ID: {new_document.doc_hash}!", 'success')
             return redirect(url_for('document.list_documents'))
@@ -92,11 +234,175 @@ def upload_document():
     return render_template('upload_document.html')
 
 
+@document_bp.route('/exists/<string:file_hash>', methods=['GET'])
+@read_replica
+@login_required
+def document_exists(file_hash):
+    """
+    Probe sebelum upload (GET/HEAD): 200 jika isi dengan SHA256 ini sudah
+    tersimpan, 404 jika belum. doc_hash hanya dikembalikan untuk pemiliknya.
+    """
+    file_hash = file_hash.lower()
+    if not SHA256_PATTERN.match(file_hash):
+        return jsonify({"error": "Hash harus berupa SHA256 heksadesimal (64 karakter)."}), 400
+
+    row = db.session.query(Document.user_id, Document.doc_hash).filter_by(file_hash=file_hash, deleted_at=None).first()
+    if row is None:
+        return jsonify({"exists": False}), 404
+
+    body = {"exists": True}
+    if row.user_id == current_user.id:
+        body["doc_hash"] = row.doc_hash
+    return jsonify(body), 200
+
+
+# Upload resumable (lihat app/utils/resumable_upload.py)
+
+def get_upload_or_404(upload_id):
+    """Sesi upload milik current_user; sesi kedaluwarsa dibuang dan dianggap tidak ada."""
+    upload = UploadSession.query.filter_by(id=upload_id, user_id=current_user.id).first()
+    if upload is not None and upload.document_id is None and not resumable_upload.is_locked(upload) and \
+            resumable_upload.is_expired(upload, current_app.config.get('RESUMABLE_SESSION_TTL', 86400)):
+        resumable_upload.discard(upload)
+        upload = None
+    if upload is None:
+        raise NotFound()
+    return upload
+
+
+def upload_state(upload):
+    return {"upload_id": upload.id, "offset": upload.received_size, "size": upload.total_size}
+
+
+@document_bp.route('/uploads', methods=['POST'])
+@login_required
+def create_upload():
+    """Mulai sesi upload resumable: {"filename": ..., "size": ...}."""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    size = data.get('size')
+
+    if not filename or not allowed_file(filename):
+        return jsonify({"error": "Invalid file type."}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({"error": "size harus bilangan bulat positif (byte)."}), 400
+    max_size = current_app.config.get('RESUMABLE_MAX_FILE_SIZE_MB', 200) * 1024 * 1024
+    if size > max_size:
+        return jsonify({"error": f"Ukuran file melebihi batas {max_size} byte."}), 413
+
+    upload = resumable_upload.create_session(
+        current_user.id, filename, size,
+        staging_folder=current_app.config.get('UPLOAD_STAGING_FOLDER', DEFAULT_STAGING_FOLDER)
+    )
+    body = dict(upload_state(upload),
+                max_chunk_size=current_app.config.get('RESUMABLE_MAX_CHUNK_MB', 8) * 1024 * 1024)
+    return jsonify(body), 201, {"Location": url_for('document.upload_status', upload_id=upload.id)}
+
+
+@document_bp.route('/uploads/<string:upload_id>', methods=['GET'])
+@login_required
+def upload_status(upload_id):
+    """Offset terakhir yang diterima, untuk melanjutkan upload yang terputus."""
+    upload = get_upload_or_404(upload_id)
+    return jsonify(dict(upload_state(upload), complete=upload.document_id is not None))
+
+
+@document_bp.route('/uploads/<string:upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """Terima satu chunk (body mentah) pada offset dari header Upload-Offset."""
+    upload = get_upload_or_404(upload_id)
+    if upload.document_id is not None:
+        return jsonify({"error": "Upload sudah difinalisasi."}), 409
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Header Upload-Offset wajib diisi (byte)."}), 400
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Content-Length wajib diisi."}), 411
+    max_chunk = current_app.config.get('RESUMABLE_MAX_CHUNK_MB', 8) * 1024 * 1024
+    if length > max_chunk:
+        return jsonify({"error": f"Chunk melebihi batas {max_chunk} byte."}), 413
+
+    try:
+        with span("upload_chunk"):
+            new_offset = resumable_upload.write_chunk(upload, offset, request.stream, length)
+    except resumable_upload.UploadOffsetMismatch as e:
+        return jsonify({"error": str(e), "offset": e.offset}), 409
+    except resumable_upload.UploadBusy as e:
+        return jsonify({"error": str(e), "offset": upload.received_size}), 409, {"Retry-After": "1"}
+    except ValueError as e:
+        return jsonify({"error": str(e), "offset": upload.received_size}), 400
+
+    if new_offset != offset + length:
+        return jsonify({"error": "Chunk tidak diterima lengkap.", "offset": new_offset}), 400
+    return jsonify(upload_state(upload))
+
+
+@document_bp.route('/uploads/<string:upload_id>', methods=['DELETE'])
+@login_required
+def abort_upload(upload_id):
+    """Batalkan upload dan hapus data staging."""
+    upload = get_upload_or_404(upload_id)
+    if resumable_upload.is_locked(upload):
+        return jsonify({"error": "Upload sedang diproses oleh request lain."}), 409, {"Retry-After": "1"}
+    resumable_upload.discard(upload)
+    return '', 204
+
+
+@document_bp.route('/uploads/<string:upload_id>/finalize', methods=['POST'])
+@login_required
+def finalize_upload(upload_id):
+    """Jadikan upload yang lengkap sebagai Document (hash sudah dihitung saat chunk masuk)."""
+    upload = get_upload_or_404(upload_id)
+
+    # Hanya satu request yang boleh memfinalisasi; yang lain melihat hasilnya
+    lease = None
+    if upload.document_id is None and upload.received_size == upload.total_size:
+        lease = resumable_upload.claim_finalize(upload)
+    if lease is None:
+        if upload.document_id is not None:
+            document = db.session.get(Document, upload.document_id)
+            return jsonify({"message": "Upload sudah difinalisasi.", "doc_hash": document.doc_hash}), 200
+        if upload.received_size < upload.total_size:
+            return jsonify({"error": "Upload belum lengkap.", "offset": upload.received_size}), 409
+        return jsonify({"error": "Upload sedang difinalisasi."}), 409, {"Retry-After": "1"}
+
+    claimed_hash, header_error = claimed_content_hash()
+    if header_error:
+        resumable_upload.release(upload, lease)
+        return jsonify({"error": header_error}), 400
+
+    try:
+        file_hash = resumable_upload.content_hash(upload)
+        if claimed_hash and claimed_hash != file_hash:
+            resumable_upload.discard(upload)
+            return jsonify({"error": f"Uploaded content does not match {CONTENT_HASH_HEADER}."}), 400
+
+        create_upload_folder_if_not_exists()
+        staging_path, filename = upload.staging_path, upload.filename
+        try:
+            document = store_document(staging_path, filename, file_hash, keep_source_on_error=True)
+        except DuplicateDocumentError as e:
+            resumable_upload.discard(upload)
+            return jsonify({"error": str(e)}), 409
+    except Exception:
+        db.session.rollback()
+        resumable_upload.release(upload, lease)
+        raise
+
+    resumable_upload.complete(upload, document, lease)
+    return jsonify({"message": "Document uploaded successfully.", "doc_hash": document.doc_hash}), 201
+
+
 @document_bp.route('/documents', methods=['GET'])
+@read_replica
 @login_required
 def list_documents():
     """Route to list user documents."""
-    user_documents = Document.query.filter_by(user_id=current_user.id).order_by(Document.uploaded_at.desc()).all()
+    user_documents = Document.active().filter_by(user_id=current_user.id).order_by(Document.uploaded_at.desc()).all()
     return render_template('list_documents.html', documents=user_documents)
 
 
@@ -106,7 +412,7 @@ def list_documents():
 def view_document(doc_hash):
     """Route untuk melihat dokumen berdasarkan hash dokumen."""
     # Cari dokumen berdasarkan doc_hash
-    document = Document.query.filter_by(doc_hash=doc_hash).first_or_404()
+    document = Document.active().filter_by(doc_hash=doc_hash).first_or_404()
 
     # Periksa apakah pengguna memiliki akses ke dokumen
     if document.user_id != current_user.id:
@@ -123,13 +429,85 @@ def view_document(doc_hash):
     return render_template('view_document.html', document=document)
 
 
+@document_bp.route('/content/<string:doc_hash>', methods=['GET'])
+@login_required
+def document_content(doc_hash):
+    """
+    Isi file dokumen dengan dukungan Range/If-Range, sehingga PDF.js dapat
+    mengambil halaman secara bertahap. ETag = file_hash (isi dokumen tidak berubah).
+    File tidak dilinearisasi; PDF.js membaca xref di akhir file lalu hanya
+    meminta rentang byte halaman yang ditampilkan.
+    """
+    document = Document.active().filter_by(doc_hash=doc_hash).first_or_404()
+
+    if document.user_id != current_user.id:
+        return jsonify({"error": "Anda tidak memiliki izin untuk dokumen ini."}), 403
+
+    if not os.path.exists(document.filepath):
+        return jsonify({"error": "Dokumen tidak ditemukan di server."}), 404
+
+    # DOCX ditampilkan lewat rendisi PDF-nya
+    if document.is_docx:
+        pdf_path = document.pdf_path
+        if pdf_path is None:
+            return conversion_not_ready(document)
+        return send_cached_file(pdf_path, mimetype='application/pdf', etag=f"{document.file_hash}-pdf")
+
+    mimetype, _ = mimetypes.guess_type(document.filename)
+    return send_cached_file(
+        document.filepath,
+        mimetype=mimetype or 'application/octet-stream',
+        etag=document.file_hash,
+        download_name=document.filename,
+    )
+
+
+
+@document_bp.route('/preview/<string:doc_hash>/<int:page>', methods=['GET'])
+@login_required
+def page_preview(doc_hash, page):
+    """
+    Pratinjau PNG satu halaman (0-based) untuk UI penempatan QR Code.
+    Ukuran (sisi terpanjang, piksel) dipilih lewat ?size=, dibatasi ke ALLOWED_SIZES.
+    """
+    size = request.args.get('size', DEFAULT_SIZE, type=int)
+    if size not in ALLOWED_SIZES:
+        return jsonify({"error": f"Ukuran pratinjau harus salah satu dari {list(ALLOWED_SIZES)}."}), 400
+
+    document = Document.active().filter_by(doc_hash=doc_hash).first_or_404()
+    if document.user_id != current_user.id:
+        return jsonify({"error": "Anda tidak memiliki izin untuk dokumen ini."}), 403
+
+    etag = f"{document.file_hash}-{page}-{size}"
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    pdf_path = document.pdf_path
+    if pdf_path is None:
+        return conversion_not_ready(document)
+
+    cache_folder, max_workers = preview_settings()
+    future = request_preview(pdf_path, document.file_hash, page, size,
+                             cache_folder=cache_folder, max_workers=max_workers)
+    try:
+        preview_file = future.result(timeout=current_app.config.get('PREVIEW_TIMEOUT', 30))
+    except PreviewUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    except FutureTimeoutError:
+        return jsonify({"error": "Pratinjau masih dirender, coba lagi."}), 503, {"Retry-After": "1"}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return send_cached_file(preview_file, mimetype='image/png', etag=etag)
+
 
 @document_bp.route('/document/delete/<string:doc_hash>', methods=['POST'])
 @login_required
 def delete_document(doc_hash):
     """Route to delete a specific document."""
     # Cari dokumen berdasarkan doc_hash
-    document = Document.query.filter_by(doc_hash=doc_hash).first_or_404()
+    document = Document.active().filter_by(doc_hash=doc_hash).first_or_404()
 
     # Verifikasi kepemilikan dokumen
     if document.user_id != current_user.id:
@@ -137,19 +515,11 @@ def delete_document(doc_hash):
         return redirect(url_for('document.list_documents'))
 
     try:
-        # Hapus tanda tangan terkait menggunakan document_hash
-        signatures = Signature.query.filter_by(document_hash=document.doc_hash).all()
-        for signature in signatures:
-            db.session.delete(signature)
-
-        # Hapus dokumen
-        filepath = document.filepath
-        db.session.delete(document)
+        # Soft delete: dokumen langsung tersembunyi; tanda tangan, baris dan
+        # file-nya dihapus oleh purge di background (app/utils/storage_cleanup.py)
+        document.deleted_at = datetime.utcnow()
         db.session.commit()
-
-        # Hapus file dari sistem
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        request_purge()
 
         flash("Document deleted successfully.", 'success')
     except Exception as e:
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response, abort
+from app.utils.metrics import is_enabled, render_prometheus
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Ekspor histogram instrumentasi dalam format teks Prometheus."""
+    if not is_enabled():
+        abort(404)
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,52 +1,149 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from app.utils.sign_token import sign_token
 from app.utils.verify_token import verify_token
 from app.utils.qr_utils import generate_qr_code
 from app.utils.add_qr_to_pdf import add_qr_to_pdf
-from app.utils.add_signature_to_pdf import add_signature_to_pdf
+from app.utils.add_qr_to_docx import add_qr_to_docx, DOCX_MIMETYPE
 from flask_login import login_required, current_user
 from app.models import Signature, Document
 from app.extensions import db
-from flask import render_template
-from PIL import Image
+from app.utils.metrics import span
+from app.utils.rate_limit import rate_limit, by_ip, by_token
+from app.utils.db_routing import read_replica
+from app.utils.mail_queue import enqueue_mail
+from app.utils.idempotency import idempotent
+from app.utils.storage_cleanup import DEFAULT_SIGNATURE_FOLDER, request_purge
+from flask_mail import Message
+from app.utils.http_cache import send_cached_file, file_etag, combined_etag, not_modified, versioned_url
+from flask import render_template, current_app
 from io import BytesIO
 import base64
+import glob
 import os
 import logging
 
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 signature_bp = Blueprint('signature', __name__)
 
-SIGNATURE_FOLDER = os.path.abspath("app/static/signatures")
-
-if not os.path.exists(SIGNATURE_FOLDER):
-    os.makedirs(SIGNATURE_FOLDER, exist_ok=True)
-    logging.info(f"Folder signature berhasil dibuat di {SIGNATURE_FOLDER}")
+def signature_folder():
+    """Folder gambar tanda tangan, QR Code dan hasil stamping (config SIGNATURE_FOLDER)."""
+    folder = current_app.config.get("SIGNATURE_FOLDER", DEFAULT_SIGNATURE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    return folder
 
 def save_signature_image(signature_data, document_hash):
     try:
         if not signature_data.startswith("data:image/"):
             raise ValueError("Format Base64 tidak valid atau tidak sesuai untuk gambar.")
 
+        from PIL import Image
+
         base64_data = signature_data.split(",")[1]
         missing_padding = len(base64_data) % 4
         if missing_padding:
             base64_data += "=" * (4 - missing_padding)
 
-        img_data = base64.b64decode(base64_data)
-        img = Image.open(BytesIO(img_data))
+        with span("signature_image"):
+            img_data = base64.b64decode(base64_data)
+            img = Image.open(BytesIO(img_data))
 
-        signature_filename = f"{document_hash}_signature.png"
-        signature_path = os.path.join(SIGNATURE_FOLDER, signature_filename)
+            signature_filename = f"{document_hash}_signature.png"
+            signature_path = os.path.join(signature_folder(), signature_filename)
 
-        img.save(signature_path)
-        logging.info(f"Tanda tangan disimpan di: {signature_path}")
+            img.save(signature_path)
+        logger.debug("Tanda tangan disimpan di: %s", signature_path)
         return signature_path
     except Exception as e:
-        logging.error(f"Gagal menyimpan tanda tangan: {e}")
+        logger.error("Gagal menyimpan tanda tangan: %s", e)
         raise Exception(f"Terjadi kesalahan saat menyimpan tanda tangan: {e}")
 
+def signed_output_path(document_hash, etag, extension="pdf"):
+    """Path dokumen bertanda tangan untuk kombinasi input (ETag) tertentu."""
+    return os.path.join(signature_folder(), f"{document_hash}_{etag[:16]}_signed.{extension}")
+
+def remove_stale_signed_outputs(document_hash, extension):
+    """Hapus hasil stamping lama (posisi/QR berbeda) untuk dokumen ini."""
+    for stale_path in glob.glob(os.path.join(signature_folder(), f"{document_hash}_*_signed.{extension}")):
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass  # Sudah dihapus oleh request lain
+
+def signed_doc_placement(signature):
+    """Posisi, ukuran dan halaman target QR Code pada dokumen bertanda tangan."""
+    return (signature.qr_position_x, signature.qr_position_y, signature.qr_width, signature.qr_height,
+            signature.target_page)
+
+def uses_docx_stamping(document, signature):
+    """DOCX tanpa rendisi PDF atau tanpa posisi QR: QR ditempel di akhir dokumen DOCX."""
+    return document.is_docx and (document.pdf_path is None or None in signed_doc_placement(signature))
+
+def signed_doc_etag(document, signature):
+    """
+    ETag dokumen bertanda tangan: isi dokumen, isi QR Code dan posisi stempel.
+    None jika posisi QR Code belum lengkap untuk stamping PDF.
+    """
+    qr_etag = file_etag(signature.qr_code_path)
+    if uses_docx_stamping(document, signature):
+        return combined_etag(document.file_hash, qr_etag, signature.qr_width or 100, signature.qr_height or 100,
+                             signature.token, "docx")
+    placement = signed_doc_placement(signature)
+    if None in placement:
+        return None
+    return combined_etag(document.file_hash, qr_etag, *placement)
+
+def signed_doc_url(document, signature):
+    """URL unduhan dokumen bertanda tangan dengan versi isi, atau None jika belum bisa dibuat."""
+    if not signature.qr_code_path or not os.path.exists(signature.qr_code_path):
+        return None
+    etag = signed_doc_etag(document, signature)
+    if etag is None:
+        return None
+    return versioned_url('signature.generate_signed_doc', etag, document_hash=document.doc_hash)
+
+def generate_signed_docx(document, signature):
+    """Stamping DOCX: QR di akhir dokumen + part tanda tangan, disimpan per ETag."""
+    width = signature.qr_width or 100
+    height = signature.qr_height or 100
+    etag = signed_doc_etag(document, signature)
+    output_path = signed_output_path(document.doc_hash, etag, "docx")
+    download_name = f"{document.doc_hash}_signed.docx"
+
+    if not os.path.exists(output_path):
+        remove_stale_signed_outputs(document.doc_hash, "docx")
+        add_qr_to_docx(
+            document.filepath,
+            signature.qr_code_path,
+            output_path,
+            width=width,
+            height=height,
+            signature_info={
+                "document_hash": document.doc_hash,
+                "document_name": document.filename,
+                "signer_email": signature.signer_email,
+                "signed_at": signature.timestamp.isoformat() if signature.timestamp else None,
+                "token": signature.token,
+            }
+        )
+        logger.info("Dokumen DOCX bertanda tangan berhasil dibuat untuk %s", document.doc_hash)
+
+    return send_cached_file(output_path, mimetype=DOCX_MIMETYPE, etag=etag, as_attachment=True,
+                            download_name=download_name)
+
+def send_signature_notification(signature, validation_url):
+    """Antrekan email konfirmasi ke penanda tangan setelah tanda tangan tersimpan."""
+    if not current_app.config.get('SIGNATURE_NOTIFY_ENABLED', True):
+        return
+    enqueue_mail(Message(
+        subject=f"Dokumen ditandatangani: {signature.document_name}",
+        recipients=[signature.signer_email],
+        body=(f"Dokumen {signature.document_name} telah Anda tandatangani pada {signature.timestamp}.\n"
+              f"Validasi tanda tangan: {validation_url}"),
+        sender=current_app.config.get('MAIL_DEFAULT_SENDER')
+    ))
+
+
 def validate_request_data(data, required_fields):
     missing_fields = [field for field in required_fields if field not in data]
     if missing_fields:
@@ -55,6 +152,7 @@ def validate_request_data(data, required_fields):
 
 @signature_bp.route('/add-signature', methods=['POST'])
 @login_required
+@idempotent
 def add_signature():
     try:
         data = request.json
@@ -64,7 +162,7 @@ def add_signature():
         if not document_hash or not signature_data:
             return jsonify({"error": "Data tidak lengkap. Diperlukan document_hash dan signature."}), 400
 
-        document = Document.query.filter_by(doc_hash=document_hash).first_or_404()
+        document = Document.active().filter_by(doc_hash=document_hash).first_or_404()
         if document.user_id != current_user.id:
             return jsonify({"error": "Anda tidak memiliki izin untuk dokumen ini."}), 403
 
@@ -80,7 +178,7 @@ def add_signature():
         validation_url = f"{base_url}?token={token}"  # Buat URL validasi
 
         # Generate QR Code
-        qr_code_path = os.path.join(SIGNATURE_FOLDER, f"{document_hash}_qr.png")
+        qr_code_path = os.path.join(signature_folder(), f"{document_hash}_qr.png")
         generate_qr_code(validation_url, qr_code_path)  # Gunakan URL validasi sebagai data untuk QR
 
         # Simpan tanda tangan ke database
@@ -96,16 +194,19 @@ def add_signature():
         signature.qr_code_path = qr_code_path
         db.session.commit()
 
+        send_signature_notification(signature, validation_url)
+
         return jsonify({
             "message": "Tanda tangan berhasil ditambahkan.",
             "signature_path": signature_path,
             "qr_code_path": qr_code_path,
+            "qr_url": versioned_url('signature.view_qr_code', file_etag(qr_code_path), document_hash=document_hash),
             "token": token,
             "validation_url": validation_url  # Kembalikan URL validasi untuk keperluan debug/testing
         }), 201
 
     except Exception as e:
-        logging.error(f"Terjadi kesalahan: {e}")
+        logger.error("Terjadi kesalahan: %s", e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
 
@@ -122,7 +223,7 @@ def create_signature():
         document_hash = data["doc_hash"]
 
         # Ambil dokumen dari database
-        document = Document.query.filter_by(doc_hash=document_hash).first_or_404()
+        document = Document.active().filter_by(doc_hash=document_hash).first_or_404()
 
         # Format pesan untuk ditandatangani
         message_to_sign = f"Tanda tangan untuk dokumen: {document.filename}, oleh {current_user.email}"
@@ -142,11 +243,13 @@ def create_signature():
         return jsonify({"message": "Tanda tangan berhasil dibuat", "token": token}), 201
 
     except Exception as e:
-        logging.error(f"Terjadi kesalahan saat membuat tanda tangan: {e}")
+        logger.error("Terjadi kesalahan saat membuat tanda tangan: %s", e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
 
 @signature_bp.route('/check', methods=['POST'])
+@rate_limit('check', by_ip, by_token)
+@read_replica
 def check_signature():
     try:
         data = request.json
@@ -159,12 +262,12 @@ def check_signature():
         signature = Signature.query.filter_by(token=token).first()
 
         if not signature:
-            logging.warning(f"Token tidak ditemukan di database: {token}")
+            logger.warning("Token tidak ditemukan di database.")
             return jsonify({"error": "Token tidak ditemukan"}), 404
 
         # Pesan yang diharapkan
         expected_message = f"Tanda tangan untuk dokumen: {signature.document_name}, oleh {signature.signer_email}"
-        logging.info(f"Memverifikasi token: {token} untuk pesan: {expected_message}")
+        logger.debug("Memverifikasi token untuk tanda tangan %s", signature.id)
 
         # Verifikasi token
         if verify_token(token, expected_message):
@@ -175,11 +278,11 @@ def check_signature():
                 "timestamp": str(signature.timestamp)
             }), 200
         else:
-            logging.warning("Tanda tangan tidak valid.")
+            logger.warning("Tanda tangan tidak valid untuk tanda tangan %s.", signature.id)
             return jsonify({"error": "Tanda tangan tidak valid"}), 400
 
     except Exception as e:
-        logging.error(f"Kesalahan saat memverifikasi tanda tangan: {e}")
+        logger.error("Kesalahan saat memverifikasi tanda tangan: %s", e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
 
@@ -188,33 +291,27 @@ def check_signature():
 @login_required
 def view_qr_code(document_hash):
     try:
-        logging.info(f"Menerima permintaan QR Code untuk dokumen dengan hash: {document_hash}")
-
         # Ambil tanda tangan berdasarkan hash dokumen
         signature = Signature.query.filter_by(document_hash=document_hash).first_or_404()
 
-        logging.info(f"Tanda tangan ditemukan: {signature}")
-
         # Validasi izin pengguna
         if signature.user_id != current_user.id:
-            logging.warning(f"User {current_user.id} tidak memiliki izin untuk QR Code dokumen {document_hash}")
+            logger.warning("User %s tidak memiliki izin untuk QR Code dokumen %s", current_user.id, document_hash)
             return jsonify({"error": "Anda tidak memiliki izin untuk QR Code ini."}), 403
 
         # Cek path QR Code
         if not signature.qr_code_path:
-            logging.error("Path QR Code kosong di database.")
+            logger.error("Path QR Code kosong di database.")
             return jsonify({"error": "QR Code tidak ditemukan di database."}), 404
         if not os.path.exists(signature.qr_code_path):
-            logging.error(f"QR Code tidak ditemukan di path: {signature.qr_code_path}")
+            logger.error("QR Code tidak ditemukan di path: %s", signature.qr_code_path)
             return jsonify({"error": "QR Code tidak ditemukan"}), 404
 
-        logging.info(f"QR Code ditemukan di path: {signature.qr_code_path}")
-
-        # Kirim file QR Code
-        return send_file(signature.qr_code_path, mimetype='image/png')
+        # Kirim file QR Code (ETag dari isi file, 304 jika tidak berubah)
+        return send_cached_file(signature.qr_code_path, mimetype='image/png')
 
     except Exception as e:
-        logging.error(f"Terjadi kesalahan saat mengakses QR Code untuk dokumen {document_hash}: {e}")
+        logger.error("Terjadi kesalahan saat mengakses QR Code untuk dokumen %s: %s", document_hash, e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
 
@@ -222,34 +319,29 @@ def view_qr_code(document_hash):
 @login_required
 def get_token(document_hash):
     try:
-        logging.info(f"Menerima permintaan token untuk dokumen dengan hash: {document_hash}")
-
         # Validasi dokumen berdasarkan hash
-        document = Document.query.filter_by(doc_hash=document_hash).first_or_404()
-        logging.info(f"Dokumen ditemukan: {document.filename}")
+        document = Document.active().filter_by(doc_hash=document_hash).first_or_404()
 
         if document.user_id != current_user.id:
-            logging.warning(f"User {current_user.id} tidak memiliki izin untuk dokumen {document_hash}")
+            logger.warning("User %s tidak memiliki izin untuk dokumen %s", current_user.id, document_hash)
             return jsonify({"error": "Anda tidak memiliki izin untuk dokumen ini."}), 403
 
         # Ambil tanda tangan berdasarkan hash dokumen
         signature = Signature.query.filter_by(document_hash=document_hash).first()
         if not signature:
-            logging.warning(f"Tanda tangan tidak ditemukan untuk dokumen {document_hash}")
+            logger.warning("Tanda tangan tidak ditemukan untuk dokumen %s", document_hash)
             return jsonify({"error": "Token tidak ditemukan untuk dokumen ini."}), 404
 
         # Validasi token
         if not signature.token:
-            logging.error("Token kosong ditemukan di database.")
+            logger.error("Token kosong ditemukan di database.")
             return jsonify({"error": "Token belum dihasilkan untuk dokumen ini."}), 404
         
         if None in (signature.qr_position_x, signature.qr_position_y, signature.qr_width, signature.qr_height):
-            logging.warning(f"Data posisi atau ukuran QR Code belum lengkap untuk dokumen {document_hash}")
+            logger.warning("Data posisi atau ukuran QR Code belum lengkap untuk dokumen %s", document_hash)
             return jsonify({"error": "Data posisi atau ukuran QR Code belum lengkap"}), 400
 
 
-        logging.info(f"Token ditemukan untuk dokumen {document_hash}: {signature.token}")
-
         # Kembalikan respons dengan data posisi QR code
         return jsonify({
             "token": signature.token,
@@ -259,11 +351,12 @@ def get_token(document_hash):
             "qr_position_x": signature.qr_position_x,
             "qr_position_y": signature.qr_position_y,
             "qr_width": signature.qr_width,
-            "qr_height": signature.qr_height
+            "qr_height": signature.qr_height,
+            "signed_doc_url": signed_doc_url(document, signature)
         }), 200
 
     except Exception as e:
-        logging.error(f"Kesalahan saat mengambil token untuk dokumen {document_hash}: {e}")
+        logger.error("Kesalahan saat mengambil token untuk dokumen %s: %s", document_hash, e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
 
@@ -272,41 +365,59 @@ def get_token(document_hash):
 @login_required
 def generate_signed_doc(document_hash):
     try:
-        logging.info(f"Memulai proses generate dokumen bertanda tangan untuk document_hash: {document_hash}")
-
-        document = Document.query.filter_by(doc_hash=document_hash).first_or_404()
-        logging.info(f"Dokumen ditemukan: {document.filename}, Path: {document.filepath}")
+        document = Document.active().filter_by(doc_hash=document_hash).first_or_404()
 
         signature = Signature.query.filter_by(document_hash=document_hash).first_or_404()
-        logging.info(f"Signature ditemukan untuk document_hash: {document_hash}")
 
         if document.user_id != current_user.id:
-            logging.warning(f"User ID {current_user.id} tidak memiliki akses ke dokumen ini.")
+            logger.warning("User ID %s tidak memiliki akses ke dokumen %s.", current_user.id, document_hash)
             return jsonify({"error": "Anda tidak memiliki izin untuk dokumen ini."}), 403
 
-        pdf_path = document.filepath
+        # Untuk DOCX, stamping PDF memakai rendisi hasil konversi (jika sudah ada)
+        pdf_path = document.pdf_path or document.filepath
         qr_code_path = signature.qr_code_path
-        output_path = os.path.join(SIGNATURE_FOLDER, f"{document_hash}_signed.pdf")
 
         # Periksa keberadaan file PDF dan QR Code
         if not os.path.exists(pdf_path):
-            logging.error(f"File PDF tidak ditemukan: {pdf_path}")
+            logger.error("File PDF tidak ditemukan: %s", pdf_path)
             return jsonify({"error": f"File PDF tidak ditemukan: {pdf_path}"}), 404
 
         if not os.path.exists(qr_code_path):
-            logging.error(f"File QR Code tidak ditemukan: {qr_code_path}")
+            logger.error("File QR Code tidak ditemukan: %s", qr_code_path)
             return jsonify({"error": f"File QR Code tidak ditemukan: {qr_code_path}"}), 404
 
-        # Ambil posisi, ukuran, dan halaman target QR Code
-        if None in (signature.qr_position_x, signature.qr_position_y, signature.qr_width, signature.qr_height, signature.target_page):
-            logging.warning("Posisi, ukuran, atau halaman QR Code belum diatur.")
+        # DOCX tanpa rendisi PDF atau tanpa posisi QR: QR ditempel di akhir dokumen DOCX
+        if uses_docx_stamping(document, signature):
+            return generate_signed_docx(document, signature)
+
+        # ETag ditentukan oleh isi dokumen, isi QR Code dan posisi stempel;
+        # hasil stamping disimpan per ETag sehingga bisa dipakai ulang.
+        etag = signed_doc_etag(document, signature)
+        if etag is None:
+            logger.warning("Posisi, ukuran, atau halaman QR Code belum diatur untuk dokumen %s.", document_hash)
             return jsonify({"error": "Posisi, ukuran, atau halaman QR Code belum diatur"}), 400
 
-        logging.info(f"Menambahkan QR Code ke dokumen: Posisi (x={signature.qr_position_x}, y={signature.qr_position_y}), "
-                     f"Ukuran (width={signature.qr_width}, height={signature.qr_height}), Halaman: {signature.target_page}")
+        output_path = signed_output_path(document_hash, etag)
+        download_name = f"{document_hash}_signed.pdf"
+
+        if os.path.exists(output_path):
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+            return send_cached_file(output_path, etag=etag, as_attachment=True, download_name=download_name)
+
+        # Hapus versi lama dengan posisi/QR yang berbeda
+        remove_stale_signed_outputs(document_hash, "pdf")
+
+        logger.debug("Menambahkan QR Code ke dokumen %s: posisi (%s, %s), ukuran (%s x %s), halaman %s",
+                     document_hash, signature.qr_position_x, signature.qr_position_y,
+                     signature.qr_width, signature.qr_height, signature.target_page)
+
+        # Geometri halaman dari indeks upload (None untuk dokumen lama)
+        page = document.get_page(signature.target_page)
 
         # Tambahkan QR Code ke halaman target
-        success = add_qr_to_pdf(
+        stamp_mode = add_qr_to_pdf(
             pdf_path,
             qr_code_path,
             output_path,
@@ -314,22 +425,25 @@ def generate_signed_doc(document_hash):
             y=signature.qr_position_y,
             width=signature.qr_width,
             height=signature.qr_height,
-            target_page=signature.target_page  # Gunakan halaman target
+            target_page=signature.target_page,  # Gunakan halaman target
+            page_size=(page.width, page.height) if page is not None else None,
+            rotation=page.rotation if page is not None else 0,
+            linearize=current_app.config.get("PDF_LINEARIZE", True)
         )
 
-        if not success:
-            logging.error("Gagal menambahkan QR Code ke dokumen PDF.")
+        if not stamp_mode:
+            logger.error("Gagal menambahkan QR Code ke dokumen PDF %s.", document_hash)
             return jsonify({"error": "Gagal menambahkan QR Code ke dokumen PDF"}), 500
 
         if not os.path.exists(output_path):
-            logging.error(f"File bertanda tangan tidak ditemukan setelah proses: {output_path}")
+            logger.error("File bertanda tangan tidak ditemukan setelah proses: %s", output_path)
             return jsonify({"error": f"File bertanda tangan tidak ditemukan: {output_path}"}), 500
 
-        logging.info(f"Dokumen bertanda tangan berhasil dibuat: {output_path}")
-        return send_file(output_path, as_attachment=True)
+        logger.info("Dokumen bertanda tangan berhasil dibuat untuk %s", document_hash)
+        return send_cached_file(output_path, etag=etag, as_attachment=True, download_name=download_name)
 
     except Exception as e:
-        logging.error(f"Kesalahan saat membuat dokumen bertanda tangan: {e}")
+        logger.error("Kesalahan saat membuat dokumen bertanda tangan: %s", e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
 
@@ -338,16 +452,16 @@ def generate_signed_doc(document_hash):
 @login_required
 def delete_signatures():
     try:
-        signatures = Signature.query.all()
-        for signature in signatures:
-            if signature.qr_code_path and os.path.exists(signature.qr_code_path):
-                os.remove(signature.qr_code_path)
-
+        # Hanya kolom yang dibutuhkan yang dibaca; baris dihapus dengan satu DELETE
+        # dan file (QR, gambar tanda tangan, hasil stamping) dibuang di background
+        rows = db.session.query(Signature.document_hash, Signature.qr_code_path).all()
         Signature.query.delete()
         db.session.commit()
+        request_purge(doc_hashes={row.document_hash for row in rows},
+                      paths=[row.qr_code_path for row in rows if row.qr_code_path])
 
-        db.session.execute("ALTER TABLE signature AUTO_INCREMENT = 1")
-        db.session.commit()
+        if db.engine.dialect.name == 'mysql':
+            Signature.reset_auto_increment()
 
         return jsonify({"message": "Semua tanda tangan berhasil dihapus dan AUTO_INCREMENT direset."}), 200
     except Exception as e:
@@ -356,6 +470,8 @@ def delete_signatures():
     
     
 @signature_bp.route('/validate', methods=['GET'])
+@rate_limit('validate', by_ip, by_token)
+@read_replica
 def validate_qr():
     try:
         token = request.args.get('token')
@@ -370,17 +486,23 @@ def validate_qr():
         if not verify_token(token, expected_message):
             return jsonify({"error": "Token tidak valid atau pesan tidak cocok."}), 400
 
+        # QR Code ditampilkan lewat view-signature dengan versi isi (immutable)
+        signature_image_url = None
+        if signature.qr_code_path and os.path.exists(signature.qr_code_path):
+            signature_image_url = versioned_url('signature.view_signature', file_etag(signature.qr_code_path),
+                                                document_hash=signature.document_hash)
+
         # Render halaman validasi
         return render_template(
             "signature_validation.html",
             document_name=signature.document_name,
             signed_by=signature.signer_email,
             timestamp=signature.timestamp,
-            signature_image=signature.qr_code_path  # Menampilkan QR Code jika diperlukan
+            signature_image_url=signature_image_url
         )
 
     except Exception as e:
-        logging.error(f"Terjadi kesalahan saat validasi: {e}")
+        logger.error("Terjadi kesalahan saat validasi: %s", e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
     
@@ -392,10 +514,10 @@ def view_signature(document_hash):
         if not signature.qr_code_path or not os.path.exists(signature.qr_code_path):
             return jsonify({"error": "Tanda tangan tidak ditemukan"}), 404
 
-        return send_file(signature.qr_code_path, mimetype='image/png')
+        return send_cached_file(signature.qr_code_path, mimetype='image/png', private=False)
 
     except Exception as e:
-        logging.error(f"Terjadi kesalahan saat melihat tanda tangan: {e}")
+        logger.error("Terjadi kesalahan saat melihat tanda tangan: %s", e)
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
     
 @signature_bp.route('/save-qr-settings', methods=['POST'])
@@ -403,7 +525,6 @@ def view_signature(document_hash):
 def save_qr_settings():
     try:
         data = request.json
-        logging.info(f"Data yang diterima dari frontend: {data}")
 
         document_hash = data.get("document_hash")
         x = data.get("x")
@@ -412,11 +533,12 @@ def save_qr_settings():
         height = data.get("height")
         target_page = data.get("target_page", 0)  # Halaman default 0
 
-        logging.info(f"document_hash: {document_hash}, x: {x}, y: {y}, width: {width}, height: {height}, target_page: {target_page}")
+        logger.debug("Pengaturan QR untuk %s: x=%s, y=%s, width=%s, height=%s, target_page=%s",
+                     document_hash, x, y, width, height, target_page)
 
         # Validasi kelengkapan data
         if not all([document_hash, x is not None, y is not None, width, height, target_page is not None]):
-            logging.warning("Data yang diterima tidak lengkap atau salah format.")
+            logger.warning("Data yang diterima tidak lengkap atau salah format.")
             return jsonify({"error": "Data tidak lengkap atau salah format"}), 400
 
         # Validasi ukuran dan posisi
@@ -433,6 +555,19 @@ def save_qr_settings():
 
         # Simpan posisi QR ke database
         signature = Signature.query.filter_by(document_hash=document_hash, user_id=current_user.id).first_or_404()
+
+        # Validasi halaman dan batas stempel dari indeks geometri (tanpa membuka PDF)
+        document = Document.active().filter_by(doc_hash=document_hash).first()
+        if document is not None and document.page_count is not None:
+            if not 0 <= int(target_page) < document.page_count:
+                return jsonify({"error": f"Halaman target {target_page} tidak valid. Dokumen memiliki {document.page_count} halaman."}), 400
+            page = document.get_page(int(target_page))
+            if page is not None:
+                page_width, page_height = page.display_size
+                if x + width > page_width or y + height > page_height:
+                    return jsonify({
+                        "error": f"QR Code melewati batas halaman ({page_width:g} x {page_height:g} pt)."
+                    }), 400
         signature.qr_position_x = float(x)
         signature.qr_position_y = float(y)
         signature.qr_width = float(width)
@@ -440,10 +575,13 @@ def save_qr_settings():
         signature.target_page = int(target_page)
         db.session.commit()
 
-        return jsonify({"message": "Posisi dan ukuran QR Code berhasil disimpan"}), 200
+        return jsonify({
+            "message": "Posisi dan ukuran QR Code berhasil disimpan",
+            "signed_doc_url": signed_doc_url(document, signature) if document is not None else None
+        }), 200
 
     except Exception as e:
-        logging.error(f"Kesalahan saat menyimpan posisi QR Code: {e}")
+        logger.error("Kesalahan saat menyimpan posisi QR Code: %s", e)
         db.session.rollback()
         return jsonify({"error": f"Terjadi kesalahan: {str(e)}"}), 500
 
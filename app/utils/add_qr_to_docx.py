@@ -0,0 +1,240 @@
+"""
+Menempelkan QR Code tanda tangan ke dokumen DOCX.
+
+DOCX adalah paket ZIP. Output ditulis entri demi entri: entri yang tidak berubah
+disalin sebagai byte terkompresi apa adanya (local header + data), tanpa
+dekompresi atau kompresi ulang. Hanya ``word/document.xml``, relasinya,
+``[Content_Types].xml`` dan ``_rels/.rels`` yang dibaca dan ditulis ulang,
+ditambah dua part baru: gambar QR dan part tanda tangan (token + penanda tangan).
+Biaya karenanya sebanding dengan ukuran part yang berubah, bukan ukuran paket.
+"""
+import os
+import re
+import struct
+import zipfile
+import logging
+import tempfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+EMU_PER_POINT = 12700
+SIGNATURE_PART = "signature/signature.xml"
+SIGNATURE_RELATIONSHIP = "http://schemas.proyek2-digital-signature/relationships/signature"
+IMAGE_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+EMPTY_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"></Relationships>'
+)
+
+DRAWING_TEMPLATE = (
+    '<w:p><w:r><w:drawing>'
+    '<wp:inline xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'distT="0" distB="0" distL="0" distR="0">'
+    '<wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{doc_pr_id}" name="QR Signature"/>'
+    '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:nvPicPr><pic:cNvPr id="0" name="qr_signature.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+    '<pic:blipFill><a:blip xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+    '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+    '</pic:pic></a:graphicData></a:graphic></wp:inline>'
+    '</w:drawing></w:r></w:p>'
+)
+
+
+def _unique_name(names, stem, suffix):
+    name, counter = f"{stem}{suffix}", 0
+    while name in names:
+        counter += 1
+        name = f"{stem}{counter}{suffix}"
+    return name
+
+
+def _add_relationship(rels_xml, rel_type, target, preferred_id):
+    """Tambahkan <Relationship> dengan Id unik; return (xml baru, Id)."""
+    rel_id, counter = preferred_id, 0
+    while f'Id="{rel_id}"' in rels_xml:
+        counter += 1
+        rel_id = f"{preferred_id}{counter}"
+    relationship = f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{target}"/>'
+    end = rels_xml.rfind("</Relationships>")
+    if end < 0:
+        raise ValueError("File relasi DOCX tidak valid.")
+    return rels_xml[:end] + relationship + rels_xml[end:], rel_id
+
+
+def _add_content_type(types_xml, element, marker):
+    if marker.lower() in types_xml.lower():
+        return types_xml
+    end = types_xml.rfind("</Types>")
+    if end < 0:
+        raise ValueError("[Content_Types].xml tidak valid.")
+    return types_xml[:end] + element + types_xml[end:]
+
+
+def _insert_drawing(document_xml, rel_id, width, height):
+    """Sisipkan paragraf berisi gambar inline di akhir body (sebelum sectPr body)."""
+    if 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"' not in document_xml:
+        raise ValueError("word/document.xml tidak memakai namespace WordprocessingML standar.")
+
+    doc_pr_ids = [int(value) for value in re.findall(r'<wp:docPr\b[^>]*\bid="(\d+)"', document_xml)]
+    drawing = DRAWING_TEMPLATE.format(
+        cx=int(width * EMU_PER_POINT), cy=int(height * EMU_PER_POINT),
+        doc_pr_id=max(doc_pr_ids, default=0) + 1, rel_id=rel_id
+    )
+
+    body_end = document_xml.rfind("</w:body>")
+    if body_end < 0:
+        raise ValueError("word/document.xml tidak memiliki <w:body>.")
+    # sectPr milik body selalu menjadi anak terakhir, setelah paragraf/tabel terakhir
+    section = document_xml.rfind("<w:sectPr", 0, body_end)
+    last_block = max(document_xml.rfind("</w:p>", 0, body_end), document_xml.rfind("</w:tbl>", 0, body_end))
+    insert_at = section if section > last_block else body_end
+    return document_xml[:insert_at] + drawing + document_xml[insert_at:]
+
+
+def _signature_part(signature_info):
+    fields = "".join(
+        f"<{key}>{escape(str(value))}</{key}>" for key, value in signature_info.items() if value is not None
+    )
+    return f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<signature>{fields}</signature>'
+
+
+def _entry_range(fp, info):
+    """Rentang byte (local header + data + data descriptor) satu entri di arsip."""
+    fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    name_length, extra_length = header[10], header[11]
+    end = info.header_offset + zipfile.sizeFileHeader + name_length + extra_length + info.compress_size
+    if info.flag_bits & 0x08:
+        fp.seek(end)
+        end += 16 if fp.read(4) == b"PK\x07\x08" else 12
+    return info.header_offset, end
+
+
+def _copy_entry(archive, info, output):
+    """Salin entri terkompresi apa adanya; return offset local header di output."""
+    start, end = _entry_range(archive.fp, info)
+    offset = output.tell()
+    archive.fp.seek(start)
+    remaining = end - start
+    while remaining:
+        chunk = archive.fp.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise ValueError(f"Entri ZIP terpotong: {info.filename}")
+        output.write(chunk)
+        remaining -= len(chunk)
+    return offset
+
+
+def _central_directory_record(info, offset):
+    encoding = "utf-8" if info.flag_bits & 0x800 else "cp437"
+    filename = info.filename.encode(encoding)
+    year, month, day, hour, minute, second = info.date_time
+    dos_time = hour << 11 | minute << 5 | second // 2
+    dos_date = (year - 1980) << 9 | month << 5 | day
+    record = struct.pack(
+        zipfile.structCentralDir, zipfile.stringCentralDir,
+        info.create_version, info.create_system, info.extract_version, info.reserved,
+        info.flag_bits, info.compress_type, dos_time, dos_date,
+        info.CRC, info.compress_size, info.file_size,
+        len(filename), len(info.extra), len(info.comment),
+        0, info.internal_attr, info.external_attr, offset
+    )
+    return record + filename + info.extra + info.comment
+
+
+@timed("add_qr_to_docx")
+def add_qr_to_docx(docx_path, qr_path, output_path, width=100, height=100, signature_info=None):
+    """
+    Tempelkan QR Code di akhir dokumen DOCX dan simpan part tanda tangan.
+    :param width: Lebar gambar QR dalam point.
+    :param height: Tinggi gambar QR dalam point.
+    :param signature_info: Dict metadata tanda tangan (mis. token, signer_email).
+    :return: output_path. File output ditulis atomik (temp file + rename).
+    """
+    with zipfile.ZipFile(docx_path) as source:
+        names = set(source.namelist())
+        if "word/document.xml" not in names or "[Content_Types].xml" not in names:
+            raise ValueError("Bukan dokumen DOCX yang valid.")
+
+        rels_name = "word/_rels/document.xml.rels"
+        media_name = _unique_name(names, "word/media/qr_signature", ".png")
+        rels_xml = source.read(rels_name).decode("utf-8") if rels_name in names else EMPTY_RELATIONSHIPS
+        rels_xml, rel_id = _add_relationship(rels_xml, IMAGE_RELATIONSHIP, media_name[len("word/"):], "rIdQrSignature")
+
+        types_xml = source.read("[Content_Types].xml").decode("utf-8")
+        types_xml = _add_content_type(types_xml, '<Default Extension="png" ContentType="image/png"/>',
+                                      'Extension="png"')
+
+        replaced = {
+            "[Content_Types].xml": None,
+            "word/document.xml": _insert_drawing(source.read("word/document.xml").decode("utf-8"),
+                                                 rel_id, width, height).encode("utf-8"),
+            rels_name: rels_xml.encode("utf-8"),
+        }
+
+        if signature_info:
+            types_xml = _add_content_type(
+                types_xml,
+                f'<Override PartName="/{SIGNATURE_PART}" ContentType="application/xml"/>',
+                f'PartName="/{SIGNATURE_PART}"'
+            )
+            package_rels = source.read("_rels/.rels").decode("utf-8") if "_rels/.rels" in names else EMPTY_RELATIONSHIPS
+            if SIGNATURE_PART not in package_rels:
+                package_rels, _ = _add_relationship(package_rels, SIGNATURE_RELATIONSHIP, SIGNATURE_PART, "rIdSignature")
+            replaced["_rels/.rels"] = package_rels.encode("utf-8")
+            replaced[SIGNATURE_PART] = _signature_part(signature_info).encode("utf-8")
+        replaced["[Content_Types].xml"] = types_xml.encode("utf-8")
+
+        # Part yang berubah dikompresi di buffer kecil, lalu disalin seperti entri lain
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as changed:
+            for name, data in replaced.items():
+                original = source.getinfo(name) if name in names else None
+                entry = zipfile.ZipInfo(name, date_time=original.date_time if original else (1980, 1, 1, 0, 0, 0))
+                entry.external_attr = original.external_attr if original else 0o600 << 16
+                changed.writestr(entry, data, compress_type=zipfile.ZIP_DEFLATED)
+            # PNG sudah terkompresi: simpan tanpa deflate
+            changed.write(qr_path, media_name, compress_type=zipfile.ZIP_STORED)
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix=".docx.tmp")
+        try:
+            with zipfile.ZipFile(buffer) as changed, os.fdopen(fd, "wb") as output:
+                entries = []
+                for info in source.infolist():
+                    if info.filename in replaced:
+                        info = changed.getinfo(info.filename)
+                        entries.append((info, _copy_entry(changed, info, output)))
+                    else:
+                        entries.append((info, _copy_entry(source, info, output)))
+                written = {info.filename for info, _ in entries}
+                for name in list(replaced) + [media_name]:
+                    if name not in written:
+                        info = changed.getinfo(name)
+                        entries.append((info, _copy_entry(changed, info, output)))
+
+                central_offset = output.tell()
+                for info, offset in entries:
+                    output.write(_central_directory_record(info, offset))
+                central_size = output.tell() - central_offset
+                if central_offset + central_size > 0xFFFFFFFF:
+                    raise ValueError("Dokumen DOCX terlalu besar (memerlukan ZIP64).")
+                output.write(struct.pack(
+                    zipfile.structEndArchive, zipfile.stringEndArchive,
+                    0, 0, len(entries), len(entries), central_size, central_offset, 0
+                ))
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    logger.debug("Dokumen DOCX bertanda tangan disimpan: %s", output_path)
+    return output_path
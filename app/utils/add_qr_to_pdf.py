@@ -1,14 +1,38 @@
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
 import io
 import os
 import logging
+import tempfile
+from app.utils.metrics import timed, span
+from app.utils.linearize_pdf import linearize_pdf
+from app.utils.pdf_incremental import (
+    stamp_image, read_page_geometry, display_size, placement_matrix, IncrementalUpdateUnsupported
+)
 
-def add_qr_to_pdf(pdf_path, qr_path, output_path, x, y, width, height, target_page=0, canvas_width=None, canvas_height=None):
-    try:
-        # Setup logging
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Jalur stamping yang dipakai (nilai kembalian add_qr_to_pdf)
+STAMP_INCREMENTAL = "incremental"
+STAMP_REWRITTEN = "rewritten"
 
+@timed("add_qr_to_pdf")
+def add_qr_to_pdf(pdf_path, qr_path, output_path, x, y, width, height, target_page=0, canvas_width=None, canvas_height=None,
+                  page_size=None, rotation=0, linearize=False):
+    """
+    Tempelkan QR Code ke halaman target.
+    Jalur utama memakai incremental update (hanya halaman target yang dibaca dan
+    ditulis); PDF yang tidak mendukungnya ditulis ulang penuh.
+    :param page_size: (width, height) halaman target dari indeks geometri yang disimpan
+                      saat upload; jika diberikan, mediabox tidak dibaca ulang dan
+                      validasi halaman dianggap sudah dilakukan.
+    :param rotation: /Rotate halaman target dari indeks yang sama. x/y/width/height berada
+                     di ruang tampilan (halaman setelah diputar), seperti yang divalidasi
+                     ``save_qr_settings``.
+    :param linearize: linearisasi hasil tulis ulang penuh sebelum dipublikasikan di
+                      output_path. Hasil incremental update tidak dilinearisasi karena
+                      qpdf akan menulis ulang seluruh file.
+    :return: STAMP_INCREMENTAL atau STAMP_REWRITTEN jika berhasil, False jika gagal.
+    """
+    try:
         # Validasi file dan path
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"File PDF tidak ditemukan: {pdf_path}")
@@ -24,59 +48,86 @@ def add_qr_to_pdf(pdf_path, qr_path, output_path, x, y, width, height, target_pa
         if width > MAX_SIZE or height > MAX_SIZE:
             raise ValueError(f"Ukuran QR Code terlalu besar. Maksimum adalah {MAX_SIZE}px x {MAX_SIZE}px.")
 
-        # Membaca PDF
-        reader = PdfReader(pdf_path)
-        writer = PdfWriter()
-
-        # Pastikan target page valid
-        if target_page < 0 or target_page >= len(reader.pages):
-            raise ValueError(f"Halaman target {target_page} tidak valid untuk dokumen ini.")
-
-        for page_num, page in enumerate(reader.pages):
-            page_width = float(page.mediabox.width)
-            page_height = float(page.mediabox.height)
-
-            if page_num == target_page:
-                # Perhitungan skala berdasarkan ukuran canvas frontend (jika diberikan)
-                if canvas_width and canvas_height:
-                    scale_x = page_width / canvas_width
-                    scale_y = page_height / canvas_height
-                    adjusted_x = x * scale_x
-                    adjusted_y = (canvas_height - y - height) * scale_y
-                    adjusted_width = width * scale_x
-                    adjusted_height = height * scale_y
-                else:
-                    adjusted_x = x
-                    adjusted_y = page_height - y - height
-                    adjusted_width = width
-                    adjusted_height = height
-
-                # Validasi posisi agar tetap dalam batas halaman PDF
-                adjusted_x = max(0, min(adjusted_x, page_width - adjusted_width))
-                adjusted_y = max(0, min(adjusted_y, page_height - adjusted_height))
-
-                logging.info(f"Menambahkan QR Code pada halaman {target_page} dengan koordinat "
-                             f"x: {adjusted_x}, y: {adjusted_y}, width: {adjusted_width}, height: {adjusted_height}")
-
-                # Membuat canvas untuk QR code
-                packet = io.BytesIO()
-                can = canvas.Canvas(packet, pagesize=(page_width, page_height))
-                can.drawImage(qr_path, adjusted_x, adjusted_y, width=adjusted_width, height=adjusted_height)
-                can.save()
-
-                # Gabungkan halaman PDF dengan QR Code
-                packet.seek(0)
-                new_pdf = PdfReader(packet)
-                page.merge_page(new_pdf.pages[0])
-
-            writer.add_page(page)
-
-        # Simpan hasil PDF
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
+        # Ukuran halaman target: dari indeks upload, atau dari page tree (hanya jalur ke halaman itu)
+        if page_size is None:
+            *page_size, rotation = read_page_geometry(pdf_path, target_page)
+        page_width, page_height = display_size(*page_size, rotation)
+
+        # Perhitungan skala berdasarkan ukuran canvas frontend (jika diberikan)
+        if canvas_width and canvas_height:
+            scale_x = page_width / canvas_width
+            scale_y = page_height / canvas_height
+            adjusted_x = x * scale_x
+            adjusted_y = (canvas_height - y - height) * scale_y
+            adjusted_width = width * scale_x
+            adjusted_height = height * scale_y
+        else:
+            adjusted_x = x
+            adjusted_y = page_height - y - height
+            adjusted_width = width
+            adjusted_height = height
+
+        # Validasi posisi agar tetap dalam batas halaman PDF
+        adjusted_x = max(0, min(adjusted_x, page_width - adjusted_width))
+        adjusted_y = max(0, min(adjusted_y, page_height - adjusted_height))
+
+        logger.debug("Menambahkan QR Code pada halaman %s dengan koordinat x: %s, y: %s, width: %s, height: %s",
+                     target_page, adjusted_x, adjusted_y, adjusted_width, adjusted_height)
+
+        try:
+            stamp_image(pdf_path, output_path, target_page, qr_path,
+                        adjusted_x, adjusted_y, adjusted_width, adjusted_height)
+            mode = STAMP_INCREMENTAL
+        except IncrementalUpdateUnsupported as e:
+            logger.info("Incremental update tidak didukung (%s), menulis ulang PDF penuh.", e)
+            _rewrite_with_qr(pdf_path, qr_path, output_path, target_page,
+                             adjusted_x, adjusted_y, adjusted_width, adjusted_height, linearize=linearize)
+            mode = STAMP_REWRITTEN
 
-        logging.info(f"Dokumen bertanda tangan berhasil disimpan: {output_path}")
-        return True
+        logger.debug("Dokumen bertanda tangan berhasil disimpan: %s", output_path)
+        return mode
     except Exception as e:
-        logging.error(f"Kesalahan saat menambahkan QR Code: {e}", exc_info=True)
+        logger.error("Kesalahan saat menambahkan QR Code: %s", e, exc_info=True)
         return False
+
+
+def _rewrite_with_qr(pdf_path, qr_path, output_path, target_page, x, y, width, height, linearize=False):
+    """Jalur lama: baca dan tulis ulang seluruh halaman (mis. untuk PDF terenkripsi)."""
+    # Import di sini agar PyPDF2/reportlab tidak dimuat saat startup worker
+    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab.pdfgen import canvas
+
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+
+    # Membuat canvas untuk QR code di koordinat halaman yang belum diputar
+    page = reader.pages[target_page]
+    page_size = (float(page.mediabox.width), float(page.mediabox.height))
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=page_size)
+    can.transform(*placement_matrix(x, y, width, height, page.get("/Rotate", 0), *page_size))
+    can.drawImage(qr_path, 0, 0, width=1, height=1)
+    can.save()
+    packet.seek(0)
+    overlay = PdfReader(packet).pages[0]
+
+    for page_num, page in enumerate(reader.pages):
+        if page_num == target_page:
+            # Gabungkan halaman PDF dengan QR Code
+            page.merge_page(overlay)
+        writer.add_page(page)
+
+    # Simpan hasil PDF ke temp file unik lalu rename, agar request lain tidak
+    # pernah membaca file setengah jadi di output_path
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".pdf.tmp")
+    try:
+        with os.fdopen(fd, "wb") as output_file:
+            writer.write(output_file)
+        # Fast web view agar halaman pertama tampil tanpa menunggu seluruh file
+        if linearize:
+            with span("linearize_pdf"):
+                linearize_pdf(temp_path)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,225 @@
+import os
+import json
+import logging
+from functools import lru_cache
+from dotenv import load_dotenv
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Muat variabel lingkungan dari file .env
+load_dotenv()
+
+# cryptography, nacl dan pyseto di-import saat kunci pertama kali dimuat,
+# bukan saat startup worker.
+
+
+@lru_cache(maxsize=None)
+def _get_paseto():
+    """Satu instance Paseto dipakai ulang untuk semua token."""
+    from pyseto import Paseto
+    return Paseto()
+
+
+def _read_key_file(key_path, env_name):
+    """Baca isi file kunci, pastikan path tersedia."""
+    if not key_path or not os.path.exists(key_path):
+        raise FileNotFoundError(f"File kunci tidak ditemukan ({env_name}): {key_path}")
+    with open(key_path, "rb") as key_file:
+        return key_file.read()
+
+
+@lru_cache(maxsize=None)
+@timed("key_load")
+def _load_private_keys(private_key_path):
+    """
+    Memuat kunci privat Ed25519 satu kali per path.
+    Mendukung format PEM (PKCS8) maupun 32 byte seed mentah.
+    :return: Tuple (SigningKey NaCl, kunci PASETO v4.public).
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from nacl.signing import SigningKey
+    from pyseto import Key
+
+    key_bytes = _read_key_file(private_key_path, "PRIVATE_KEY_PATH")
+
+    if key_bytes.lstrip().startswith(b"-----BEGIN"):
+        private_key = serialization.load_pem_private_key(key_bytes, password=None)
+        if not isinstance(private_key, Ed25519PrivateKey):
+            raise ValueError("Kunci privat harus berupa Ed25519. Buat ulang dengan renerate_keys.py.")
+        seed = private_key.private_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PrivateFormat.Raw,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        pem = key_bytes
+    elif len(key_bytes) == 32:
+        seed = key_bytes
+        pem = Ed25519PrivateKey.from_private_bytes(seed).private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+    else:
+        raise ValueError("Format kunci privat tidak dikenali.")
+
+    return SigningKey(seed), Key.new(version=4, purpose="public", key=pem)
+
+
+@lru_cache(maxsize=None)
+@timed("key_load")
+def _load_public_keys(public_key_path):
+    """
+    Memuat kunci publik Ed25519 satu kali per path.
+    Mendukung format PEM (SubjectPublicKeyInfo) maupun 32 byte mentah.
+    :return: Tuple (VerifyKey NaCl, kunci PASETO v4.public).
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+    from nacl.signing import VerifyKey
+    from pyseto import Key
+
+    key_bytes = _read_key_file(public_key_path, "PUBLIC_KEY_PATH")
+
+    if key_bytes.lstrip().startswith(b"-----BEGIN"):
+        public_key = serialization.load_pem_public_key(key_bytes)
+        if not isinstance(public_key, Ed25519PublicKey):
+            raise ValueError("Kunci publik harus berupa Ed25519. Buat ulang dengan renerate_keys.py.")
+        raw = public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        pem = key_bytes
+    elif len(key_bytes) == 32:
+        raw = key_bytes
+        pem = Ed25519PublicKey.from_public_bytes(raw).public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    else:
+        raise ValueError("Format kunci publik tidak dikenali.")
+
+    return VerifyKey(raw), Key.new(version=4, purpose="public", key=pem)
+
+
+def get_signing_keys():
+    """Ambil kunci privat (cached) dari PRIVATE_KEY_PATH."""
+    return _load_private_keys(os.getenv("PRIVATE_KEY_PATH"))
+
+
+def get_verify_keys():
+    """Ambil kunci publik (cached) dari PUBLIC_KEY_PATH."""
+    return _load_public_keys(os.getenv("PUBLIC_KEY_PATH"))
+
+
+def clear_key_cache():
+    """Kosongkan cache kunci, misalnya setelah rotasi kunci."""
+    _load_private_keys.cache_clear()
+    _load_public_keys.cache_clear()
+
+
+@timed("sign_data")
+def sign_raw(message):
+    """
+    Tanda tangani pesan dengan Ed25519 mentah.
+    :param message: Pesan berupa string.
+    :return: Tanda tangan dalam format hex.
+    """
+    if not isinstance(message, str):
+        raise TypeError("Pesan harus berupa string")
+    signing_key, _ = get_signing_keys()
+    return signing_key.sign(message.encode("utf-8")).signature.hex()
+
+
+@timed("verify_signature")
+def verify_raw(message, signature):
+    """
+    Verifikasi tanda tangan Ed25519 mentah.
+    :param message: Pesan berupa string.
+    :param signature: Tanda tangan dalam format hex.
+    :return: True jika valid, False jika tidak.
+    """
+    from nacl.exceptions import BadSignatureError
+
+    verify_key, _ = get_verify_keys()
+    try:
+        verify_key.verify(message.encode("utf-8"), bytes.fromhex(signature))
+        return True
+    except (BadSignatureError, ValueError):
+        return False
+
+
+@timed("sign_token")
+def sign_token(message):
+    """
+    Buat token PASETO v4.public untuk pesan.
+    :param message: Pesan berupa string.
+    :return: Token dalam bentuk string.
+    """
+    if not isinstance(message, str):
+        raise TypeError("Pesan harus berupa string")
+    _, private_key = get_signing_keys()
+
+    token = _get_paseto().encode(private_key, {"message": message})
+    if isinstance(token, bytes):
+        token = token.decode("utf-8")
+    return token
+
+
+@timed("verify_token")
+def verify_token(token, message=None):
+    """
+    Verifikasi token PASETO v4.public.
+    :param token: Token PASETO yang akan diverifikasi.
+    :param message: Pesan yang diharapkan (opsional).
+    :return: Payload jika token valid, atau None jika tidak valid.
+    """
+    _, public_key = get_verify_keys()
+
+    try:
+        decoded_token = _get_paseto().decode(public_key, token)
+        payload = json.loads(decoded_token.payload.decode("utf-8"))
+
+        if message is not None and payload.get("message") != message:
+            logger.warning("Pesan tidak cocok dengan payload.")
+            return None
+
+        return payload
+
+    except Exception as e:
+        logger.warning("Gagal mendekode token: %s", e)
+        return None
+
+
+def generate_keypair(output_dir="keys"):
+    """
+    Membuat pasangan kunci Ed25519 baru dalam format PEM.
+    Kunci ini dipakai oleh jalur NaCl (sign_data) maupun PASETO (sign_token).
+    :return: Tuple (private_key_path, public_key_path).
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    os.makedirs(output_dir, exist_ok=True)
+    private_key = Ed25519PrivateKey.generate()
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    private_key_path = os.path.join(output_dir, "private_key.pem")
+    public_key_path = os.path.join(output_dir, "public_key.pem")
+    with open(private_key_path, "wb") as private_file:
+        private_file.write(private_pem)
+    with open(public_key_path, "wb") as public_file:
+        public_file.write(public_pem)
+
+    clear_key_cache()
+    return private_key_path, public_key_path
@@ -0,0 +1,77 @@
+"""
+Routing session ke read replica untuk endpoint yang hanya membaca.
+
+Jika SQLALCHEMY_BINDS memuat bind ``replica``, view yang didekorasi
+``@read_replica`` menjalankan SELECT-nya di engine replica, sedangkan flush dan
+statement INSERT/UPDATE/DELETE tetap ke primary. Tanpa bind ``replica`` (mis.
+development dengan satu database) semua query tetap ke primary.
+
+Replica tidak dibuat oleh ``db.create_all()``; skemanya mengikuti primary
+lewat replikasi database.
+
+Read-your-writes: setelah request meng-commit penulisan ke primary, session
+Flask pengguna itu dipin ke primary selama REPLICA_PIN_SECONDS (default 5
+detik) agar halaman berikutnya tidak membaca replica yang masih tertinggal.
+"""
+from time import time
+from functools import wraps
+import sqlalchemy as sa
+from sqlalchemy import event
+from flask import g, session, current_app, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = "replica"
+DEFAULT_PIN_SECONDS = 5
+_PIN_KEY = "_primary_until"
+
+
+def _pinned_to_primary():
+    return has_request_context() and session.get(_PIN_KEY, 0) > time()
+
+
+def _replica_requested():
+    return has_app_context() and g.get("_use_read_replica", False) and not _pinned_to_primary()
+
+
+class RoutingSession(Session):
+    """Session Flask-SQLAlchemy yang mengarahkan baca ke replica bila diminta."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or isinstance(clause, sa.UpdateBase):
+            if REPLICA_BIND in self._db.engines:
+                self.info["_wrote_primary"] = True
+            return engine
+        if _replica_requested():
+            engines = self._db.engines
+            # Hanya model di bind default yang dialihkan; bind lain tidak disentuh
+            if engine is engines.get(None):
+                return engines.get(REPLICA_BIND, engine)
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_after_write(db_session):
+    if not db_session.info.pop("_wrote_primary", False) or not has_request_context():
+        return
+    seconds = current_app.config.get("REPLICA_PIN_SECONDS", DEFAULT_PIN_SECONDS)
+    if seconds > 0:
+        session[_PIN_KEY] = time() + seconds
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_write_mark(db_session):
+    db_session.info.pop("_wrote_primary", None)
+
+
+def read_replica(view):
+    """Decorator route: query baca selama request ini dilayani replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        previous = g.get("_use_read_replica", False)
+        g._use_read_replica = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g._use_read_replica = previous
+    return wrapper
@@ -0,0 +1,67 @@
+"""
+Pengiriman file dengan dukungan offload ke web server.
+
+FILE_SERVING_MODE:
+    "python"            file dialirkan oleh worker (default, mendukung Range/If-Range)
+    "x-sendfile"        header X-Sendfile berisi path absolut (Apache mod_xsendfile, lighttpd)
+    "x-accel-redirect"  header X-Accel-Redirect berisi URI internal nginx; pemetaan
+                        prefix path -> URI diatur lewat FILE_SERVING_ACCEL_MAP, mis.
+                        {"/srv/app/app/static/": "/protected/"}
+
+Pemeriksaan otorisasi tetap dilakukan oleh view sebelum memanggil fungsi ini;
+web server hanya melakukan transfer byte (termasuk Range) sehingga klien lambat
+tidak menahan worker Python.
+"""
+import os
+import logging
+from flask import current_app, send_file
+
+logger = logging.getLogger(__name__)
+
+
+def _accel_uri(path, accel_map):
+    """Petakan path absolut ke URI internal nginx, atau None jika tidak ada pemetaan."""
+    for fs_prefix, uri_prefix in accel_map.items():
+        fs_prefix = os.path.join(os.path.abspath(fs_prefix), "")
+        if path.startswith(fs_prefix):
+            return uri_prefix.rstrip("/") + "/" + path[len(fs_prefix):].replace(os.sep, "/")
+    return None
+
+
+def _offload_response(header, target, mimetype, etag, as_attachment, download_name):
+    response = current_app.response_class(mimetype=mimetype or "application/octet-stream")
+    response.headers[header] = target
+    if as_attachment:
+        response.headers.set("Content-Disposition", "attachment", filename=download_name)
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+def send_file_response(path, mimetype=None, etag=None, as_attachment=False, download_name=None):
+    """Kirim file sesuai FILE_SERVING_MODE. ETag/304 ditangani oleh pemanggil atau send_file."""
+    path = os.path.abspath(path)
+    download_name = download_name or os.path.basename(path)
+    mode = current_app.config.get("FILE_SERVING_MODE", "python")
+
+    if mode == "x-sendfile":
+        return _offload_response("X-Sendfile", path, mimetype, etag, as_attachment, download_name)
+
+    if mode == "x-accel-redirect":
+        uri = _accel_uri(path, current_app.config.get("FILE_SERVING_ACCEL_MAP", {}))
+        if uri is not None:
+            return _offload_response("X-Accel-Redirect", uri, mimetype, etag, as_attachment, download_name)
+        logger.warning("Tidak ada pemetaan X-Accel-Redirect untuk %s, dikirim lewat Python.", path)
+
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        etag=etag if etag else True,
+        conditional=True,
+    )
+    # Werkzeug hanya menulis Accept-Ranges pada respons 206; PDF.js butuh header
+    # ini di respons pertama agar beralih ke mode pengambilan per rentang.
+    response.headers.setdefault("Accept-Ranges", "bytes")
+    return response
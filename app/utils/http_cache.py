@@ -0,0 +1,94 @@
+"""
+Kebijakan cache HTTP per route.
+
+Default seluruh aplikasi tetap ``no-store`` (halaman HTML terautentikasi).
+Artefak file (QR PNG, PDF bertanda tangan) dikirim dengan ETag kuat dari hash
+isi file sehingga browser/proxy dapat melakukan revalidasi (304). Jika URL
+membawa versi isi (``?v=<etag>``) artefak dianggap content-addressed dan
+dikirim dengan ``Cache-Control: immutable``; route membagikan URL tersebut
+melalui ``versioned_url``.
+"""
+import os
+import hashlib
+from functools import lru_cache
+from flask import request, make_response, url_for
+from app.utils.file_serving import send_file_response
+
+NO_STORE = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
+IMMUTABLE_MAX_AGE = 31536000  # 1 tahun
+
+
+@lru_cache(maxsize=1024)
+def _hash_file(path, mtime_ns, size):
+    hash_sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            hash_sha256.update(chunk)
+    return hash_sha256.hexdigest()
+
+
+def file_etag(path):
+    """ETag dari SHA256 isi file, di-cache per (path, mtime, size)."""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def combined_etag(*parts):
+    """ETag untuk artefak turunan dari beberapa input (mis. hash dokumen + posisi QR)."""
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def versioned_url(endpoint, etag, **values):
+    """URL artefak yang memuat versi isi (?v=<etag>) sehingga dapat di-cache sebagai immutable."""
+    return url_for(endpoint, v=etag, **values)
+
+
+def mark_cache_policy(response, etag, private=True):
+    """
+    Pasang Cache-Control untuk artefak dengan ETag tertentu.
+    ``immutable`` hanya jika URL memuat versi isi (?v=<etag>).
+    """
+    scope = 'private' if private else 'public'
+    if request.args.get('v') == etag:
+        response.headers['Cache-Control'] = f'{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = f'{scope}, no-cache'
+    response.headers.pop('Pragma', None)
+    response.headers.pop('Expires', None)
+    response.cache_policy_applied = True
+    return response
+
+
+def not_modified(etag, private=True):
+    """Respons 304 jika If-None-Match cocok dengan ETag, selain itu None."""
+    if etag not in request.if_none_match:
+        return None
+    response = make_response('', 304)
+    response.set_etag(etag)
+    return mark_cache_policy(response, etag, private=private)
+
+
+def send_cached_file(path, mimetype=None, etag=None, private=True, as_attachment=False, download_name=None):
+    """Kirim file dengan ETag kuat, dukungan 304/Range, dan kebijakan cache artefak."""
+    etag = etag or file_etag(path)
+    cached = not_modified(etag, private=private)
+    if cached is not None:
+        return cached
+    response = send_file_response(
+        path,
+        mimetype=mimetype,
+        etag=etag,
+        as_attachment=as_attachment,
+        download_name=download_name,
+    )
+    return mark_cache_policy(response, etag, private=private)
+
+
+def apply_default_cache_headers(response):
+    """Default no-store untuk respons yang tidak memiliki kebijakan cache sendiri."""
+    if getattr(response, 'cache_policy_applied', False):
+        return response
+    response.headers['Cache-Control'] = NO_STORE
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['Expires'] = '-1'
+    return response
@@ -0,0 +1,161 @@
+"""
+Header ``Idempotency-Key`` untuk endpoint yang mahal dan tidak idempoten.
+
+Klien dengan koneksi tidak stabil sering mengulang ``/signature/add-signature``
+dan ``/documents/upload``. Dengan decorator ``@idempotent`` respons pertama
+disimpan per (user, key) selama IDEMPOTENCY_TTL detik (default 86400) dan
+request berikutnya dengan key yang sama hanya memutar ulang respons tersebut
+(header ``Idempotent-Replayed: true``), tanpa menjalankan pipeline lagi.
+
+- Klaim key memakai unique constraint ``uq_idempotency_user_key``, sehingga
+  dua request paralel dengan key sama tidak bisa sama-sama dijalankan; yang
+  kalah menerima 409 selama request pertama masih berjalan.
+- Record pending hanya berlaku selama IDEMPOTENCY_PENDING_TTL detik (default
+  120): jika proses yang mengklaim mati sebelum menyimpan respons, key bisa
+  diklaim ulang setelah lease habis, bukan terkunci sampai IDEMPOTENCY_TTL.
+- Record kedaluwarsa dihapus per batch oleh ``purge_expired_records`` (thread
+  "document-purge" dan ``gc_storage.py``).
+- Key yang dipakai ulang untuk request berbeda (method/path/isi JSON) -> 422.
+- Respons 5xx, exception, dan respons streaming tidak disimpan; key dilepas
+  agar klien bisa mencoba lagi.
+
+Decorator dipasang di bawah ``@login_required`` (membutuhkan ``current_user``).
+"""
+import json
+import hashlib
+import logging
+from functools import wraps
+from datetime import datetime, timedelta
+from flask import current_app, request, jsonify, make_response
+from sqlalchemy import select
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADERS = ("Content-Type", "Location")
+
+
+def request_fingerprint():
+    """Hash method, path dan isi JSON; body multipart (file) tidak dibaca ulang."""
+    digest = hashlib.sha256(f"{request.method} {request.path}".encode())
+    if request.is_json:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _is_expired(record):
+    """Respons tersimpan lewat IDEMPOTENCY_TTL, atau record pending lewat lease-nya."""
+    if record.status_code is None:
+        ttl = current_app.config.get("IDEMPOTENCY_PENDING_TTL", 120)
+    else:
+        ttl = current_app.config.get("IDEMPOTENCY_TTL", 86400)
+    return record.created_at < datetime.utcnow() - timedelta(seconds=ttl)
+
+
+def claim_key(user_id, key, fingerprint, _retry=True):
+    """
+    Simpan record pending untuk (user, key).
+    :return: Tuple (record, True jika key baru diklaim oleh request ini).
+    """
+    record = IdempotencyRecord(user_id=user_id, key=key, request_hash=fingerprint)
+    db.session.add(record)
+    try:
+        db.session.commit()
+        return record, True
+    except IntegrityError:
+        db.session.rollback()
+
+    existing = IdempotencyRecord.query.filter_by(user_id=user_id, key=key).first()
+    if _retry and (existing is None or _is_expired(existing)):
+        # Record kedaluwarsa (atau baru dilepas): hapus lalu klaim ulang sekali.
+        # DELETE per id agar klaim baru milik request paralel tidak ikut terhapus.
+        if existing is not None:
+            IdempotencyRecord.query.filter_by(id=existing.id).delete()
+            db.session.commit()
+        return claim_key(user_id, key, fingerprint, _retry=False)
+    return existing, False
+
+
+# Record bisa sudah diklaim ulang setelah lease habis; operasi per id lalu
+# tidak menyentuh apa pun (bukan StaleDataError)
+
+def _release(record_id):
+    db.session.rollback()
+    IdempotencyRecord.query.filter_by(id=record_id).delete(synchronize_session="fetch")
+    db.session.commit()
+
+
+def _store(record_id, response):
+    headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+    IdempotencyRecord.query.filter_by(id=record_id, status_code=None).update({
+        "status_code": response.status_code,
+        "response_headers": json.dumps(headers),
+        "response_body": response.get_data(),
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def purge_expired_records(batch_size=500):
+    """Hapus record yang lebih tua dari IDEMPOTENCY_TTL, satu batch per transaksi. Return jumlahnya."""
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get("IDEMPOTENCY_TTL", 86400))
+    total = 0
+    while True:
+        ids = db.session.scalars(
+            select(IdempotencyRecord.id).where(IdempotencyRecord.created_at < cutoff).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        IdempotencyRecord.query.filter(IdempotencyRecord.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        total += len(ids)
+    if total:
+        logger.info("%d record idempotensi kedaluwarsa dihapus", total)
+    return total
+
+
+def _replay(record):
+    response = make_response(record.response_body or b"", record.status_code)
+    for name, value in json.loads(record.response_headers or "{}").items():
+        response.headers[name] = value
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """Decorator route: putar ulang respons pertama untuk Idempotency-Key yang sama."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or request.method in ("GET", "HEAD"):
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} maksimal {MAX_KEY_LENGTH} karakter."}), 400
+
+        fingerprint = request_fingerprint()
+        record, claimed = claim_key(current_user.id, key, fingerprint)
+        record_id = record.id
+        if not claimed:
+            if record.request_hash != fingerprint:
+                return jsonify({"error": f"{HEADER} sudah dipakai untuk request lain."}), 422
+            if record.status_code is None:
+                return jsonify({"error": "Request dengan key ini masih diproses."}), 409, {"Retry-After": "1"}
+            logger.info("Respons idempoten diputar ulang untuk user %s", current_user.id)
+            return _replay(record)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            _release(record_id)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed or response.direct_passthrough:
+            _release(record_id)
+        else:
+            _store(record_id, response)
+        return response
+    return wrapper
@@ -0,0 +1,39 @@
+import os
+import shutil
+import logging
+import subprocess
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def linearize_pdf(pdf_path, timeout=60):
+    """
+    Linearisasi PDF ("fast web view") di tempat menggunakan qpdf, agar viewer
+    (PDF.js) dapat menampilkan halaman pertama sebelum seluruh file terunduh.
+    Jika qpdf tidak terpasang, file dibiarkan apa adanya.
+
+    Hanya dipakai untuk hasil stamping yang ditulis ulang penuh (fallback
+    ``_rewrite_with_qr``). Hasil incremental update, yaitu jalur normal, tidak
+    dilinearisasi karena qpdf akan menulis ulang seluruh file.
+    :return: True jika file dilinearisasi, False jika dilewati atau gagal.
+    """
+    qpdf = shutil.which("qpdf")
+    if qpdf is None:
+        logger.debug("qpdf tidak ditemukan, linearisasi dilewati untuk %s", pdf_path)
+        return False
+
+    # Temp file unik per pemanggilan agar linearisasi paralel tidak saling menimpa
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(pdf_path)), suffix=".pdf.tmp")
+    os.close(fd)
+    try:
+        subprocess.run([qpdf, "--linearize", pdf_path, temp_path],
+                       check=True, capture_output=True, timeout=timeout)
+        os.replace(temp_path, pdf_path)
+        return True
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.warning("Linearisasi PDF gagal untuk %s: %s", pdf_path, e)
+        return False
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,129 @@
+"""
+Konfigurasi logging aplikasi: terstruktur, di-sampling, dan asinkron.
+
+- Record dikirim ke queue oleh ``QueueHandler``; format dan I/O dilakukan oleh
+  ``QueueListener`` di thread terpisah sehingga tidak membebani thread request.
+- ``LOG_SAMPLE_RATES`` ({nama_logger: rasio}) membuang sebagian record INFO/DEBUG
+  dari hot path sebelum masuk queue. WARNING ke atas selalu dicatat.
+- ``LOG_FORMAT`` = "json" (default) atau "text".
+
+Gunakan logger per modul dengan format lazy:
+
+    logger = logging.getLogger(__name__)
+    logger.info("Dokumen %s ditandatangani", doc_hash)
+"""
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_queue_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format record sebagai satu baris JSON, termasuk field ``extra``."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Loloskan hanya sebagian record di bawah WARNING untuk logger tertentu."""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler yang menunda format (JSON/teks) dan I/O ke thread listener.
+    ``msg % args`` tetap dievaluasi di thread pemanggil, seperti QueueHandler
+    stdlib, karena argumen lazy (mis. objek ORM) bisa saja sudah tidak valid
+    setelah request dan session-nya berakhir.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(app):
+    """Pasang logging asinkron sekali per proses; panggilan berikutnya hanya memperbarui level/sampling."""
+    global _queue_handler, _listener
+
+    level = app.config.get("LOG_LEVEL", "INFO")
+    rates = app.config.get("LOG_SAMPLE_RATES", {})
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    if _queue_handler is not None:
+        _queue_handler.filters[0].rates = dict(rates)
+        return
+
+    if app.config.get("LOG_FORMAT", "json") == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    output_handler = logging.StreamHandler(sys.stderr)
+    output_handler.setFormatter(formatter)
+    handlers = [output_handler]
+    if app.config.get("LOG_FILE"):
+        file_handler = logging.FileHandler(app.config["LOG_FILE"])
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = AsyncQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(rates))
+    root.addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Hentikan listener dan flush record yang tersisa di queue."""
+    global _queue_handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
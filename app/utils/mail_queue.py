@@ -0,0 +1,148 @@
+"""
+Antrean email keluar dengan pengirim di background.
+
+Request hanya memasukkan ``Message`` ke antrean (``enqueue_mail``) sehingga
+latensi request tidak lagi mencakup handshake SMTP. Satu thread pengirim per
+aplikasi mengambil email secara batch dan mengirim satu batch lewat satu
+koneksi SMTP. Jika koneksi gagal, sisa batch dicoba ulang dengan backoff
+eksponensial; email yang ditolak server (penerima/isi) dibuang dan dicatat.
+
+Pengiriman bersifat best-effort: antrean hanya ada di memori proses. Saat proses
+berhenti normal, handler atexit menunggu antrean kosong paling lama
+MAIL_QUEUE_DRAIN_TIMEOUT detik; email yang belum terkirim setelah itu, atau saat
+proses mati mendadak (SIGKILL, crash), hilang dan hanya dicatat di log.
+
+Konfigurasi (app.config):
+    MAIL_QUEUE_ENABLED        False = kirim langsung secara sinkron (default True)
+    MAIL_QUEUE_BATCH_SIZE     email maksimal per koneksi SMTP (default 20)
+    MAIL_QUEUE_BATCH_WAIT     detik menunggu email lain sebelum batch dikirim (default 0.2)
+    MAIL_QUEUE_MAX_RETRIES    percobaan ulang per batch (default 3)
+    MAIL_QUEUE_RETRY_BACKOFF  jeda awal retry dalam detik, dikali 2 tiap percobaan (default 1)
+    MAIL_QUEUE_DRAIN_TIMEOUT  detik menunggu antrean kosong saat proses keluar (default 10)
+
+Untuk debugging lokal gunakan ``python -m app.utils.smtp_sink``.
+"""
+import time
+import queue
+import atexit
+import smtplib
+import logging
+import threading
+from time import monotonic
+from flask import current_app
+from flask_mail import BadHeaderError
+from app.extensions import mail
+from app.utils.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Kesalahan per email: server menolak email ini, koneksi masih bisa dipakai
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                   smtplib.SMTPDataError, BadHeaderError, AssertionError)
+
+
+class MailQueue:
+    """Antrean email per aplikasi dengan satu thread pengirim."""
+
+    def __init__(self, app, batch_size=20, batch_wait=0.2, max_retries=3, retry_backoff=1.0, drain_timeout=10.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.drain_timeout = drain_timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._drain_registered = False
+
+    def put(self, message):
+        self._queue.put(message)
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+                self._thread.start()
+            if not self._drain_registered:
+                atexit.register(self.drain)
+                self._drain_registered = True
+
+    def join(self, timeout=None):
+        """Tunggu sampai semua email di antrean diproses. Return False jika timeout."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def drain(self):
+        """Handler atexit: beri thread daemon kesempatan mengosongkan antrean, dengan batas waktu."""
+        if not self.join(timeout=self.drain_timeout):
+            logger.warning("Proses berhenti dengan %d email belum terkirim", self._queue.unfinished_tasks)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context(), span("mail_batch"):
+                    self._send_batch(batch)
+            except Exception:
+                logger.exception("Pengiriman batch email gagal")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _send_batch(self, batch):
+        pending = list(batch)
+        attempt = 0
+        while pending:
+            try:
+                with mail.connect() as connection:
+                    while pending:
+                        message = pending[0]
+                        try:
+                            connection.send(message)
+                        except _MESSAGE_ERRORS as e:
+                            logger.error("Email ke %s ditolak: %s", ", ".join(message.recipients), e)
+                        pending.pop(0)
+            except (smtplib.SMTPException, OSError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    logger.error("Gagal mengirim %d email setelah %d percobaan: %s", len(pending), attempt, e)
+                    return
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                logger.warning("Koneksi SMTP gagal (%s); mencoba lagi dalam %.1f detik", e, delay)
+                time.sleep(delay)
+
+
+def init_mail_queue(app):
+    """Pasang antrean email untuk aplikasi ini (lihat docstring modul)."""
+    app.extensions["mail_queue"] = MailQueue(
+        app,
+        batch_size=app.config.get("MAIL_QUEUE_BATCH_SIZE", 20),
+        batch_wait=app.config.get("MAIL_QUEUE_BATCH_WAIT", 0.2),
+        max_retries=app.config.get("MAIL_QUEUE_MAX_RETRIES", 3),
+        retry_backoff=app.config.get("MAIL_QUEUE_RETRY_BACKOFF", 1.0),
+        drain_timeout=app.config.get("MAIL_QUEUE_DRAIN_TIMEOUT", 10.0),
+    )
+
+
+def enqueue_mail(message):
+    """Kirim ``flask_mail.Message`` lewat antrean background aplikasi aktif."""
+    mail_queue = current_app.extensions.get("mail_queue")
+    if mail_queue is None or not current_app.config.get("MAIL_QUEUE_ENABLED", True):
+        mail.send(message)
+        return
+    mail_queue.put(message)
@@ -0,0 +1,186 @@
+"""
+Instrumentasi ringan untuk hot path (sign/verify token, QR, stamping PDF, hashing, DB).
+
+- ``span(stage)``: context manager untuk mengukur satu blok kode.
+- ``timed(stage)``: decorator untuk mengukur satu fungsi.
+- ``render_prometheus()``: ekspor histogram dalam format teks Prometheus.
+
+Jika METRICS_ENABLED=False (default) span/decorator hanya memeriksa satu flag,
+sehingga overhead dapat diabaikan. Registry bersifat per proses; dengan gunicorn
+multi-worker setiap worker memiliki angkanya sendiri.
+"""
+import os
+import threading
+from time import perf_counter
+from functools import wraps
+from contextlib import nullcontext
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+_noop = nullcontext()
+_db_listeners_installed = False
+
+
+class Histogram:
+    """Histogram kumulatif thread-safe dengan label."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            bucket_counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    bucket_counts[index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: (list(s[0]), s[1], s[2]) for labels, s in self._series.items()}
+
+        for labels, (bucket_counts, total, count) in sorted(snapshot.items()):
+            label_str = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = label_str + "," if label_str else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_str}}} {total}")
+            lines.append(f"{self.name}_count{{{label_str}}} {count}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_DURATION = Histogram(
+    "app_stage_duration_seconds", "Durasi per tahap hot path.", ("stage",)
+)
+REQUEST_DURATION = Histogram(
+    "app_http_request_duration_seconds", "Durasi request HTTP per endpoint.", ("endpoint", "method", "status")
+)
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def observe(stage, seconds):
+    """Catat durasi satu tahap secara manual."""
+    if _enabled:
+        STAGE_DURATION.observe((stage,), seconds)
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_DURATION.observe((self.stage,), perf_counter() - self.started)
+        return False
+
+
+def span(stage):
+    """Context manager untuk mengukur satu blok kode."""
+    return _Span(stage) if _enabled else _noop
+
+
+def timed(stage):
+    """Decorator untuk mengukur durasi fungsi sebagai tahap ``stage``."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_DURATION.observe((stage,), perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def render_prometheus():
+    """Render semua histogram dalam format teks Prometheus."""
+    lines = STAGE_DURATION.render() + REQUEST_DURATION.render()
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    STAGE_DURATION.reset()
+    REQUEST_DURATION.reset()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _enabled:
+        conn.info.setdefault("metrics_query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if starts:
+        STAGE_DURATION.observe(("db_query",), perf_counter() - starts.pop())
+
+
+def _install_db_listeners():
+    global _db_listeners_installed
+    if _db_listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _db_listeners_installed = True
+
+
+def init_metrics(app):
+    """Aktifkan instrumentasi berdasarkan konfigurasi METRICS_ENABLED."""
+    set_enabled(app.config.get("METRICS_ENABLED", _enabled))
+    _install_db_listeners()
+
+    @app.before_request
+    def start_request_timer():
+        if _enabled:
+            g._metrics_started = perf_counter()
+
+    @app.after_request
+    def record_request_duration(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            REQUEST_DURATION.observe(
+                (request.endpoint or "unknown", request.method, str(response.status_code)),
+                perf_counter() - started
+            )
+        return response
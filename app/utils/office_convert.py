@@ -0,0 +1,128 @@
+"""
+Konversi DOCX ke PDF di background agar dokumen Office memakai jalur
+stamping dan pratinjau PDF yang sama.
+
+- Konversi memakai LibreOffice headless (``soffice``) yang terpasang di host.
+- Setiap konversi adalah satu subprocess dengan timeout; jumlah subprocess
+  paralel dibatasi oleh ukuran thread pool (OFFICE_CONVERT_WORKERS).
+- Setiap subprocess memakai profil LibreOffice sementara sendiri, karena satu
+  profil tidak dapat dipakai dua instance secara bersamaan.
+- Hasil disimpan di samping file asli (``<file>.docx.pdf``) lalu ditautkan ke
+  ``Document`` beserta indeks geometri halamannya.
+"""
+import os
+import shutil
+import logging
+import pathlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ConversionUnavailable(RuntimeError):
+    """Konverter (LibreOffice) tidak tersedia di host."""
+
+
+def _get_executor(max_workers=1):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="office-convert")
+        return _executor
+
+
+def find_converter():
+    """Path executable LibreOffice, atau None jika tidak terpasang."""
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def rendition_path(source_path):
+    """Lokasi rendisi PDF di samping file asli."""
+    return f"{source_path}.pdf"
+
+
+@timed("office_convert")
+def convert_to_pdf(source_path, output_path, timeout=120):
+    """
+    Konversi satu dokumen Office ke PDF dengan LibreOffice headless.
+    :raises ConversionUnavailable: jika LibreOffice tidak terpasang.
+    :raises ValueError: jika konversi gagal atau melewati timeout.
+    """
+    converter = find_converter()
+    if converter is None:
+        raise ConversionUnavailable("LibreOffice (soffice) tidak ditemukan. Pasang untuk konversi DOCX ke PDF.")
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        profile = pathlib.Path(temp_dir, "profile").as_uri()
+        try:
+            result = subprocess.run(
+                [converter, f"-env:UserInstallation={profile}", "--headless", "--norestore",
+                 "--convert-to", "pdf", "--outdir", temp_dir, source_path],
+                capture_output=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise ValueError(f"Konversi melewati batas waktu {timeout} detik.")
+
+        produced = os.path.join(temp_dir, os.path.splitext(os.path.basename(source_path))[0] + ".pdf")
+        if result.returncode != 0 or not os.path.exists(produced):
+            raise ValueError(f"Konversi gagal: {result.stderr.decode(errors='ignore').strip()}")
+        os.replace(produced, output_path)
+    return output_path
+
+
+def _convert_document(app, document_id, source_path, timeout):
+    from app.extensions import db
+    from app.models import Document
+    from app.utils.pdf_geometry import extract_page_geometry
+    from app.utils.page_preview import prewarm_previews, DEFAULT_PREVIEW_FOLDER
+
+    output_path = rendition_path(source_path)
+    page_geometry = None
+    try:
+        convert_to_pdf(source_path, output_path, timeout=timeout)
+        page_geometry = extract_page_geometry(output_path)
+        status = 'done'
+    except ConversionUnavailable as e:
+        logger.warning("%s", e)
+        status = 'unavailable'
+    except Exception as e:
+        logger.error("Konversi dokumen %s gagal: %s", document_id, e)
+        status = 'failed'
+
+    with app.app_context():
+        try:
+            document = db.session.get(Document, document_id)
+            if document is None:
+                # Dokumen dihapus selama konversi berjalan
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                return status
+            document.attach_pdf_rendition(output_path if status == 'done' else None, status, page_geometry)
+            db.session.commit()
+
+            if status == 'done':
+                prewarm_previews(output_path, document.file_hash, app.config.get('PREVIEW_PREWARM_PAGES', 2),
+                                 cache_folder=app.config.get('PREVIEW_CACHE_FOLDER', DEFAULT_PREVIEW_FOLDER),
+                                 max_workers=app.config.get('PREVIEW_MAX_WORKERS', 2))
+        finally:
+            db.session.remove()
+    logger.info("Konversi dokumen %s selesai dengan status %s", document_id, status)
+    return status
+
+
+def schedule_conversion(app, document_id, source_path):
+    """
+    Jadwalkan konversi di pool terbatas; request tidak menunggu hasilnya.
+    :return: Future berisi status akhir ('done', 'failed', 'unavailable').
+    """
+    executor = _get_executor(app.config.get('OFFICE_CONVERT_WORKERS', 1))
+    return executor.submit(_convert_document, app, document_id, source_path,
+                           app.config.get('OFFICE_CONVERT_TIMEOUT', 120))
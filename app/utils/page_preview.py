@@ -0,0 +1,120 @@
+"""
+Render pratinjau (thumbnail) per halaman PDF untuk UI penempatan QR Code.
+
+- Rendering satu halaman memakai ``pdftoppm`` (poppler-utils) sehingga biaya
+  tidak bergantung pada jumlah halaman dokumen.
+- Hasil di-cache di disk dengan kunci (file_hash, page, size).
+- Rendering dijalankan di thread pool terbatas; permintaan yang sama untuk
+  halaman yang sedang dirender menunggu Future yang sama.
+"""
+import os
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREVIEW_FOLDER = os.path.abspath(os.path.join("app", "cache", "previews"))
+ALLOWED_SIZES = (150, 300, 600, 1200)
+DEFAULT_SIZE = 300
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class PreviewUnavailable(RuntimeError):
+    """Renderer (pdftoppm) tidak tersedia di host."""
+
+
+def _get_executor(max_workers=2):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-preview")
+        return _executor
+
+
+def preview_path(cache_folder, file_hash, page, size):
+    """Lokasi cache pratinjau untuk (file_hash, page, size)."""
+    return os.path.join(cache_folder, file_hash, f"{page}_{size}.png")
+
+
+@timed("render_preview")
+def render_preview(pdf_path, output_path, page, size, timeout=30):
+    """
+    Render satu halaman (0-based) menjadi PNG dengan sisi terpanjang ``size`` piksel.
+    :raises PreviewUnavailable: jika pdftoppm tidak terpasang.
+    :raises ValueError: jika halaman tidak valid, PDF tidak dapat dirender atau melewati timeout.
+    """
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        raise PreviewUnavailable("pdftoppm tidak ditemukan. Pasang poppler-utils untuk pratinjau halaman.")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as temp_dir:
+        prefix = os.path.join(temp_dir, "page")
+        page_number = str(page + 1)
+        try:
+            result = subprocess.run(
+                [pdftoppm, "-png", "-singlefile", "-f", page_number, "-l", page_number,
+                 "-scale-to", str(size), pdf_path, prefix],
+                capture_output=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise ValueError(f"Render halaman {page} melewati batas waktu {timeout} detik.")
+        if result.returncode != 0 or not os.path.exists(prefix + ".png"):
+            raise ValueError(f"Halaman {page} tidak dapat dirender: {result.stderr.decode(errors='ignore').strip()}")
+        os.replace(prefix + ".png", output_path)
+    return output_path
+
+
+def request_preview(pdf_path, file_hash, page, size, cache_folder=DEFAULT_PREVIEW_FOLDER, max_workers=2):
+    """
+    Ambil Future untuk pratinjau halaman. Jika sudah ada di cache, Future
+    langsung selesai; jika sedang dirender, Future yang sama dipakai ulang.
+    """
+    output_path = preview_path(cache_folder, file_hash, page, size)
+    key = (file_hash, page, size)
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        if os.path.exists(output_path):
+            future = Future()
+            future.set_result(output_path)
+            return future
+        future = _get_executor(max_workers).submit(render_preview, pdf_path, output_path, page, size)
+        _in_flight[key] = future
+
+    def _done(_):
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+    future.add_done_callback(_done)
+    return future
+
+
+def prewarm_previews(pdf_path, file_hash, pages, size=DEFAULT_SIZE, cache_folder=DEFAULT_PREVIEW_FOLDER, max_workers=2):
+    """Jadwalkan render halaman awal tanpa menunggu hasilnya (dipanggil setelah upload)."""
+    if shutil.which("pdftoppm") is None:
+        return
+    for page in range(pages):
+        future = request_preview(pdf_path, file_hash, page, size, cache_folder, max_workers)
+        future.add_done_callback(_log_prewarm_failure)
+
+
+def _log_prewarm_failure(future):
+    if future.exception() is not None:
+        logger.debug("Pre-warm pratinjau gagal: %s", future.exception())
+
+
+def clear_previews(file_hash, cache_folder=DEFAULT_PREVIEW_FOLDER):
+    """Hapus seluruh pratinjau milik satu file."""
+    shutil.rmtree(os.path.join(cache_folder, file_hash), ignore_errors=True)
@@ -0,0 +1,153 @@
+"""
+Hashing password dengan algoritma dan cost yang dapat dikonfigurasi.
+
+Konfigurasi (app.config):
+    PASSWORD_HASH_ALGORITHM    "argon2" (default), "pbkdf2" atau "scrypt"
+    PASSWORD_HASH_TIME_COST    argon2 time_cost (default 3)
+    PASSWORD_HASH_MEMORY_COST  argon2 memory_cost dalam KiB (default 65536)
+    PASSWORD_HASH_PARALLELISM  argon2 parallelism (default 4)
+    PASSWORD_HASH_ITERATIONS   iterasi pbkdf2 (default 600000)
+    PASSWORD_HASH_WORKERS      ukuran thread pool hashing (default 4)
+
+Hash dan verifikasi dijalankan di thread pool terbatas (argon2 dan hashlib
+melepas GIL), sehingga lonjakan login hanya mengantre di pool dan tidak
+menghabiskan CPU untuk endpoint lain. Hash lama (format Werkzeug atau
+parameter argon2 lama) tetap bisa diverifikasi; ``needs_rehash`` menandai
+hash yang perlu diperbarui saat login berikutnya.
+
+Gunakan ``calibrate_password_hash.py`` untuk memilih cost sesuai host.
+"""
+import threading
+from time import perf_counter
+from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.metrics import timed
+
+HashSettings = namedtuple("HashSettings", "algorithm time_cost memory_cost parallelism iterations")
+
+DEFAULT_SETTINGS = HashSettings(algorithm="argon2", time_cost=3, memory_cost=65536, parallelism=4, iterations=600000)
+SCRYPT_METHOD = "scrypt:32768:8:1"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers=4):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        return _executor
+
+
+def current_settings():
+    """Parameter hashing dari konfigurasi aplikasi (atau default di luar app context)."""
+    if not has_app_context():
+        return DEFAULT_SETTINGS
+    config = current_app.config
+    return HashSettings(
+        algorithm=config.get("PASSWORD_HASH_ALGORITHM", DEFAULT_SETTINGS.algorithm),
+        time_cost=config.get("PASSWORD_HASH_TIME_COST", DEFAULT_SETTINGS.time_cost),
+        memory_cost=config.get("PASSWORD_HASH_MEMORY_COST", DEFAULT_SETTINGS.memory_cost),
+        parallelism=config.get("PASSWORD_HASH_PARALLELISM", DEFAULT_SETTINGS.parallelism),
+        iterations=config.get("PASSWORD_HASH_ITERATIONS", DEFAULT_SETTINGS.iterations),
+    )
+
+
+@lru_cache(maxsize=8)
+def _argon2_hasher(time_cost, memory_cost, parallelism):
+    from argon2 import PasswordHasher
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+def _werkzeug_method(settings):
+    if settings.algorithm == "pbkdf2":
+        return f"pbkdf2:sha256:{settings.iterations}"
+    if settings.algorithm == "scrypt":
+        return SCRYPT_METHOD
+    raise ValueError(f"Algoritma hash password tidak dikenal: {settings.algorithm}")
+
+
+def _hash(password, settings):
+    if settings.algorithm == "argon2":
+        return _argon2_hasher(settings.time_cost, settings.memory_cost, settings.parallelism).hash(password)
+    return generate_password_hash(password, method=_werkzeug_method(settings))
+
+
+def _verify(stored_hash, password):
+    if stored_hash.startswith("$argon2"):
+        from argon2 import PasswordHasher
+        from argon2.exceptions import VerificationError, InvalidHashError
+        try:
+            # Parameter dibaca dari hash itu sendiri, bukan dari konfigurasi
+            return PasswordHasher().verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(stored_hash, password)
+
+
+def _submit(function, *args):
+    workers = current_app.config.get("PASSWORD_HASH_WORKERS", 4) if has_app_context() else 4
+    return _get_executor(workers).submit(function, *args).result()
+
+
+@timed("password_hash")
+def hash_password(password, settings=None):
+    """Hash password dengan parameter aktif, dijalankan di pool hashing."""
+    return _submit(_hash, password, settings or current_settings())
+
+
+@timed("password_verify")
+def verify_password(stored_hash, password):
+    """Verifikasi password terhadap hash argon2 maupun hash Werkzeug lama."""
+    if not stored_hash:
+        return False
+    return _submit(_verify, stored_hash, password)
+
+
+def needs_rehash(stored_hash, settings=None):
+    """True jika hash dibuat dengan algoritma atau cost yang berbeda dari konfigurasi aktif."""
+    settings = settings or current_settings()
+    if stored_hash.startswith("$argon2"):
+        if settings.algorithm != "argon2":
+            return True
+        hasher = _argon2_hasher(settings.time_cost, settings.memory_cost, settings.parallelism)
+        return hasher.check_needs_rehash(stored_hash)
+    if settings.algorithm == "argon2":
+        return True
+    return stored_hash.split("$", 1)[0] != _werkzeug_method(settings)
+
+
+def _median_ms(settings, samples=3):
+    durations = []
+    for _ in range(samples):
+        start = perf_counter()
+        _hash("calibration-password-1", settings)
+        durations.append((perf_counter() - start) * 1000)
+    return sorted(durations)[len(durations) // 2]
+
+
+def calibrate(target_ms=250, algorithm="argon2", memory_cost=65536, parallelism=4, max_time_cost=20):
+    """
+    Pilih cost terkecil yang membuat satu hash memakan waktu >= target_ms di host ini.
+    :return: Tuple (HashSettings, durasi median dalam ms).
+    """
+    if algorithm == "argon2":
+        settings = DEFAULT_SETTINGS._replace(time_cost=1, memory_cost=memory_cost, parallelism=parallelism)
+        duration = _median_ms(settings)
+        while duration < target_ms and settings.time_cost < max_time_cost:
+            settings = settings._replace(time_cost=settings.time_cost + 1)
+            duration = _median_ms(settings)
+        return settings, duration
+
+    if algorithm == "pbkdf2":
+        # Waktu pbkdf2 linear terhadap iterasi: ukur sekali lalu skalakan
+        probe = DEFAULT_SETTINGS._replace(algorithm="pbkdf2", iterations=100000)
+        iterations = max(100000, int(probe.iterations * target_ms / _median_ms(probe)))
+        settings = probe._replace(iterations=iterations)
+        return settings, _median_ms(settings)
+
+    raise ValueError(f"Kalibrasi tidak didukung untuk algoritma: {algorithm}")
@@ -0,0 +1,18 @@
+from app.utils.metrics import timed
+
+
+@timed("pdf_geometry")
+def extract_page_geometry(pdf_path):
+    """
+    Ambil ukuran (mediabox) dan rotasi setiap halaman PDF.
+    Dipanggil sekali saat upload agar validasi dan stamping tidak perlu membuka file lagi.
+    :return: List tuple (width, height, rotation) berurutan per halaman.
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path)
+    geometry = []
+    for page in reader.pages:
+        mediabox = page.mediabox
+        geometry.append((float(mediabox.width), float(mediabox.height), int(page.get('/Rotate', 0) or 0) % 360))
+    return geometry
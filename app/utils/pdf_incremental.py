@@ -0,0 +1,332 @@
+"""
+Stamping PDF lewat incremental update (ISO 32000-1 §7.5.6).
+
+File asli dibuka lewat mmap dan disalin apa adanya ke output; yang ditambahkan
+di akhir file hanya objek baru (gambar QR, dua content stream) dan versi baru
+dari dictionary halaman target, diikuti xref dan trailer dengan ``/Prev``.
+Halaman dicari lewat ``/Count`` di page tree sehingga hanya node di jalur menuju
+halaman target yang di-resolve; objek halaman lain tidak pernah dibaca, sehingga
+memori tetap datar walaupun dokumen memiliki ribuan halaman.
+"""
+import io
+import os
+import mmap
+import zlib
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+class IncrementalUpdateUnsupported(ValueError):
+    """Struktur PDF tidak mendukung incremental update (mis. terenkripsi)."""
+
+
+@contextmanager
+def _open_reader(pdf_path):
+    from PyPDF2 import PdfReader
+
+    with open(pdf_path, "rb") as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = PdfReader(mapped)
+        try:
+            if "/Encrypt" in reader.trailer:
+                raise IncrementalUpdateUnsupported("PDF terenkripsi tidak dapat di-stamp secara incremental.")
+            yield reader, mapped
+        finally:
+            # Lepaskan referensi ke buffer sebelum mmap ditutup
+            reader.stream = None
+
+
+def _find_page(reader, page_index):
+    """
+    Telusuri page tree memakai /Count, hanya me-resolve node di jalur menuju halaman.
+    :return: Tuple (IndirectObject halaman, dictionary halaman, atribut turunan dari parent).
+    """
+    if page_index < 0:
+        raise ValueError(f"Halaman target {page_index} tidak valid untuk dokumen ini.")
+
+    node = reader.trailer["/Root"]["/Pages"]
+    if page_index >= int(node.get("/Count", 0)):
+        raise ValueError(f"Halaman target {page_index} tidak valid untuk dokumen ini.")
+
+    inherited = {}
+    remaining = page_index
+    while True:
+        for key in _INHERITABLE:
+            if key in node:
+                inherited[key] = node[key]
+        kids = node["/Kids"]
+        if int(node.get("/Count", 0)) == len(kids):
+            # Semua anak adalah halaman: langsung ke indeks tanpa me-resolve saudaranya
+            kid = kids[remaining].get_object()
+            if kid.get("/Type") != "/Pages" and "/Kids" not in kid:
+                return _page_result(kids[remaining], kid, inherited)
+        for kid_ref in kids:
+            kid = kid_ref.get_object()
+            if kid.get("/Type") == "/Pages" or "/Kids" in kid:
+                count = int(kid.get("/Count", 0))
+                if remaining < count:
+                    node = kid
+                    break
+                remaining -= count
+            elif remaining == 0:
+                return _page_result(kid_ref, kid, inherited)
+            else:
+                remaining -= 1
+        else:
+            raise ValueError(f"Halaman target {page_index} tidak ditemukan di page tree.")
+
+
+def _page_result(page_ref, page, inherited):
+    if not hasattr(page_ref, "idnum"):
+        raise IncrementalUpdateUnsupported("Halaman bukan objek tidak langsung.")
+    return page_ref, page, inherited
+
+
+def _page_attribute(page, inherited, key):
+    return page[key] if key in page else inherited.get(key)
+
+
+def normalize_rotation(rotation):
+    """Nilai /Rotate sebagai 0, 90, 180 atau 270 (nilai tidak valid dianggap 0)."""
+    rotation = int(rotation or 0) % 360
+    return rotation if rotation % 90 == 0 else 0
+
+
+def display_size(width, height, rotation):
+    """Ukuran halaman sebagaimana ditampilkan; /Rotate 90 atau 270 menukar sisi."""
+    return (height, width) if normalize_rotation(rotation) % 180 == 90 else (width, height)
+
+
+def placement_matrix(x, y, width, height, rotation, page_width, page_height):
+    """
+    Matriks ``cm`` (a, b, c, d, e, f) yang memetakan unit square gambar ke persegi
+    (x, y, width, height) di ruang tampilan (titik asal kiri bawah halaman yang
+    sudah diputar /Rotate), dalam koordinat halaman yang belum diputar
+    berukuran page_width x page_height. Gambar tetap tegak saat ditampilkan.
+    """
+    rotation = normalize_rotation(rotation)
+    if rotation == 90:
+        return 0, width, -height, 0, page_width - y, x
+    if rotation == 180:
+        return -width, 0, 0, -height, page_width - x, page_height - y
+    if rotation == 270:
+        return 0, -width, height, 0, y, page_height - x
+    return width, 0, 0, height, x, y
+
+
+def read_page_geometry(pdf_path, page_index):
+    """Ukuran mediabox dan rotasi (width, height, rotation) satu halaman tanpa memuat halaman lain."""
+    from PyPDF2.generic import RectangleObject
+
+    with _open_reader(pdf_path) as (reader, _):
+        _, page, inherited = _find_page(reader, page_index)
+        mediabox = RectangleObject(_page_attribute(page, inherited, "/MediaBox"))
+        rotation = _page_attribute(page, inherited, "/Rotate")
+        rotation = normalize_rotation(rotation.get_object() if rotation is not None else 0)
+        return float(mediabox.width), float(mediabox.height), rotation
+
+
+def read_page_size(pdf_path, page_index):
+    """Ukuran mediabox (width, height) satu halaman tanpa memuat halaman lain."""
+    return read_page_geometry(pdf_path, page_index)[:2]
+
+
+def _startxref(mapped):
+    position = mapped.rfind(b"startxref")
+    if position < 0:
+        raise IncrementalUpdateUnsupported("startxref tidak ditemukan.")
+    return int(mapped[position + 9:position + 40].split()[0])
+
+
+def _next_object_number(reader):
+    """/Size dari trailer; trailer hasil xref stream di PyPDF2 tidak menyimpan /Size."""
+    numbers = [number for entries in reader.xref.values() for number in entries]
+    numbers.extend(reader.xref_objStm.keys())
+    return max(int(reader.trailer.get("/Size", 0)), max(numbers, default=0) + 1)
+
+
+def _serialize(obj):
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _stream_bytes(dictionary, data):
+    from PyPDF2.generic import NameObject, NumberObject
+
+    dictionary[NameObject("/Length")] = NumberObject(len(data))
+    return _serialize(dictionary) + b"\nstream\n" + data + b"\nendstream"
+
+
+def _image_xobject(image_path):
+    """Gambar PNG sebagai image XObject RGB ber-FlateDecode."""
+    from PIL import Image
+    from PyPDF2.generic import DictionaryObject, NameObject, NumberObject
+
+    with Image.open(image_path) as image:
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        else:
+            image = image.convert("RGB")
+        width, height = image.size
+        data = zlib.compress(image.tobytes())
+
+    dictionary = DictionaryObject({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(width),
+        NameObject("/Height"): NumberObject(height),
+        NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+        NameObject("/Filter"): NameObject("/FlateDecode"),
+    })
+    return _stream_bytes(dictionary, data)
+
+
+def _raw_copy(dictionary):
+    """Salin dictionary tanpa me-resolve referensi (nilai tetap ``n g R``)."""
+    from PyPDF2.generic import DictionaryObject
+
+    copy = DictionaryObject()
+    for key, value in dict.items(dictionary):
+        dict.__setitem__(copy, key, value)
+    return copy
+
+
+def _raw_get(dictionary, key):
+    return dict.get(dictionary, key) if dictionary is not None else None
+
+
+def _xref_table(entries):
+    """Xref klasik; entries: list (nomor objek, generation, offset) yang sudah terurut."""
+    # Entri 0 ikut ditulis agar subsection pertama tetap berindeks nol
+    lines = [b"xref\n0 1\n0000000000 65535 f \n"]
+    start = 0
+    while start < len(entries):
+        end = start + 1
+        while end < len(entries) and entries[end][0] == entries[end - 1][0] + 1:
+            end += 1
+        lines.append(f"{entries[start][0]} {end - start}\n".encode())
+        for _, generation, offset in entries[start:end]:
+            lines.append(f"{offset:010d} {generation:05d} n \n".encode())
+        start = end
+    return b"".join(lines)
+
+
+def _number(value):
+    return "0" if value == 0 else f"{value:.4f}"
+
+
+def stamp_image(pdf_path, output_path, page_index, image_path, x, y, width, height):
+    """
+    Tempelkan gambar ke satu halaman dengan incremental update.
+    Koordinat dalam satuan point PDF, titik asal di kiri bawah halaman sebagaimana
+    ditampilkan; /Rotate halaman diperhitungkan lewat ``placement_matrix``.
+    :raises IncrementalUpdateUnsupported: jika PDF harus ditulis ulang penuh.
+    :raises ValueError: jika halaman target tidak valid.
+    """
+    from PyPDF2.generic import (
+        ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, RectangleObject
+    )
+
+    with _open_reader(pdf_path) as (reader, mapped):
+        page_ref, page, inherited = _find_page(reader, page_index)
+        prev = _startxref(mapped)
+        uses_xref_stream = mapped[prev:prev + 4] != b"xref"
+        size = _next_object_number(reader)
+        image_num, prefix_num, overlay_num = size, size + 1, size + 2
+
+        # Resources baru = resources lama + XObject QR
+        resources = _page_attribute(page, inherited, "/Resources")
+        resources = resources.get_object() if resources is not None else DictionaryObject()
+        new_resources = _raw_copy(resources)
+        xobjects = resources.get("/XObject")
+        new_xobjects = _raw_copy(xobjects.get_object()) if xobjects is not None else DictionaryObject()
+        name, suffix = "/QrSig", 0
+        while name in new_xobjects:
+            suffix += 1
+            name = f"/QrSig{suffix}"
+        new_xobjects[NameObject(name)] = IndirectObject(image_num, 0, reader)
+        new_resources[NameObject("/XObject")] = new_xobjects
+
+        # Konten asli dibungkus q ... Q agar CTM-nya tidak memengaruhi stempel
+        contents = ArrayObject([IndirectObject(prefix_num, 0, reader)])
+        raw_contents = _raw_get(page, "/Contents")
+        if isinstance(raw_contents, IndirectObject) and isinstance(raw_contents.get_object(), ArrayObject):
+            contents.extend(list.__iter__(raw_contents.get_object()))
+        elif isinstance(raw_contents, ArrayObject):
+            contents.extend(list.__iter__(raw_contents))
+        elif raw_contents is not None:
+            contents.append(raw_contents)
+        contents.append(IndirectObject(overlay_num, 0, reader))
+
+        new_page = _raw_copy(page)
+        new_page[NameObject("/Resources")] = new_resources
+        new_page[NameObject("/Contents")] = contents
+        for key in ("/MediaBox", "/CropBox", "/Rotate"):
+            if key not in page and key in inherited:
+                dict.__setitem__(new_page, NameObject(key), inherited[key])
+
+        mediabox = RectangleObject(_page_attribute(page, inherited, "/MediaBox"))
+        rotation = _page_attribute(page, inherited, "/Rotate")
+        matrix = placement_matrix(x, y, width, height, rotation.get_object() if rotation is not None else 0,
+                                  float(mediabox.width), float(mediabox.height))
+        overlay = f"Q\nq\n{' '.join(map(_number, matrix))} cm\n{name} Do\nQ\n".encode()
+        objects = [
+            (page_ref.idnum, page_ref.generation, _serialize(new_page)),
+            (image_num, 0, _image_xobject(image_path)),
+            (prefix_num, 0, _stream_bytes(DictionaryObject(), b"q\n")),
+            (overlay_num, 0, _stream_bytes(DictionaryObject(), overlay)),
+        ]
+
+        trailer = DictionaryObject()
+        for key in ("/Root", "/Info", "/ID"):
+            value = _raw_get(reader.trailer, key)
+            if value is not None:
+                dict.__setitem__(trailer, NameObject(key), value)
+        trailer[NameObject("/Prev")] = NumberObject(prev)
+
+        # Temp file unik per pemanggilan agar request paralel tidak saling menimpa
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".pdf.tmp")
+        try:
+            with open(pdf_path, "rb") as source, os.fdopen(fd, "wb") as output:
+                shutil.copyfileobj(source, output, 1024 * 1024)
+                if mapped[-1:] not in (b"\n", b"\r"):
+                    output.write(b"\n")
+
+                entries = []
+                for number, generation, body in objects:
+                    entries.append((number, generation, output.tell()))
+                    output.write(f"{number} {generation} obj\n".encode() + body + b"\nendobj\n")
+
+                xref_offset = output.tell()
+                if uses_xref_stream:
+                    # Pembaruan untuk file ber-xref stream juga memakai xref stream
+                    xref_num = size + 3
+                    entries.append((xref_num, 0, xref_offset))
+                    entries.sort()
+                    index = ArrayObject()
+                    data = b""
+                    for number, generation, offset in entries:
+                        index.extend([NumberObject(number), NumberObject(1)])
+                        data += b"\x01" + offset.to_bytes(4, "big") + generation.to_bytes(2, "big")
+                    trailer[NameObject("/Type")] = NameObject("/XRef")
+                    trailer[NameObject("/Size")] = NumberObject(size + 4)
+                    trailer[NameObject("/W")] = ArrayObject([NumberObject(1), NumberObject(4), NumberObject(2)])
+                    trailer[NameObject("/Index")] = index
+                    output.write(f"{xref_num} 0 obj\n".encode() + _stream_bytes(trailer, data) + b"\nendobj\n")
+                else:
+                    entries.sort()
+                    trailer[NameObject("/Size")] = NumberObject(size + 3)
+                    output.write(_xref_table(entries) + b"trailer\n" + _serialize(trailer) + b"\n")
+                output.write(f"startxref\n{xref_offset}\n%%EOF\n".encode())
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return output_path
@@ -1,7 +1,10 @@
-import qrcode
 import logging
 import os
+from app.utils.metrics import timed
 
+logger = logging.getLogger(__name__)
+
+@timed("generate_qr_code")
 def generate_qr_code(data, output_path, base_url=None):
     """
     Membuat QR Code berdasarkan data yang diberikan.
@@ -19,13 +22,15 @@ def generate_qr_code(data, output_path, base_url=None):
         # Jika base_url diberikan, buat URL untuk QR Code
         if base_url:
             data = f"{base_url}?token={data}"
-            logging.info(f"URL QR Code yang dibuat: {data}")
         
         # Validasi output_path
         output_dir = os.path.dirname(output_path)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
-            logging.info(f"Folder untuk QR Code dibuat: {output_dir}")
+            logger.info("Folder untuk QR Code dibuat: %s", output_dir)
+
+        # Import di sini agar qrcode/PIL tidak dimuat saat startup worker
+        import qrcode
 
         # Membuat QR Code
         qr = qrcode.QRCode(
@@ -40,8 +45,7 @@ def generate_qr_code(data, output_path, base_url=None):
         # Simpan gambar QR Code
         img = qr.make_image(fill_color="black", back_color="white")
         img.save(output_path)
-        logging.info(f"QR Code berhasil disimpan di: {output_path}")
-        logging.info(f"Data QR Code: {data}")
+        logger.debug("QR Code berhasil disimpan di: %s", output_path)
     except Exception as e:
-        logging.error(f"Gagal membuat QR Code: {e}")
+        logger.error("Gagal membuat QR Code: %s", e)
         raise
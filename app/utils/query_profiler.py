@@ -0,0 +1,135 @@
+"""
+Profiler query SQLAlchemy per request, dengan deteksi pola N+1.
+
+Jika QUERY_PROFILER_ENABLED aktif (default: mengikuti app.debug), setiap respons
+mendapat header:
+    X-Query-Count     jumlah query selama request
+    X-Query-Time-Ms   total waktu query (ms)
+    X-Query-Repeated  jumlah statement identik yang berulang >= ambang N+1
+
+Untuk test, gunakan ``assert_max_queries(n)`` untuk mengunci budget query:
+
+    with assert_max_queries(3):
+        client.get('/documents/documents')
+"""
+import logging
+from time import perf_counter
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_active_collectors = ContextVar("query_profiler_collectors", default=())
+_listeners_installed = False
+
+
+class QueryCollector:
+    """Kumpulan statistik query untuk satu request atau satu blok test."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """Statement identik yang dieksekusi >= threshold kali (indikasi N+1)."""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+def _push(collector):
+    return _active_collectors.set(_active_collectors.get() + (collector,))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_collectors.get():
+        conn.info.setdefault("query_profiler_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_profiler_start")
+    if not starts:
+        return
+    duration = perf_counter() - starts.pop()
+    for collector in _active_collectors.get():
+        collector.record(statement, duration)
+
+
+def _install_listeners():
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _listeners_installed = True
+
+
+@contextmanager
+def record_queries():
+    """Kumpulkan semua query yang dieksekusi di dalam blok ini."""
+    _install_listeners()
+    collector = QueryCollector()
+    token = _push(collector)
+    try:
+        yield collector
+    finally:
+        _active_collectors.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries):
+    """Helper test: gagal jika blok menjalankan lebih dari ``max_queries`` query."""
+    with record_queries() as collector:
+        yield collector
+    if collector.count > max_queries:
+        details = "\n".join(f"  {count}x {statement}" for statement, count in collector.statements.most_common())
+        raise AssertionError(
+            f"Diharapkan maksimal {max_queries} query, tetapi tereksekusi {collector.count}:\n{details}"
+        )
+
+
+def init_query_profiler(app):
+    """Pasang profiler per request jika QUERY_PROFILER_ENABLED (default: app.debug)."""
+    if not app.config.get("QUERY_PROFILER_ENABLED", app.debug):
+        return
+    _install_listeners()
+    threshold = app.config.get("QUERY_PROFILER_N_PLUS_ONE_THRESHOLD", 3)
+
+    @app.before_request
+    def start_query_profiler():
+        collector = QueryCollector()
+        g._query_profiler = (collector, _push(collector))
+
+    @app.after_request
+    def add_query_profiler_headers(response):
+        profiler = g.get("_query_profiler")
+        if profiler is None:
+            return response
+        collector = profiler[0]
+        response.headers["X-Query-Count"] = str(collector.count)
+        response.headers["X-Query-Time-Ms"] = f"{collector.total_time * 1000:.2f}"
+
+        repeated = collector.repeated(threshold)
+        if repeated:
+            response.headers["X-Query-Repeated"] = str(len(repeated))
+            for statement, count in repeated.items():
+                logger.warning("Kemungkinan N+1: %dx %s", count, statement)
+        return response
+
+    @app.teardown_request
+    def stop_query_profiler(exc):
+        profiler = g.pop("_query_profiler", None)
+        if profiler is not None:
+            try:
+                _active_collectors.reset(profiler[1])
+            except ValueError:
+                # Token dibuat di context lain; kosongkan saja collector aktif
+                _active_collectors.set(())
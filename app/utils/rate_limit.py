@@ -0,0 +1,229 @@
+"""
+Admission control dengan token bucket untuk endpoint mahal atau publik.
+
+``/auth/login`` menjalankan hash password pada setiap percobaan, sedangkan
+``/signature/validate`` dan ``/signature/check`` tidak memerlukan login dan
+masing-masing memicu query DB serta verifikasi tanda tangan. Decorator
+``rate_limit(name, *key_funcs)`` menolak request di luar budget dengan 429 dan
+header Retry-After *sebelum* pekerjaan mahal dijalankan.
+
+Konfigurasi (app.config):
+    RATE_LIMIT_ENABLED      aktif/nonaktif (default True)
+    RATE_LIMITS             dict budget per route, mis. {"login": "10/minute"};
+                            format "<jumlah>/<periode>" dengan periode second,
+                            minute, hour atau jumlah detik ("30/10s")
+    RATE_LIMIT_STORAGE_URL  kosong = bucket di memori proses (default);
+                            "redis://..." = bucket bersama antar worker
+    RATE_LIMIT_MAX_KEYS     batas jumlah key bucket di memori (default 100000)
+    PROXY_FIX_X_FOR         jumlah reverse proxy tepercaya di depan aplikasi
+                            (default 0). Bucket per IP memakai request.remote_addr;
+                            di balik proxy nilai itu adalah alamat proxy sehingga
+                            semua klien berbagi satu bucket. Set ke jumlah hop agar
+                            IP diambil dari X-Forwarded-For (werkzeug ProxyFix).
+                            Jangan diset tanpa proxy: klien dapat memalsukan header.
+
+Setiap key function menghasilkan satu bucket (mis. per IP dan per pasangan
+IP+email), dan request harus lolos di semua bucket-nya. Semua bucket diperiksa
+lebih dulu; token hanya diambil jika seluruhnya cukup, sehingga request yang
+ditolak tidak menghabiskan budget bucket lain.
+"""
+import re
+import math
+import hashlib
+import logging
+import threading
+from time import monotonic
+from functools import wraps
+from collections import OrderedDict, namedtuple
+from flask import current_app, request, jsonify
+
+logger = logging.getLogger(__name__)
+
+Budget = namedtuple("Budget", "capacity rate")  # rate = token per detik
+
+DEFAULT_LIMITS = {
+    "login": "10/minute",
+    "validate": "60/minute",
+    "check": "60/minute",
+}
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+_BUDGET_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(?:(\d+(?:\.\d+)?)\s*s|(second|minute|hour))\s*$")
+
+
+def parse_budget(value):
+    """Parse "10/minute" atau "30/10s" menjadi Budget(capacity, rate)."""
+    match = _BUDGET_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Format rate limit tidak valid: {value!r}")
+    count, seconds, period = match.groups()
+    period_seconds = float(seconds) if seconds else _PERIODS[period]
+    return Budget(capacity=int(count), rate=int(count) / period_seconds)
+
+
+class MemoryBucketStore:
+    """Token bucket di memori proses (LRU terbatas, thread-safe)."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, budget, cost=1):
+        """
+        Ambil ``cost`` token dari bucket ``key``.
+        :return: Tuple (diizinkan, detik sampai token cukup).
+        """
+        return self.consume_all((key,), budget, cost)
+
+    def consume_all(self, keys, budget, cost=1):
+        """
+        Ambil ``cost`` token dari setiap bucket ``keys``, atau tidak sama sekali.
+        :return: Tuple (diizinkan, detik sampai semua bucket cukup).
+        """
+        now = monotonic()
+        with self._lock:
+            levels = []
+            for key in keys:
+                tokens, updated = self._buckets.get(key, (budget.capacity, now))
+                levels.append(min(budget.capacity, tokens + (now - updated) * budget.rate))
+            retry_after = max(((cost - tokens) / budget.rate for tokens in levels if tokens < cost), default=0.0)
+            for key, tokens in zip(keys, levels):
+                self._buckets[key] = (tokens - cost if retry_after == 0.0 else tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after == 0.0, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Refill, pemeriksaan semua bucket dan pengurangan token dijalankan atomik di server Redis
+_REDIS_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    if tokens < cost then
+        retry_after = math.max(retry_after, (cost - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local tokens = levels[i]
+    if retry_after == 0 then
+        tokens = tokens - cost
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore:
+    """Token bucket bersama antar worker/host di Redis (paket ``redis`` opsional)."""
+
+    def __init__(self, url, prefix="ratelimit:"):
+        import redis
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_SCRIPT)
+
+    def consume(self, key, budget, cost=1):
+        return self.consume_all((key,), budget, cost)
+
+    def consume_all(self, keys, budget, cost=1):
+        retry_after = float(self._script(keys=[self.prefix + key for key in keys],
+                                         args=[budget.capacity, budget.rate, cost]))
+        return retry_after == 0.0, retry_after
+
+
+def create_store(app):
+    url = app.config.get("RATE_LIMIT_STORAGE_URL")
+    if url:
+        return RedisBucketStore(url)
+    return MemoryBucketStore(max_keys=app.config.get("RATE_LIMIT_MAX_KEYS", 100000))
+
+
+def init_rate_limit(app):
+    """Pasang store bucket untuk aplikasi ini (lihat docstring modul)."""
+    app.extensions["rate_limit"] = create_store(app)
+
+
+def get_budget(name):
+    limits = dict(DEFAULT_LIMITS, **current_app.config.get("RATE_LIMITS", {}))
+    return parse_budget(limits[name])
+
+
+# Key functions: None berarti bucket tersebut dilewati untuk request ini
+
+def by_ip():
+    return f"ip:{request.remote_addr}"
+
+
+def by_ip_and_email():
+    """
+    Bucket per pasangan (IP, email). Sengaja tidak per email saja: bucket global
+    per akun memungkinkan siapa pun mengunci login korban dari IP lain.
+    """
+    data = request.get_json(silent=True) if request.is_json else request.form
+    email = (data or {}).get("email")
+    if not isinstance(email, str) or not email.strip():
+        return None
+    digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+    return f"user:{request.remote_addr}:{digest}"
+
+
+def by_token():
+    if request.method == "GET":
+        token = request.args.get("token")
+    else:
+        token = (request.get_json(silent=True) or {}).get("token")
+    if not isinstance(token, str) or not token:
+        return None
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def too_many_requests(retry_after):
+    response = jsonify({"error": "Terlalu banyak permintaan. Coba lagi nanti."})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limit(name, *key_funcs, methods=None):
+    """
+    Decorator route: tolak dengan 429 jika salah satu bucket ``name`` habis.
+    :param key_funcs: Fungsi tanpa argumen yang menghasilkan key bucket (default per IP).
+    :param methods: Hanya batasi method ini (mis. ("POST",) agar GET form login bebas).
+    """
+    key_funcs = key_funcs or (by_ip,)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            store = current_app.extensions.get("rate_limit")
+            if (store is None or not current_app.config.get("RATE_LIMIT_ENABLED", True)
+                    or (methods and request.method not in methods)):
+                return view(*args, **kwargs)
+
+            keys = [f"{name}:{key}" for key in (key_func() for key_func in key_funcs) if key is not None]
+            if keys:
+                allowed, retry_after = store.consume_all(keys, get_budget(name))
+                if not allowed:
+                    logger.warning("Rate limit %s terlampaui", name)
+                    return too_many_requests(retry_after)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,207 @@
+"""
+Upload resumable untuk dokumen besar (hasil scan kontrak).
+
+Protokol (lihat route ``/documents/uploads`` di ``app/routes/document.py``):
+    1. POST   /uploads                    {"filename", "size"} -> upload_id
+    2. PUT    /uploads/<id>               body = chunk, header Upload-Offset
+    3. GET    /uploads/<id>               offset terakhir untuk melanjutkan
+    4. POST   /uploads/<id>/finalize      menjadi Document
+       DELETE /uploads/<id>               batalkan
+
+Chunk ditulis langsung ke file staging (UPLOAD_STAGING_FOLDER) pada offsetnya,
+dan SHA256 dihitung bertahap saat chunk masuk berurutan, sehingga finalisasi
+tidak membaca ulang file. State hash disimpan per proses; jika chunk berikutnya
+diterima worker lain, hash dibangun ulang sekali dari file staging.
+
+Setiap chunk dan finalisasi mengambil lease ``locked_until`` lewat UPDATE
+bersyarat, sehingga dua request tidak bisa sama-sama menulis atau
+memfinalisasi sesi yang sama; yang kalah menerima 409 dan sesi tidak dibuang.
+``received_size`` baru dinaikkan setelah byte chunk tertulis di file staging,
+jadi offset yang dilaporkan selalu sudah ada di disk. Lease dari worker yang
+mati di tengah jalan habis sendiri setelah LEASE_SECONDS.
+"""
+import os
+import secrets
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from sqlalchemy import or_
+from app.extensions import db
+from app.models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGING_FOLDER = os.path.abspath(os.path.join("app", "cache", "uploads"))
+READ_SIZE = 65536
+MAX_HASHERS = 1024
+LEASE_SECONDS = 300
+
+_hashers = OrderedDict()  # upload_id -> (offset, hasher)
+_hashers_lock = threading.Lock()
+
+
+class UploadOffsetMismatch(ValueError):
+    """Offset chunk tidak sama dengan jumlah byte yang sudah diterima."""
+
+    def __init__(self, offset):
+        super().__init__(f"Offset tidak sesuai; server sudah menerima {offset} byte.")
+        self.offset = offset
+
+
+class UploadBusy(Exception):
+    """Chunk lain atau finalisasi untuk sesi ini sedang berjalan."""
+
+    def __init__(self):
+        super().__init__("Upload sedang diproses oleh request lain; coba lagi.")
+
+
+def create_session(user_id, filename, total_size, staging_folder=DEFAULT_STAGING_FOLDER):
+    os.makedirs(staging_folder, exist_ok=True)
+    upload_id = secrets.token_hex(16)
+    staging_path = os.path.join(staging_folder, f"{upload_id}.part")
+    open(staging_path, "wb").close()
+
+    upload = UploadSession(id=upload_id, user_id=user_id, filename=filename,
+                           total_size=total_size, received_size=0, staging_path=staging_path)
+    db.session.add(upload)
+    db.session.commit()
+    _remember(upload_id, 0, hashlib.sha256())
+    return upload
+
+
+def is_expired(upload, ttl):
+    return upload.updated_at < datetime.utcnow() - timedelta(seconds=ttl)
+
+
+def _remember(upload_id, offset, hasher):
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher)
+        _hashers.move_to_end(upload_id)
+        while len(_hashers) > MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _forget(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+
+
+def _hasher_at(upload, offset):
+    """Salinan hasher untuk ``offset`` byte pertama; dibangun ulang dari staging jika perlu."""
+    with _hashers_lock:
+        entry = _hashers.get(upload.id)
+        if entry is not None and entry[0] == offset:
+            return entry[1].copy()
+
+    logger.info("State hash upload %s tidak ada di proses ini; membaca ulang %d byte", upload.id, offset)
+    hasher = hashlib.sha256()
+    remaining = offset
+    with open(upload.staging_path, "rb") as staged:
+        while remaining:
+            chunk = staged.read(min(READ_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def is_locked(upload):
+    return upload.locked_until is not None and upload.locked_until > datetime.utcnow()
+
+
+def _acquire(upload, **conditions):
+    """
+    Ambil lease sesi secara atomik jika tidak ada lease aktif dan ``conditions`` terpenuhi.
+    :return: Nilai lease (dipakai untuk melepasnya), atau None jika gagal.
+    """
+    now = datetime.utcnow()
+    # Detik bulat: kolom DATETIME MySQL tanpa fsp membuang mikrodetik
+    lease = (now + timedelta(seconds=LEASE_SECONDS)).replace(microsecond=0)
+    acquired = UploadSession.query.filter_by(id=upload.id, **conditions).filter(
+        or_(UploadSession.locked_until.is_(None), UploadSession.locked_until < now)
+    ).update({"locked_until": lease}, synchronize_session=False)
+    db.session.commit()
+    db.session.refresh(upload)
+    return lease if acquired else None
+
+
+def release(upload, lease, **values):
+    """Lepas lease (jika masih milik pemanggil) sambil menyimpan ``values``. Return True jika berhasil."""
+    released = UploadSession.query.filter_by(id=upload.id, locked_until=lease).update(
+        dict(values, locked_until=None, updated_at=datetime.utcnow()), synchronize_session=False)
+    db.session.commit()
+    db.session.refresh(upload)
+    return bool(released)
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Tulis ``length`` byte dari ``stream`` pada ``offset`` sambil memperbarui hash.
+    :return: Offset baru (lebih kecil dari offset + length jika stream terputus).
+    :raises UploadOffsetMismatch: jika offset bukan akhir data yang diterima.
+    """
+    if offset != upload.received_size:
+        raise UploadOffsetMismatch(upload.received_size)
+    if offset + length > upload.total_size:
+        raise ValueError("Chunk melebihi ukuran file yang dideklarasikan.")
+
+    # Klaim chunk pada offset ini secara atomik
+    lease = _acquire(upload, received_size=offset, document_id=None)
+    if lease is None:
+        if upload.received_size != offset:
+            raise UploadOffsetMismatch(upload.received_size)
+        raise UploadBusy()
+
+    hasher = _hasher_at(upload, offset)
+    written = 0
+    try:
+        with open(upload.staging_path, "r+b") as staged:
+            staged.seek(offset)
+            staged.truncate()
+            while written < length:
+                chunk = stream.read(min(READ_SIZE, length - written))
+                if not chunk:
+                    break
+                staged.write(chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+    finally:
+        # Offset baru dipublikasikan setelah file ditutup; jika koneksi terputus,
+        # byte yang sudah tertulis tetap valid
+        if release(upload, lease, received_size=offset + written):
+            _remember(upload.id, offset + written, hasher)
+        else:
+            logger.warning("Upload %s: lease chunk pada offset %d habis sebelum selesai", upload.id, offset)
+    return offset + written
+
+
+def claim_finalize(upload):
+    """
+    Ambil lease finalisasi untuk upload yang lengkap dan belum difinalisasi.
+    :return: Nilai lease untuk ``complete``/``release``, atau None jika request lain sedang
+             memfinalisasi (atau sudah selesai; periksa ``upload.document_id``).
+    """
+    return _acquire(upload, received_size=upload.total_size, document_id=None)
+
+
+def content_hash(upload):
+    """SHA256 seluruh file; tanpa membaca ulang file jika semua chunk diterima proses ini."""
+    return _hasher_at(upload, upload.total_size).hexdigest()
+
+
+def discard(upload):
+    """Hapus sesi beserta file staging-nya."""
+    _forget(upload.id)
+    if os.path.exists(upload.staging_path):
+        os.remove(upload.staging_path)
+    db.session.delete(upload)
+    db.session.commit()
+
+
+def complete(upload, document, lease):
+    """Tandai sesi selesai; finalisasi berikutnya mengembalikan dokumen yang sama."""
+    _forget(upload.id)
+    release(upload, lease, document_id=document.id)
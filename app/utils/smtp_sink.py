@@ -0,0 +1,140 @@
+"""
+Server SMTP lokal untuk debugging dan test: menerima semua email lalu
+menyimpannya di memori (dan mencetaknya jika dijalankan sebagai script).
+
+    python -m app.utils.smtp_sink --port 1025
+
+Lalu set MAIL_SERVER=127.0.0.1, MAIL_PORT=1025, MAIL_USE_TLS=false.
+Hanya mendukung subset SMTP yang dipakai smtplib (tanpa TLS/AUTH).
+"""
+import argparse
+import threading
+import socketserver
+from email import message_from_bytes
+from collections import namedtuple
+
+ReceivedMail = namedtuple("ReceivedMail", "mail_from rcpt_tos data")
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        if not sink._accept_connection():
+            self.reply("421 Service not available")
+            return
+        self.reply("220 smtp-sink ready")
+        mail_from, rcpt_tos = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 smtp-sink")
+            elif verb == "MAIL":
+                mail_from, rcpt_tos = command.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_tos.append(command.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in iter(self.rfile.readline, b""):
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                sink._store(ReceivedMail(mail_from, rcpt_tos, b"".join(lines)))
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                mail_from, rcpt_tos = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    SMTP sink di thread background.
+    :param refuse_connections: Jumlah koneksi awal yang ditolak (421), untuk menguji retry.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, refuse_connections=0, on_message=None):
+        self.messages = []
+        self.connections = 0
+        self.refuse_connections = refuse_connections
+        self.on_message = on_message
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def _accept_connection(self):
+        with self._lock:
+            self.connections += 1
+            if self.refuse_connections > 0:
+                self.refuse_connections -= 1
+                return False
+            return True
+
+    def _store(self, mail):
+        with self._lock:
+            self.messages.append(mail)
+        if self.on_message:
+            self.on_message(mail)
+
+    def parsed(self):
+        """Email yang diterima sebagai objek ``email.message.Message``."""
+        with self._lock:
+            return [message_from_bytes(mail.data) for mail in self.messages]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP sink lokal untuk debugging email.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    def print_message(mail):
+        print(f"--- {mail.mail_from} -> {', '.join(mail.rcpt_tos)}")
+        print(mail.data.decode(errors="replace"))
+
+    sink = SMTPSink(args.host, args.port, on_message=print_message)
+    print(f"SMTP sink mendengarkan di {sink.host}:{sink.port}")
+    try:
+        sink._server.serve_forever()
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
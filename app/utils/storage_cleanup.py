@@ -0,0 +1,331 @@
+"""
+Penghapusan dokumen di background dan GC file yatim.
+
+Soft delete
+    Route hanya mengisi ``Document.deleted_at``; dokumen langsung hilang dari
+    semua route lewat ``Document.active()``. Baris dan file-nya dihapus oleh
+    ``purge_deleted_documents``: per batch satu DELETE ... WHERE IN untuk tiap
+    tabel (Signature, DocumentPage, UploadSession, Document) dalam satu
+    transaksi, lalu file dihapus setelah commit. Purge dijalankan thread
+    "document-purge" per aplikasi yang dibangunkan setiap ada penghapusan dan
+    juga memeriksa ulang tiap PURGE_INTERVAL detik (sisa dari proses yang mati
+    sebelum purge selesai). Pemeriksaan yang sama menghapus record
+    Idempotency-Key yang kedaluwarsa (``purge_expired_records``).
+
+GC file yatim (``python gc_storage.py``)
+    Folder upload, signature, pratinjau dan staging dipindai dengan
+    ``os.scandir`` secara streaming. Nama file dicocokkan ke database per batch
+    (satu query IN per batch) dan file yang tidak dirujuk baris mana pun
+    dihapus. File yang lebih muda dari ``min_age`` detik dilewati agar upload
+    atau stamping yang sedang berjalan tidak ikut terhapus.
+
+Konfigurasi (app.config):
+    UPLOAD_FOLDER         folder dokumen (default app/static/uploads)
+    SIGNATURE_FOLDER      folder tanda tangan, QR dan hasil stamping (default app/static/signatures)
+    PURGE_IN_BACKGROUND   False = purge langsung di dalam request (default True)
+    PURGE_BATCH_SIZE      dokumen per transaksi purge (default 100)
+    PURGE_INTERVAL        detik antar pemeriksaan periodik (default 300)
+"""
+import os
+import re
+import glob
+import shutil
+import logging
+import threading
+from time import time
+from flask import current_app
+from app.extensions import db
+from app.models import Document, DocumentPage, Signature, UploadSession
+from app.utils.metrics import span
+from app.utils.idempotency import purge_expired_records
+from app.utils.page_preview import clear_previews, DEFAULT_PREVIEW_FOLDER
+from app.utils.resumable_upload import DEFAULT_STAGING_FOLDER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_FOLDER = os.path.abspath(os.path.join("app", "static", "uploads"))
+DEFAULT_SIGNATURE_FOLDER = os.path.abspath(os.path.join("app", "static", "signatures"))
+
+# {doc_hash}_signature.png, {doc_hash}_qr.png, {doc_hash}_{etag}_signed.{pdf,docx}
+SIGNATURE_ARTIFACT_PATTERN = re.compile(r"^([0-9a-f]{64})_(?:signature\.png|qr\.png|[^_]+_signed\.\w+)$")
+FILE_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def storage_folders(app):
+    """Folder penyimpanan yang dikelola aplikasi ini."""
+    return {
+        "uploads": app.config.get("UPLOAD_FOLDER", DEFAULT_UPLOAD_FOLDER),
+        "signatures": app.config.get("SIGNATURE_FOLDER", DEFAULT_SIGNATURE_FOLDER),
+        "previews": app.config.get("PREVIEW_CACHE_FOLDER", DEFAULT_PREVIEW_FOLDER),
+        "staging": app.config.get("UPLOAD_STAGING_FOLDER", DEFAULT_STAGING_FOLDER),
+    }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass  # Sudah dihapus (request lain / GC)
+
+
+def remove_signature_files(doc_hashes, paths=(), signature_folder=DEFAULT_SIGNATURE_FOLDER):
+    """Hapus gambar tanda tangan, QR dan hasil stamping milik dokumen-dokumen ini."""
+    for path in paths:
+        _remove(path)
+    for doc_hash in doc_hashes:
+        _remove(os.path.join(signature_folder, f"{doc_hash}_signature.png"))
+        _remove(os.path.join(signature_folder, f"{doc_hash}_qr.png"))
+        for signed_path in glob.glob(os.path.join(signature_folder, f"{doc_hash}_*_signed.*")):
+            _remove(signed_path)
+
+
+def purge_deleted_documents(batch_size=100, file_hash=None, signature_folder=DEFAULT_SIGNATURE_FOLDER,
+                            preview_folder=DEFAULT_PREVIEW_FOLDER):
+    """
+    Hapus permanen satu batch dokumen yang sudah di-soft delete, beserta
+    tanda tangan, geometri halaman, sesi upload dan file-nya.
+    :param file_hash: Hanya dokumen terhapus dengan isi ini (dipakai saat upload ulang).
+    :return: Jumlah dokumen yang di-purge (0 jika tidak ada lagi).
+    """
+    query = db.session.query(Document.id, Document.doc_hash, Document.file_hash,
+                             Document.filepath, Document.pdf_rendition_path
+                             ).filter(Document.deleted_at.isnot(None))
+    if file_hash is not None:
+        query = query.filter(Document.file_hash == file_hash)
+    rows = query.order_by(Document.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    ids = [row.id for row in rows]
+    doc_hashes = [row.doc_hash for row in rows]
+    document_paths = {path for row in rows for path in (row.filepath, row.pdf_rendition_path) if path}
+    qr_paths = [path for (path,) in db.session.query(Signature.qr_code_path).filter(
+        Signature.document_hash.in_(doc_hashes), Signature.qr_code_path.isnot(None))]
+
+    with span("document_purge"):
+        Signature.query.filter(Signature.document_hash.in_(doc_hashes)).delete(synchronize_session=False)
+        DocumentPage.query.filter(DocumentPage.document_id.in_(ids)).delete(synchronize_session=False)
+        UploadSession.query.filter(UploadSession.document_id.in_(ids)).delete(synchronize_session=False)
+        Document.query.filter(Document.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+    # Upload dengan nama file sama menimpa path yang sama; jangan hapus file
+    # yang masih dirujuk dokumen lain
+    still_referenced = _referenced(Document.filepath, document_paths) | \
+        _referenced(Document.pdf_rendition_path, document_paths)
+    for path in document_paths - still_referenced:
+        _remove(path)
+    remove_signature_files(doc_hashes, qr_paths, signature_folder)
+    for row in rows:
+        clear_previews(row.file_hash, cache_folder=preview_folder)
+
+    logger.info("%d dokumen terhapus di-purge", len(rows))
+    return len(rows)
+
+
+def purge_all_deleted(app, batch_size=100):
+    """Purge semua dokumen terhapus, batch demi batch. Return jumlah total."""
+    folders = storage_folders(app)
+    total = 0
+    while True:
+        purged = purge_deleted_documents(batch_size, signature_folder=folders["signatures"],
+                                         preview_folder=folders["previews"])
+        if not purged:
+            return total
+        total += purged
+
+
+class DocumentPurger:
+    """Thread purge per aplikasi; dibangunkan oleh ``request_purge``."""
+
+    def __init__(self, app, batch_size=100, interval=300):
+        self.app = app
+        self.batch_size = batch_size
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._requested = 0
+        self._completed = 0
+        self._signature_files = []  # (doc_hashes, paths) yang barisnya sudah dihapus
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def wake(self, doc_hashes=(), paths=()):
+        with self._condition:
+            if doc_hashes or paths:
+                self._signature_files.append((list(doc_hashes), list(paths)))
+            self._requested += 1
+            self._condition.notify_all()
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if not self._stopped and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="document-purge", daemon=True)
+                self._thread.start()
+
+    def join(self, timeout=None):
+        """Tunggu sampai semua purge yang sudah diminta selesai. Return False jika timeout."""
+        with self._condition:
+            target = self._requested
+            return self._condition.wait_for(lambda: self._completed >= target, timeout)
+
+    def stop(self, timeout=None):
+        """Hentikan thread purge; purge yang sedang berjalan diselesaikan dulu."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or self._requested > self._completed,
+                                         self.interval)
+                if self._stopped:
+                    return
+                target = self._requested
+                signature_files, self._signature_files = self._signature_files, []
+            try:
+                self._purge(signature_files)
+            except Exception:
+                logger.exception("Purge dokumen gagal")
+            finally:
+                with self._condition:
+                    self._completed = target
+                    self._condition.notify_all()
+
+    def _purge(self, signature_files):
+        with self.app.app_context():
+            try:
+                signature_folder = storage_folders(self.app)["signatures"]
+                for doc_hashes, paths in signature_files:
+                    remove_signature_files(doc_hashes, paths, signature_folder)
+                purge_all_deleted(self.app, self.batch_size)
+                purge_expired_records()
+            finally:
+                db.session.remove()
+
+
+def init_document_purge(app):
+    """
+    Pasang worker purge untuk aplikasi ini. Dengan PURGE_IN_BACKGROUND thread
+    langsung dimulai agar pemeriksaan periodik berjalan walau tidak ada penghapusan baru.
+    """
+    purger = DocumentPurger(
+        app,
+        batch_size=app.config.get("PURGE_BATCH_SIZE", 100),
+        interval=app.config.get("PURGE_INTERVAL", 300),
+    )
+    app.extensions["document_purge"] = purger
+    if app.config.get("PURGE_IN_BACKGROUND", True):
+        purger._ensure_worker()
+
+
+def request_purge(doc_hashes=(), paths=()):
+    """
+    Jadwalkan purge dokumen yang sudah di-soft delete. ``doc_hashes``/``paths``:
+    file signature yang barisnya sudah dihapus dan ikut dibuang di background.
+    """
+    app = current_app._get_current_object()
+    purger = app.extensions.get("document_purge")
+    if purger is None or not app.config.get("PURGE_IN_BACKGROUND", True):
+        remove_signature_files(doc_hashes, paths, storage_folders(app)["signatures"])
+        purge_all_deleted(app, app.config.get("PURGE_BATCH_SIZE", 100))
+        return
+    purger.wake(doc_hashes, paths)
+
+
+# GC file yatim
+
+def _referenced(column, values):
+    if not values:
+        return set()
+    return {value for (value,) in db.session.query(column).filter(column.in_(list(values)))}
+
+
+def _scan(folder, min_age, directories=False):
+    """Entry folder (streaming, tanpa listdir penuh) yang lebih tua dari min_age detik."""
+    if not os.path.isdir(folder):
+        return
+    cutoff = time() - min_age
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) != directories:
+                continue
+            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                continue
+            yield entry
+
+
+def _batches(entries, size):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _upload_orphans(batch):
+    # Termasuk file sementara *.upload yang tertinggal dari upload yang gagal
+    paths = {entry.path for entry in batch}
+    referenced = _referenced(Document.filepath, paths) | _referenced(Document.pdf_rendition_path, paths)
+    return [entry for entry in batch if entry.path not in referenced]
+
+
+def _signature_orphans(batch):
+    # Nama file yang tidak dikenal dibiarkan
+    owners = {entry: SIGNATURE_ARTIFACT_PATTERN.match(entry.name) for entry in batch}
+    owners = {entry: match.group(1) for entry, match in owners.items() if match}
+    referenced = _referenced(Signature.document_hash, set(owners.values()))
+    return [entry for entry, doc_hash in owners.items() if doc_hash not in referenced]
+
+
+def _preview_orphans(batch):
+    hashes = {entry.name for entry in batch if FILE_HASH_PATTERN.match(entry.name)}
+    referenced = _referenced(Document.file_hash, hashes)
+    return [entry for entry in batch if entry.name in hashes and entry.name not in referenced]
+
+
+def _staging_orphans(batch):
+    parts = {entry.path for entry in batch if entry.name.endswith(".part")}
+    referenced = _referenced(UploadSession.staging_path, parts)
+    return [entry for entry in batch if entry.path in parts and entry.path not in referenced]
+
+
+_GC_TARGETS = (
+    ("uploads", False, _upload_orphans),
+    ("signatures", False, _signature_orphans),
+    ("previews", True, _preview_orphans),
+    ("staging", False, _staging_orphans),
+)
+
+
+def collect_orphans(folders, min_age=3600, batch_size=500, dry_run=False):
+    """
+    Hapus file (dan folder pratinjau) yang tidak dirujuk Document/Signature/UploadSession.
+    :param folders: Mapping nama -> path, lihat ``storage_folders``.
+    :return: Dict nama folder -> {"scanned", "removed", "bytes"}.
+    """
+    stats = {}
+    for name, directories, find_orphans in _GC_TARGETS:
+        folder = os.path.abspath(folders[name])
+        counts = stats[name] = {"scanned": 0, "removed": 0, "bytes": 0}
+        for batch in _batches(_scan(folder, min_age, directories), batch_size):
+            counts["scanned"] += len(batch)
+            for entry in find_orphans(batch):
+                if not directories:
+                    counts["bytes"] += entry.stat(follow_symlinks=False).st_size
+                counts["removed"] += 1
+                if dry_run:
+                    logger.info("GC (dry run): %s", entry.path)
+                elif directories:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    _remove(entry.path)
+        logger.info("GC %s: %d diperiksa, %d dihapus", name, counts["scanned"], counts["removed"])
+    return stats
@@ -0,0 +1,159 @@
+"""
+Cache user per proses untuk ``login_manager.user_loader``.
+
+Setiap request terautentikasi sebelumnya menjalankan ``SELECT user``. Sekarang
+user loader mengembalikan ``UserSnapshot`` (salinan ringan dan immutable, tidak
+terikat ke session SQLAlchemy) dari cache dengan TTL pendek (USER_CACHE_TTL,
+detik; 0 = nonaktif).
+
+Entri dihapus otomatis setelah commit yang mengubah atau menghapus baris User
+(mis. ``reset_password``), dan bisa dihapus manual dengan ``invalidate_user``.
+Bulk ``Query.delete()``/``update()`` tidak memicu event mapper, jadi pemanggilnya
+wajib memanggil ``clear_user_cache`` setelah commit.
+Cache bersifat per proses: worker lain melihat perubahan paling lambat setelah TTL.
+"""
+import threading
+from time import monotonic
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+_listeners_installed = False
+
+
+class UserSnapshot(UserMixin):
+    """Salinan read-only atribut User yang dipakai lewat ``current_user``."""
+
+    def __init__(self, id, username, email):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "username", username)
+        object.__setattr__(self, "email", email)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserSnapshot bersifat read-only; ubah data lewat model User.")
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email)
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id}>"
+
+
+class UserCache:
+    """Cache LRU + TTL yang thread-safe untuk UserSnapshot."""
+
+    def __init__(self, ttl=30, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return snapshot
+
+    def set(self, user_id, snapshot):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _get_cache():
+    return current_app.extensions.get("user_cache") if has_app_context() else None
+
+
+def load_user_snapshot(user_id):
+    """User loader: snapshot dari cache, atau satu query jika belum ada/kedaluwarsa."""
+    from app.extensions import db
+    from app.models import User
+
+    cache = _get_cache()
+    if cache is not None:
+        snapshot = cache.get(user_id)
+        if snapshot is not None:
+            return snapshot
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    if cache is not None:
+        cache.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user(user_id):
+    """Hapus user dari cache proses ini (mis. setelah password diganti)."""
+    cache = _get_cache()
+    if cache is not None:
+        cache.invalidate(user_id)
+
+
+def clear_user_cache():
+    """Kosongkan seluruh cache proses ini (setelah bulk delete/update tabel user)."""
+    cache = _get_cache()
+    if cache is not None:
+        cache.clear()
+
+
+def _mark_user_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
+
+
+def _discard_after_rollback(session):
+    session.info.pop("changed_user_ids", None)
+
+
+def _install_listeners():
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    from app.models import User
+
+    event.listen(User, "after_update", _mark_user_changed)
+    event.listen(User, "after_delete", _mark_user_changed)
+    event.listen(Session, "after_commit", _invalidate_after_commit)
+    event.listen(Session, "after_rollback", _discard_after_rollback)
+    _listeners_installed = True
+
+
+def init_user_cache(app):
+    """Pasang cache user untuk aplikasi ini (USER_CACHE_TTL, USER_CACHE_MAX_SIZE)."""
+    _install_listeners()
+    app.extensions["user_cache"] = UserCache(
+        ttl=app.config.get("USER_CACHE_TTL", 30),
+        max_size=app.config.get("USER_CACHE_MAX_SIZE", 10000),
+    )
@@ -0,0 +1,27 @@
+import argparse
+from app.utils.password_hashing import calibrate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pilih cost hash password yang memakan waktu sekitar target ms di host ini."
+    )
+    parser.add_argument("--target-ms", type=float, default=250, help="Target durasi satu hash (default: 250)")
+    parser.add_argument("--algorithm", choices=["argon2", "pbkdf2"], default="argon2")
+    parser.add_argument("--memory-cost", type=int, default=65536, help="argon2 memory_cost dalam KiB")
+    parser.add_argument("--parallelism", type=int, default=4, help="argon2 parallelism")
+    args = parser.parse_args()
+
+    settings, duration = calibrate(args.target_ms, args.algorithm, args.memory_cost, args.parallelism)
+    print(f"Durasi median: {duration:.1f} ms")
+    print(f"PASSWORD_HASH_ALGORITHM={settings.algorithm}")
+    if settings.algorithm == "argon2":
+        print(f"PASSWORD_HASH_TIME_COST={settings.time_cost}")
+        print(f"PASSWORD_HASH_MEMORY_COST={settings.memory_cost}")
+        print(f"PASSWORD_HASH_PARALLELISM={settings.parallelism}")
+    else:
+        print(f"PASSWORD_HASH_ITERATIONS={settings.iterations}")
+
+
+if __name__ == "__main__":
+    main()
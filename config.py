@@ -0,0 +1,127 @@
+"""
+Konfigurasi aplikasi per environment (dipilih oleh ``create_app``).
+
+Nilai dibaca dari environment variable (.env dimuat oleh ``app``). Koneksi:
+    DATABASE_URL           database primary (default MySQL lokal via PyMySQL)
+    DATABASE_REPLICA_URL   read replica opsional untuk endpoint ``@read_replica``
+    REPLICA_PIN_SECONDS    detik baca tetap ke primary setelah pengguna menulis
+                           (default 5; 0 = nonaktif)
+    DB_POOL_SIZE           koneksi tetap per proses (default 10)
+    DB_MAX_OVERFLOW        koneksi tambahan saat lonjakan (default 20)
+    DB_POOL_RECYCLE        detik sebelum koneksi dibuat ulang; harus di bawah
+                           wait_timeout MySQL (default 280)
+    DB_POOL_TIMEOUT        detik menunggu koneksi bebas (default 30)
+    DB_POOL_PRE_PING       uji koneksi sebelum dipakai (default true)
+"""
+import os
+
+
+def _env_bool(name, default=False):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def engine_options():
+    """Opsi pool SQLAlchemy untuk database server (MySQL)."""
+    return {
+        "pool_size": _env_int("DB_POOL_SIZE", 10),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 280),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+def replica_binds():
+    url = os.getenv("DATABASE_REPLICA_URL")
+    return {"replica": url} if url else {}
+
+
+class Config:
+    SECRET_KEY = os.getenv("SECRET_KEY")
+    PASSWORD_RESET_SALT = os.getenv("PASSWORD_RESET_SALT", "password-reset-salt")
+    PASSWORD_RESET_MAX_AGE = _env_int("PASSWORD_RESET_MAX_AGE", 3600)
+
+    # Database
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "mysql://root:@localhost/digital_signature")
+    SQLALCHEMY_BINDS = replica_binds()
+    REPLICA_PIN_SECONDS = _env_int("REPLICA_PIN_SECONDS", 5)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Mail
+    MAIL_SERVER = os.getenv("MAIL_SERVER", "localhost")
+    MAIL_PORT = _env_int("MAIL_PORT", 587)
+    MAIL_USE_TLS = _env_bool("MAIL_USE_TLS", True)
+    MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", MAIL_USERNAME)
+    MAIL_QUEUE_BATCH_SIZE = _env_int("MAIL_QUEUE_BATCH_SIZE", 20)
+    MAIL_QUEUE_MAX_RETRIES = _env_int("MAIL_QUEUE_MAX_RETRIES", 3)
+    SIGNATURE_NOTIFY_ENABLED = _env_bool("SIGNATURE_NOTIFY_ENABLED", True)
+
+    # Observabilitas
+    METRICS_ENABLED = _env_bool("METRICS_ENABLED")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_FILE = os.getenv("LOG_FILE")
+
+    # File dan dokumen
+    FILE_SERVING_MODE = os.getenv("FILE_SERVING_MODE", "python")
+    PDF_LINEARIZE = _env_bool("PDF_LINEARIZE", True)  # hanya untuk PDF bertanda tangan yang ditulis ulang penuh
+    PREVIEW_MAX_WORKERS = _env_int("PREVIEW_MAX_WORKERS", 2)
+    RESUMABLE_MAX_FILE_SIZE_MB = _env_int("RESUMABLE_MAX_FILE_SIZE_MB", 200)
+    RESUMABLE_MAX_CHUNK_MB = _env_int("RESUMABLE_MAX_CHUNK_MB", 8)
+    RESUMABLE_SESSION_TTL = _env_int("RESUMABLE_SESSION_TTL", 86400)
+    OFFICE_CONVERT_WORKERS = _env_int("OFFICE_CONVERT_WORKERS", 1)
+    OFFICE_CONVERT_TIMEOUT = _env_int("OFFICE_CONVERT_TIMEOUT", 120)
+    PURGE_IN_BACKGROUND = _env_bool("PURGE_IN_BACKGROUND", True)
+    PURGE_BATCH_SIZE = _env_int("PURGE_BATCH_SIZE", 100)
+    PURGE_INTERVAL = _env_int("PURGE_INTERVAL", 300)
+
+    # Autentikasi
+    USER_CACHE_TTL = _env_int("USER_CACHE_TTL", 30)
+    PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "argon2")
+    PASSWORD_HASH_TIME_COST = _env_int("PASSWORD_HASH_TIME_COST", 3)
+    PASSWORD_HASH_MEMORY_COST = _env_int("PASSWORD_HASH_MEMORY_COST", 65536)
+    PASSWORD_HASH_PARALLELISM = _env_int("PASSWORD_HASH_PARALLELISM", 4)
+    PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", 4)
+    RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", True)
+    RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL")
+    PROXY_FIX_X_FOR = _env_int("PROXY_FIX_X_FOR", 0)  # jumlah reverse proxy tepercaya (X-Forwarded-For)
+    IDEMPOTENCY_TTL = _env_int("IDEMPOTENCY_TTL", 86400)
+    IDEMPOTENCY_PENDING_TTL = _env_int("IDEMPOTENCY_PENDING_TTL", 120)
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    QUERY_PROFILER_ENABLED = True
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SERVER_NAME = "localhost"
+    SECRET_KEY = "testing-secret-key"
+    MAIL_DEFAULT_SENDER = "noreply@example.com"
+    MAIL_SUPPRESS_SEND = True
+
+    # Purge langsung di request; satu koneksi SQLite in-memory tidak dibagi dengan thread purge
+    PURGE_IN_BACKGROUND = False
+
+    # SQLite in-memory memakai StaticPool; opsi pool MySQL tidak berlaku
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_BINDS = {}
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    # Cost argon2 minimal agar test tidak didominasi hashing
+    PASSWORD_HASH_TIME_COST = 1
+    PASSWORD_HASH_MEMORY_COST = 1024
+    PASSWORD_HASH_PARALLELISM = 1
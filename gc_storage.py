@@ -0,0 +1,34 @@
+import argparse
+from app import create_app
+from app.utils.storage_cleanup import storage_folders, purge_all_deleted, collect_orphans
+from app.utils.idempotency import purge_expired_records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Purge dokumen yang sudah dihapus, record Idempotency-Key kedaluwarsa, "
+                    "dan hapus file yang tidak dirujuk Document/Signature."
+    )
+    parser.add_argument("--config", choices=["production", "development"], default="production")
+    parser.add_argument("--min-age", type=int, default=3600,
+                        help="Lewati file yang lebih baru dari N detik (default: 3600)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Nama file per query ke database")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya tampilkan file yang akan dihapus")
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        if not args.dry_run:
+            purged = purge_all_deleted(app, app.config.get("PURGE_BATCH_SIZE", 100))
+            print(f"Dokumen terhapus yang di-purge: {purged}")
+            print(f"Record Idempotency-Key kedaluwarsa dihapus: {purge_expired_records(args.batch_size)}")
+        stats = collect_orphans(storage_folders(app), min_age=args.min_age,
+                                batch_size=args.batch_size, dry_run=args.dry_run)
+
+    for name, counts in stats.items():
+        print(f"{name}: {counts['scanned']} diperiksa, {counts['removed']} dihapus "
+              f"({counts['bytes'] / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
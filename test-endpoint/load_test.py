@@ -0,0 +1,361 @@
+"""
+Load test end-to-end untuk alur tanda tangan dokumen.
+
+Setiap "flow" menjalankan:
+    upload -> list_documents -> add-signature -> save-qr-settings
+    -> generate-signed-doc -> validate (beberapa kali, mensimulasikan scan QR)
+
+Mode in-process (default) menjalankan create_app('testing') dengan SQLite file
+sementara dan kunci Ed25519 sementara:
+
+    python test-endpoint/load_test.py --flows 200 --concurrency 8
+
+Mode HTTP menembak server yang sedang berjalan (mis. gunicorn):
+
+    RATE_LIMIT_ENABLED=false gunicorn ...
+    python test-endpoint/load_test.py --base-url http://127.0.0.1:8000 --flows 500 --concurrency 32
+
+Semua flow dikirim dari satu IP, jadi rate limiter di server target harus
+dinonaktifkan (RATE_LIMIT_ENABLED=false); jika tidak, login dan validate akan
+dijawab 429 dan latensi yang terukur bukan latensi endpoint sebenarnya.
+
+Hasil berupa p50/p95/p99 per endpoint, dan dapat disimpan sebagai JSON (--json).
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import hashlib
+import random
+import argparse
+import glob
+import tempfile
+import threading
+from io import BytesIO
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+PASSWORD = "password123"
+
+
+# ---------------------------------------------------------------------------
+# Corpus sintetis
+# ---------------------------------------------------------------------------
+
+def build_pdf(pages):
+    """Buat PDF sintetis dengan jumlah halaman tertentu."""
+    packet = BytesIO()
+    can = canvas.Canvas(packet)
+    for page_num in range(pages):
+        can.drawString(72, 720, f"Kontrak sintetis - halaman {page_num + 1} dari {pages}")
+        can.drawString(72, 700, "Lorem ipsum dolor sit amet, consectetur adipiscing elit.")
+        can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+class Corpus:
+    """Template PDF per jumlah halaman; setiap pengambilan dibuat unik agar lolos cek duplikat."""
+
+    def __init__(self, page_counts):
+        self.templates = {pages: build_pdf(pages) for pages in page_counts}
+        self.page_counts = list(page_counts)
+
+    def sample(self, rng):
+        pages = rng.choice(self.page_counts)
+        # Komentar setelah %%EOF tidak mengubah isi PDF, tetapi mengubah hash file
+        content = self.templates[pages] + f"\n%loadtest-{uuid.uuid4().hex}\n".encode()
+        return pages, content
+
+
+def build_signature_image():
+    """Gambar tanda tangan kecil dalam format data URL."""
+    img = Image.new("RGBA", (200, 80), (255, 255, 255, 0))
+    for x in range(20, 180):
+        img.putpixel((x, 40 + (x % 7)), (0, 0, 0, 255))
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+# ---------------------------------------------------------------------------
+# Klien
+# ---------------------------------------------------------------------------
+
+class InProcessClient:
+    """Bungkus Flask test client agar antarmukanya sama dengan HttpClient."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path, params=None):
+        response = self.client.get(path, query_string=params)
+        return response.status_code, response.get_data()
+
+    def post(self, path, data=None, json=None, files=None):
+        if files:
+            data = dict(data or {})
+            for field, (filename, content) in files.items():
+                data[field] = (BytesIO(content), filename)
+            response = self.client.post(path, data=data, content_type="multipart/form-data")
+        else:
+            response = self.client.post(path, data=data, json=json)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """Klien HTTP nyata (requests) untuk server yang sedang berjalan."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def get(self, path, params=None):
+        response = self.session.get(self.base_url + path, params=params, allow_redirects=False)
+        return response.status_code, response.content
+
+    def post(self, path, data=None, json=None, files=None):
+        response = self.session.post(self.base_url + path, data=data, json=json,
+                                     files=files, allow_redirects=False)
+        return response.status_code, response.content
+
+
+# ---------------------------------------------------------------------------
+# Pencatatan latensi
+# ---------------------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, endpoint, func, *args, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        status, body = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.timings[endpoint].append(elapsed)
+            if status not in expected:
+                self.errors[endpoint] += 1
+        if status not in expected:
+            raise RuntimeError(f"{endpoint} mengembalikan status {status}: {body[:200]!r}")
+        return body
+
+
+def percentile(sorted_values, pct):
+    """Percentile nearest-rank dari list yang sudah terurut."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder, wall_time, flows_done):
+    summary = {"wall_time_s": wall_time, "flows": flows_done,
+               "flows_per_s": flows_done / wall_time if wall_time else 0.0, "endpoints": {}}
+    for endpoint, values in sorted(recorder.timings.items()):
+        ordered = sorted(values)
+        summary["endpoints"][endpoint] = {
+            "count": len(ordered),
+            "errors": recorder.errors.get(endpoint, 0),
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "rps": len(ordered) / wall_time if wall_time else 0.0,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\nFlows: {summary['flows']} dalam {summary['wall_time_s']:.2f}s "
+          f"({summary['flows_per_s']:.2f} flow/s)")
+    print(f"{'endpoint':24} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'rps':>8}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"{endpoint:24} {stats['count']:7d} {stats['errors']:5d} {stats['p50_ms']:9.1f} "
+              f"{stats['p95_ms']:9.1f} {stats['p99_ms']:9.1f} {stats['max_ms']:9.1f} {stats['rps']:8.1f}")
+
+
+# ---------------------------------------------------------------------------
+# Alur pengguna
+# ---------------------------------------------------------------------------
+
+def login(client, email):
+    status, body = client.post("/auth/login", data={"email": email, "password": PASSWORD})
+    if status not in (200, 302):
+        raise RuntimeError(f"Login gagal untuk {email}: {status}")
+
+
+def run_flow(client, recorder, corpus, signature_image, rng, validations):
+    pages, content = corpus.sample(rng)
+    filename = f"loadtest_{uuid.uuid4().hex}.pdf"
+
+    recorder.call("upload", client.post, "/documents/upload",
+                  files={"file": (filename, content)}, expected=(200, 302))
+    recorder.call("list_documents", client.get, "/documents/documents")
+    # doc_hash diambil dari probe JSON berdasarkan SHA256 isi, bukan dari pesan flash HTML
+    body = recorder.call("document_exists", client.get,
+                         f"/documents/exists/{hashlib.sha256(content).hexdigest()}")
+    doc_hash = json.loads(body).get("doc_hash")
+    if not doc_hash:
+        raise RuntimeError("doc_hash tidak ditemukan setelah upload.")
+
+    body = recorder.call("add_signature", client.post, "/signature/add-signature",
+                         json={"document_hash": doc_hash, "signature": signature_image}, expected=(201,))
+    token = json.loads(body)["token"]
+
+    recorder.call("save_qr_settings", client.post, "/signature/save-qr-settings", json={
+        "document_hash": doc_hash, "x": 50, "y": 50, "width": 100, "height": 100,
+        "target_page": rng.randrange(pages),
+    })
+    recorder.call("generate_signed_doc", client.get, f"/signature/generate-signed-doc/{doc_hash}")
+
+    for _ in range(validations):
+        recorder.call("validate", client.get, "/signature/validate", params={"token": token})
+
+
+def worker(worker_id, make_client, email, flows, recorder, corpus, signature_image, seed, validations, failures):
+    rng = random.Random(seed + worker_id)
+    client = make_client()
+    login(client, email)
+    done = 0
+    for _ in range(flows):
+        try:
+            run_flow(client, recorder, corpus, signature_image, rng, validations)
+            done += 1
+        except Exception as e:
+            failures.append(f"worker {worker_id}: {e}")
+    return done
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup_in_process(workdir, concurrency):
+    """Buat app testing dengan SQLite file + kunci sementara, lalu daftarkan user."""
+    from app.utils.crypto_backend import generate_keypair
+    private_key_path, public_key_path = generate_keypair(os.path.join(workdir, "keys"))
+    os.environ["PRIVATE_KEY_PATH"] = private_key_path
+    os.environ["PUBLIC_KEY_PATH"] = public_key_path
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+
+    app = create_app("testing", config_overrides={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "SIGNATURE_FOLDER": os.path.join(workdir, "signatures"),
+        # Semua flow berasal dari satu IP; rate limiter akan menolaknya dengan 429
+        "RATE_LIMIT_ENABLED": False,
+    })
+    emails = []
+    with app.app_context():
+        db.create_all()
+        for i in range(concurrency):
+            email = f"loaduser{i}@example.com"
+            User.create_user(f"loaduser{i}", email, PASSWORD)
+            emails.append(email)
+    return app, emails
+
+
+def setup_http(base_url, concurrency):
+    """Daftarkan user baru di server target melalui /auth/register."""
+    run_id = uuid.uuid4().hex[:8]
+    emails = []
+    for i in range(concurrency):
+        client = HttpClient(base_url)
+        username = f"load{run_id}u{i}"
+        email = f"{username}@example.com"
+        client.post("/auth/register", data={"username": username, "email": email, "password": PASSWORD})
+        emails.append(email)
+    return emails
+
+
+def cleanup_in_process(app):
+    """Hapus file yang dibuat selama load test in-process."""
+    from app.models import Document, Signature
+    signature_folder = app.config["SIGNATURE_FOLDER"]
+    with app.app_context():
+        paths = [doc.filepath for doc in Document.query.all()]
+        for signature in Signature.query.all():
+            paths.append(signature.qr_code_path)
+            paths.append(os.path.join(signature_folder, f"{signature.document_hash}_signature.png"))
+            paths.extend(glob.glob(os.path.join(signature_folder, f"{signature.document_hash}_*_signed.pdf")))
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test alur upload -> tanda tangan -> validasi.")
+    parser.add_argument("--base-url", help="Target server HTTP. Tanpa opsi ini app dijalankan in-process.")
+    parser.add_argument("--flows", type=int, default=50, help="Jumlah total flow (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jumlah worker paralel (default: 4)")
+    parser.add_argument("--pages", default="1,5,20,100", help="Distribusi jumlah halaman PDF (default: 1,5,20,100)")
+    parser.add_argument("--validations", type=int, default=3, help="Jumlah validasi QR per flow (default: 3)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="Simpan ringkasan hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    page_counts = [int(pages) for pages in args.pages.split(",")]
+    corpus = Corpus(page_counts)
+    signature_image = build_signature_image()
+    recorder = Recorder()
+    failures = []
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    app = None
+    if args.base_url:
+        emails = setup_http(args.base_url, args.concurrency)
+        make_client = lambda: HttpClient(args.base_url)
+    else:
+        app, emails = setup_in_process(workdir, args.concurrency)
+        make_client = lambda: InProcessClient(app)
+
+    per_worker = [args.flows // args.concurrency + (1 if i < args.flows % args.concurrency else 0)
+                  for i in range(args.concurrency)]
+
+    started = time.perf_counter()
+    flows_done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [
+                executor.submit(worker, i, make_client, emails[i], per_worker[i], recorder, corpus,
+                                signature_image, args.seed, args.validations, failures)
+                for i in range(args.concurrency)
+            ]
+            for future in as_completed(futures):
+                flows_done += future.result()
+    finally:
+        # Dihitung di sini agar tetap terdefinisi jika executor melempar exception
+        wall_time = time.perf_counter() - started
+        if app is not None:
+            cleanup_in_process(app)
+
+    summary = summarize(recorder, wall_time, flows_done)
+    summary["failures"] = failures[:50]
+    print_summary(summary)
+    if failures:
+        print(f"\n{len(failures)} flow gagal, contoh: {failures[0]}")
+
+    if args.json:
+        with open(args.json, "w") as output_file:
+            json.dump(summary, output_file, indent=2)
+        print(f"Ringkasan disimpan di: {args.json}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
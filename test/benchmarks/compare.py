@@ -0,0 +1,46 @@
+"""
+Bandingkan dua file hasil benchmark (JSON).
+
+    python -m test.benchmarks.compare .benchmarks/before.json .benchmarks/after.json --threshold 10
+"""
+import sys
+import json
+import argparse
+
+
+def load_medians(path):
+    with open(path) as result_file:
+        data = json.load(result_file)
+    return {bench["name"]: bench["stats"]["median"] for bench in data["benchmarks"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan hasil benchmark.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Persentase perlambatan maksimum sebelum dianggap regresi (default: 10)")
+    args = parser.parse_args(argv)
+
+    baseline = load_medians(args.baseline)
+    current = load_medians(args.current)
+
+    regressions = []
+    print(f"{'benchmark':50} {'baseline (ms)':>14} {'current (ms)':>14} {'delta':>9}")
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f"{name:50} {'-':>14} {'-':>14} {'n/a':>9}")
+            continue
+        delta = (current[name] - baseline[name]) / baseline[name] * 100
+        print(f"{name:50} {baseline[name] * 1000:14.3f} {current[name] * 1000:14.3f} {delta:+8.1f}%")
+        if delta > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"\nRegresi di atas {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+from app.utils.sign_token import sign_token
+from app.utils.verify_token import verify_token
+from app.utils.sign_data import sign_data
+from app.utils.verify_signature import verify_signature
+
+MESSAGE = "Tanda tangan untuk dokumen: kontrak.pdf, oleh signer@example.com"
+
+
+def test_sign_token(benchmark, bench_keys):
+    token = benchmark(sign_token, MESSAGE)
+    assert token.startswith("v4.public.")
+
+
+def test_verify_token(benchmark, bench_keys):
+    token = sign_token(MESSAGE)
+    payload = benchmark(verify_token, token, MESSAGE)
+    assert payload == {"message": MESSAGE}
+
+
+def test_sign_data(benchmark, bench_keys):
+    signature = benchmark(sign_data, MESSAGE)
+    assert len(signature) == 128
+
+
+def test_verify_signature(benchmark, bench_keys):
+    signature = sign_data(MESSAGE)
+    assert benchmark(verify_signature, MESSAGE, signature) is True
@@ -0,0 +1,28 @@
+import os
+from io import BytesIO
+import pytest
+from app.utils.qr_utils import generate_qr_code
+from app.utils.add_qr_to_pdf import add_qr_to_pdf, STAMP_INCREMENTAL
+from app.routes.document import generate_file_hash
+
+
+def test_generate_qr_code(benchmark, tmp_path):
+    output_path = str(tmp_path / "qr.png")
+    benchmark(generate_qr_code, "http://127.0.0.1:5000/signature/validate?token=v4.public.x", output_path)
+    assert os.path.exists(output_path)
+
+
+@pytest.mark.parametrize("pages", [1, 50, 500])
+def test_add_qr_to_pdf(benchmark, pdf_factory, qr_png, tmp_path, pages):
+    pdf_path = pdf_factory(pages)
+    output_path = str(tmp_path / "signed.pdf")
+    success = benchmark(add_qr_to_pdf, pdf_path, qr_png, output_path,
+                        x=50, y=50, width=100, height=100, target_page=pages - 1)
+    assert success == STAMP_INCREMENTAL
+
+
+@pytest.mark.parametrize("size", [64 * 1024, 1024 * 1024, 16 * 1024 * 1024], ids=["64KB", "1MB", "16MB"])
+def test_generate_file_hash(benchmark, size):
+    file = BytesIO(os.urandom(size))
+    digest = benchmark(generate_file_hash, file)
+    assert len(digest) == 64
@@ -2,6 +2,22 @@ import pytest
 from app import create_app, db
 from io import BytesIO
 
+
+@pytest.fixture(scope='session', autouse=True)
+def storage_folders(tmp_path_factory):
+    """File upload, tanda tangan dan cache ditulis ke folder sementara, bukan ke app/static."""
+    root = tmp_path_factory.mktemp('storage')
+    folders = {
+        'UPLOAD_FOLDER': str(root / 'uploads'),
+        'SIGNATURE_FOLDER': str(root / 'signatures'),
+        'PREVIEW_CACHE_FOLDER': str(root / 'previews'),
+        'UPLOAD_STAGING_FOLDER': str(root / 'staging'),
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for key, value in folders.items():
+            patch.setattr(f'config.TestingConfig.{key}', value, raising=False)
+        yield folders
+
 @pytest.fixture(scope='module')
 def test_app():
     """Fixture untuk membuat aplikasi dengan konfigurasi testing."""
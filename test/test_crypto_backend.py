@@ -0,0 +1,52 @@
+import pytest
+from app.utils import crypto_backend
+from app.utils.sign_data import sign_data
+from app.utils.verify_signature import verify_signature
+from app.utils.sign_token import sign_token
+from app.utils.verify_token import verify_token
+
+
+@pytest.fixture
+def keypair(tmp_path, monkeypatch):
+    """Buat pasangan kunci Ed25519 sementara dan arahkan env ke sana."""
+    private_key_path, public_key_path = crypto_backend.generate_keypair(str(tmp_path))
+    monkeypatch.setenv("PRIVATE_KEY_PATH", private_key_path)
+    monkeypatch.setenv("PUBLIC_KEY_PATH", public_key_path)
+    yield private_key_path, public_key_path
+    crypto_backend.clear_key_cache()
+
+
+def test_raw_signature_roundtrip(keypair):
+    signature = sign_data("pesan uji")
+    assert verify_signature("pesan uji", signature) is True
+    assert verify_signature("pesan lain", signature) is False
+
+
+def test_token_roundtrip(keypair):
+    token = sign_token("pesan uji")
+    assert token.startswith("v4.public.")
+    assert verify_token(token, "pesan uji") == {"message": "pesan uji"}
+    assert verify_token(token, "pesan lain") is None
+
+
+def test_keys_are_cached(keypair):
+    assert crypto_backend.get_signing_keys() is crypto_backend.get_signing_keys()
+    assert crypto_backend.get_verify_keys() is crypto_backend.get_verify_keys()
+
+
+def test_rsa_key_is_rejected(tmp_path, monkeypatch):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key_path = tmp_path / "rsa.pem"
+    key_path.write_bytes(rsa_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption()
+    ))
+    monkeypatch.setenv("PRIVATE_KEY_PATH", str(key_path))
+
+    with pytest.raises(ValueError, match="Ed25519"):
+        sign_data("pesan uji")
+    crypto_backend.clear_key_cache()
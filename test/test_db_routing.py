@@ -0,0 +1,117 @@
+import time
+import pytest
+from io import BytesIO
+from app import create_app, db
+from app.models import User, Document, Signature
+from app.utils.db_routing import REPLICA_BIND
+from config import TestingConfig, ProductionConfig, engine_options
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Primary dan replica sebagai dua file SQLite terpisah."""
+    app = create_app('testing', config_overrides={
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"},
+        'USER_CACHE_TTL': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        # Replika di production mengikuti skema primary lewat replikasi
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        yield app
+        db.session.remove()
+        db.drop_all()
+    # Flask-SQLAlchemy mendaftarkan metadata per bind secara global; lepas agar
+    # app test lain (tanpa bind replica) tidak mencoba create_all ke replica
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def add_user(engine, user_id, email):
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert().values(
+            id=user_id, username=f'user{user_id}', email=email, password='x'))
+
+
+def login(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+
+def test_read_only_route_uses_replica(app):
+    add_user(db.engines[None], 1, 'primary@example.com')
+    add_user(db.engines[REPLICA_BIND], 1, 'replica@example.com')
+    with db.engines[REPLICA_BIND].begin() as connection:
+        connection.execute(Document.__table__.insert().values(
+            id=1, user_id=1, filename='hanya-di-replica.pdf', filepath='/tmp/x.pdf',
+            file_hash='a' * 64, doc_hash='b' * 64, uploaded_at=db.func.now(), status='pending'))
+
+    response = login(app, 1).get('/documents/documents')
+    assert response.status_code == 200
+    assert b'hanya-di-replica.pdf' in response.data
+
+
+def test_public_validation_reads_from_replica(app, monkeypatch):
+    monkeypatch.setattr('app.routes.signature.verify_token', lambda token, message: False)
+    with db.engines[REPLICA_BIND].begin() as connection:
+        connection.execute(Signature.__table__.insert().values(
+            document_hash='b' * 64, token='token-di-replica', user_id=1, status='pending',
+            signer_email='signer@example.com', document_name='doc.pdf', timestamp=db.func.now()))
+
+    client = app.test_client()
+    # Baris hanya ada di replica: ditemukan, lalu gagal verifikasi (bukan 404)
+    assert client.post('/signature/check', json={'token': 'token-di-replica'}).status_code == 400
+    assert client.get('/signature/validate?token=token-di-replica').status_code == 400
+    assert Signature.query.filter_by(token='token-di-replica').first() is None
+
+
+def test_writes_and_unmarked_routes_use_primary(app):
+    user = User(username='writer1', email='writer@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+
+    with db.engines[REPLICA_BIND].connect() as connection:
+        assert connection.execute(User.__table__.select()).first() is None
+    assert db.session.get(User, user.id).email == 'writer@example.com'
+
+
+def test_reads_stay_on_primary_shortly_after_a_write(app, monkeypatch):
+    for engine in (db.engines[None], db.engines[REPLICA_BIND]):
+        add_user(engine, 1, 'writer@example.com')
+    client = login(app, 1)
+
+    response = client.post('/documents/upload', data={'file': (BytesIO(b'%PDF-1.4 baru'), 'baru-ditulis.pdf')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+    # Replica belum menerima dokumen baru, tetapi pengguna tetap melihatnya
+    assert b'baru-ditulis.pdf' in client.get('/documents/documents').data
+
+    now = time.time()
+    monkeypatch.setattr('app.utils.db_routing.time', lambda: now + app.config['REPLICA_PIN_SECONDS'] + 1)
+    assert b'baru-ditulis.pdf' not in client.get('/documents/documents').data
+
+
+def test_without_replica_bind_everything_uses_primary():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        add_user(db.engines[None], 1, 'only@example.com')
+        response = login(app, 1).get('/documents/documents')
+        assert response.status_code == 200
+        db.session.remove()
+        db.drop_all()
+
+
+def test_config_classes(monkeypatch):
+    assert TestingConfig.TESTING and TestingConfig.SQLALCHEMY_DATABASE_URI == 'sqlite:///:memory:'
+    assert TestingConfig.SQLALCHEMY_ENGINE_OPTIONS == {}
+    assert ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_pre_ping'] is True
+
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    options = engine_options()
+    assert options['pool_size'] == 3
+    assert options['pool_pre_ping'] is False
+    assert {'max_overflow', 'pool_recycle', 'pool_timeout'} <= set(options)
@@ -1,9 +1,11 @@
 import os
+import hashlib
 import pytest
 from flask import url_for
 from werkzeug.datastructures import FileStorage
 from app import create_app, db
-from app.models import User, Document
+from app.models import User, Document, Signature
+from app.utils.query_profiler import assert_max_queries
 from io import BytesIO
 
 # Fixture setup
@@ -95,6 +97,8 @@ def test_upload_duplicate_document(client, init_user):
     # Assertions
     assert response.status_code == 200
     assert b"A document with the same content already exists." in response.data
+    assert Document.query.count() == 1
+    assert not [name for name in os.listdir(client.application.config['UPLOAD_FOLDER']) if name.endswith('.upload')]
 
 def test_view_document(client, init_user, db_session):
     """Test viewing a document."""
@@ -172,3 +176,217 @@ def test_delete_non_existent_document(client, init_user):
 
     # Assertions
     assert response.status_code == 404
+
+
+# Query budgets per endpoint
+def test_list_documents_query_budget(client, init_user, db_session):
+    """list_documents should not issue a query per document (N+1)."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    for index in range(5):
+        Document.create_document(
+            user_id=init_user.id,
+            filename=f"testfile{index}.pdf",
+            filepath=f"path/to/testfile{index}.pdf",
+            file_hash=f"dummyhash{index}"
+        )
+
+    with assert_max_queries(2) as queries:
+        response = client.get(url_for('document.list_documents'))
+
+    assert response.status_code == 200
+    assert not queries.repeated(threshold=3)
+
+
+def test_view_document_query_budget(client, init_user, db_session, tmp_path):
+    """view_document needs only the user lookup and the document lookup."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    filepath = tmp_path / "testfile.pdf"
+    filepath.write_bytes(b"%PDF-1.4 budget")
+    document = Document.create_document(
+        user_id=init_user.id,
+        filename="testfile.pdf",
+        filepath=str(filepath),
+        file_hash="dummyhash123"
+    )
+    doc_hash = document.doc_hash
+
+    with assert_max_queries(2):
+        response = client.get(url_for('document.view_document', doc_hash=doc_hash))
+
+    assert response.status_code == 200
+
+
+# Test for byte-range access to document content
+def test_document_content_supports_range(client, init_user):
+    """Test that document content is served with ETag and byte ranges."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    content = b"%PDF-1.4 range test content"
+    client.post(
+        url_for('document.upload_document'),
+        data={"file": (BytesIO(content), "rangefile.pdf")},
+        content_type="multipart/form-data"
+    )
+    document = Document.query.filter_by(filename="rangefile.pdf").first()
+
+    response = client.get(url_for('document.document_content', doc_hash=document.doc_hash))
+    assert response.status_code == 200
+    assert response.data == content
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['ETag'] == f'"{document.file_hash}"'
+
+    response = client.get(
+        url_for('document.document_content', doc_hash=document.doc_hash),
+        headers={'Range': 'bytes=5-9', 'If-Range': f'"{document.file_hash}"'}
+    )
+    assert response.status_code == 206
+    assert response.data == content[5:10]
+
+    # A stale If-Range validator returns the full document
+    response = client.get(
+        url_for('document.document_content', doc_hash=document.doc_hash),
+        headers={'Range': 'bytes=5-9', 'If-Range': '"stale"'}
+    )
+    assert response.status_code == 200
+
+    os.remove(document.filepath)
+
+
+def make_pdf(pages):
+    """Build an in-memory PDF with the given (width, height) pages."""
+    from PyPDF2 import PdfWriter
+    writer = PdfWriter()
+    for width, height in pages:
+        writer.add_blank_page(width=width, height=height)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_upload_stores_page_geometry(client, init_user):
+    """Test that page count and per-page mediabox are indexed at upload time."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    content = make_pdf([(595, 842), (842, 595)])
+    client.post(
+        url_for('document.upload_document'),
+        data={"file": (BytesIO(content), "geometry.pdf")},
+        content_type="multipart/form-data"
+    )
+    document = Document.query.filter_by(filename="geometry.pdf").first()
+    assert document.page_count == 2
+    assert [(page.page_index, page.width, page.height) for page in document.pages] == [
+        (0, 595, 842), (1, 842, 595)
+    ]
+    assert document.get_page(1).width == 842
+    assert document.get_page(2) is None
+
+    os.remove(document.filepath)
+
+
+def test_save_qr_settings_validates_against_page_index(client, init_user, db_session):
+    """Test that QR placement is validated from the stored geometry."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    document = Document.create_document(
+        user_id=init_user.id, filename="indexed.pdf", filepath="/nonexistent/indexed.pdf",
+        file_hash="c" * 64, page_geometry=[(595.0, 842.0, 0)]
+    )
+    Signature.create_signature(document.doc_hash, init_user.id, "token", init_user.email, "indexed.pdf")
+    payload = {"document_hash": document.doc_hash, "x": 10, "y": 10, "width": 100, "height": 100}
+
+    response = client.post('/signature/save-qr-settings', json=dict(payload, target_page=1))
+    assert response.status_code == 400
+
+    response = client.post('/signature/save-qr-settings', json=dict(payload, x=550, target_page=0))
+    assert response.status_code == 400
+
+    response = client.post('/signature/save-qr-settings', json=dict(payload, target_page=0))
+    assert response.status_code == 200
+
+
+def test_save_qr_settings_swaps_bounds_for_rotated_page(client, init_user, db_session):
+    """Test that /Rotate 90 pages are bounds-checked in their displayed orientation."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    document = Document.create_document(
+        user_id=init_user.id, filename="rotated.pdf", filepath="/nonexistent/rotated.pdf",
+        file_hash="e" * 64, page_geometry=[(595.0, 842.0, 90)]
+    )
+    Signature.create_signature(document.doc_hash, init_user.id, "token", init_user.email, "rotated.pdf")
+    payload = {"document_hash": document.doc_hash, "width": 100, "height": 100, "target_page": 0}
+
+    # Tampil 842 x 595: x=700 masih di dalam halaman, y=550 sudah keluar
+    response = client.post('/signature/save-qr-settings', json=dict(payload, x=700, y=10))
+    assert response.status_code == 200
+
+    response = client.post('/signature/save-qr-settings', json=dict(payload, x=10, y=550))
+    assert response.status_code == 400
+
+
+# Pre-upload dedup probe by content hash
+def test_exists_probe(client, init_user, db_session):
+    """Test GET/HEAD /documents/exists/<sha256> against stored file hashes."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    other = User(username='otheruser1', email='other@example.com', password='password')
+    db_session.add(other)
+    db_session.commit()
+    own = Document.create_document(init_user.id, "own.pdf", "/nonexistent/own.pdf", "a" * 64)
+    Document.create_document(other.id, "other.pdf", "/nonexistent/other.pdf", "b" * 64)
+
+    response = client.get(f'/documents/exists/{"A" * 64}')
+    assert response.status_code == 200
+    assert response.get_json() == {"exists": True, "doc_hash": own.doc_hash}
+
+    response = client.get(f'/documents/exists/{"b" * 64}')
+    assert response.get_json() == {"exists": True}
+
+    response = client.head(f'/documents/exists/{"a" * 64}')
+    assert response.status_code == 200 and response.data == b""
+
+    assert client.head(f'/documents/exists/{"d" * 64}').status_code == 404
+    assert client.get('/documents/exists/not-a-hash').status_code == 400
+
+
+def test_upload_skips_body_when_claimed_hash_exists(client, init_user):
+    """Test that X-Content-SHA256 of stored content is rejected without a file part."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    content = b"Scanned batch page"
+    client.post(url_for('document.upload_document'),
+                data={"file": (generate_test_file(content), "scan.pdf")}, content_type="multipart/form-data")
+
+    response = client.post(url_for('document.upload_document'), data={},
+                           headers={"X-Content-SHA256": hashlib.sha256(content).hexdigest()},
+                           follow_redirects=True)
+    assert b"A document with the same content already exists." in response.data
+    assert Document.query.count() == 1
+
+
+def test_upload_rejects_content_hash_mismatch(client, init_user):
+    """Test that the streamed content is verified against X-Content-SHA256."""
+    with client.session_transaction() as session:
+        session["_user_id"] = init_user.id
+
+    response = client.post(url_for('document.upload_document'),
+                           data={"file": (generate_test_file(b"actual content"), "mismatch.pdf")},
+                           content_type="multipart/form-data", headers={"X-Content-SHA256": "e" * 64},
+                           follow_redirects=True)
+    assert b"Uploaded content does not match X-Content-SHA256." in response.data
+    assert Document.query.count() == 0
+    assert not [name for name in os.listdir(client.application.config['UPLOAD_FOLDER']) if name.endswith('.upload')]
+
+    response = client.post(url_for('document.upload_document'), data={},
+                           headers={"X-Content-SHA256": "xyz"}, follow_redirects=True)
+    assert b"Invalid X-Content-SHA256 header." in response.data
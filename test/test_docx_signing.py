@@ -0,0 +1,141 @@
+import os
+import zipfile
+import pytest
+import qrcode
+from app import create_app, db
+from app.models import User, Document, Signature
+from app.utils.add_qr_to_docx import add_qr_to_docx, DOCX_MIMETYPE, SIGNATURE_PART
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Default Extension="jpeg" ContentType="image/jpeg"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:body><w:p><w:r><w:t>Kontrak</w:t></w:r></w:p>'
+    '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/></w:sectPr></w:body></w:document>'
+)
+DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" '
+    'Target="media/image1.jpeg"/></Relationships>'
+)
+
+
+def make_docx(path):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', CONTENT_TYPES)
+        docx.writestr('_rels/.rels', PACKAGE_RELS)
+        docx.writestr('word/document.xml', DOCUMENT)
+        docx.writestr('word/_rels/document.xml.rels', DOCUMENT_RELS)
+        docx.writestr('word/media/image1.jpeg', os.urandom(256 * 1024))
+        docx.writestr('word/styles.xml', '<w:styles/>' * 1000)
+    return str(path)
+
+
+@pytest.fixture
+def qr_png(tmp_path):
+    path = tmp_path / 'qr.png'
+    qrcode.make('docx').save(str(path))
+    return str(path)
+
+
+def test_add_qr_to_docx_inserts_image_and_signature_part(tmp_path, qr_png):
+    source = make_docx(tmp_path / 'doc.docx')
+    output = str(tmp_path / 'signed.docx')
+
+    add_qr_to_docx(source, qr_png, output, width=100, height=100,
+                   signature_info={'token': 'v4.public.abc', 'signer_email': 'a&b@example.com'})
+
+    with zipfile.ZipFile(output) as signed:
+        assert signed.testzip() is None
+        assert signed.namelist()[0] == '[Content_Types].xml'
+        document = signed.read('word/document.xml').decode()
+        assert 'r:embed="rIdQrSignature"' in document
+        # Gambar disisipkan sebelum sectPr milik body
+        assert document.index('<w:drawing>') < document.index('<w:sectPr>')
+        assert 'cx="1270000"' in document
+        assert 'Target="media/qr_signature.png"' in signed.read('word/_rels/document.xml.rels').decode()
+        assert 'Extension="png"' in signed.read('[Content_Types].xml').decode()
+        assert signed.read('word/media/qr_signature.png') == open(qr_png, 'rb').read()
+        assert SIGNATURE_PART in signed.read('_rels/.rels').decode()
+        assert '<signer_email>a&amp;b@example.com</signer_email>' in signed.read(SIGNATURE_PART).decode()
+
+
+def test_unchanged_entries_are_copied_without_recompression(tmp_path, qr_png, monkeypatch):
+    source = make_docx(tmp_path / 'doc.docx')
+    output = str(tmp_path / 'signed.docx')
+    opened = []
+    original_open = zipfile.ZipFile.open
+
+    def tracking_open(self, name, *args, **kwargs):
+        opened.append(name.filename if isinstance(name, zipfile.ZipInfo) else name)
+        return original_open(self, name, *args, **kwargs)
+
+    monkeypatch.setattr(zipfile.ZipFile, 'open', tracking_open)
+    add_qr_to_docx(source, qr_png, output)
+    monkeypatch.undo()
+
+    assert 'word/media/image1.jpeg' not in opened
+    assert 'word/styles.xml' not in opened
+    with zipfile.ZipFile(source) as original, zipfile.ZipFile(output) as signed:
+        for name in ('word/media/image1.jpeg', 'word/styles.xml'):
+            assert signed.getinfo(name).compress_size == original.getinfo(name).compress_size
+            assert signed.read(name) == original.read(name)
+
+
+def test_rejects_non_docx_zip(tmp_path, qr_png):
+    source = tmp_path / 'not_docx.docx'
+    with zipfile.ZipFile(source, 'w') as archive:
+        archive.writestr('hello.txt', 'hi')
+    with pytest.raises(ValueError):
+        add_qr_to_docx(str(source), qr_png, str(tmp_path / 'out.docx'))
+    assert not (tmp_path / 'out.docx').exists()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', config_overrides={'SIGNATURE_FOLDER': str(tmp_path / 'signatures')})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_generate_signed_doc_for_docx(app, tmp_path, qr_png):
+    user = User(username='docxuser1', email='docx@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    source = make_docx(tmp_path / 'kontrak.docx')
+    document = Document.create_document(user.id, 'kontrak.docx', source, 'd' * 64)
+    signature = Signature.create_signature(document.doc_hash, user.id, 'v4.public.token', user.email, 'kontrak.docx')
+    signature.qr_code_path = qr_png
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+
+    response = client.get(f'/signature/generate-signed-doc/{document.doc_hash}')
+    assert response.status_code == 200
+    assert response.mimetype == DOCX_MIMETYPE
+    assert f'{document.doc_hash}_signed.docx' in response.headers['Content-Disposition']
+    etag = response.headers['ETag']
+
+    response = client.get(f'/signature/generate-signed-doc/{document.doc_hash}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
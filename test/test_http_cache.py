@@ -0,0 +1,160 @@
+import os
+import glob
+import pytest
+from reportlab.pdfgen import canvas
+from app import create_app, db
+from app.models import User, Document, Signature
+from app.utils.qr_utils import generate_qr_code
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', config_overrides={'SIGNATURE_FOLDER': str(tmp_path / 'signatures')})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def signed_setup(app, tmp_path):
+    """User, dokumen PDF nyata, dan tanda tangan dengan QR Code dan posisi lengkap."""
+    user = User(username='cacheuser1', email='cache@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+
+    pdf_path = str(tmp_path / "doc.pdf")
+    can = canvas.Canvas(pdf_path)
+    can.drawString(72, 720, "Dokumen uji cache")
+    can.save()
+
+    document = Document.create_document(user.id, "doc.pdf", pdf_path, "cachehash123")
+    doc_hash = document.doc_hash
+    os.makedirs(app.config['SIGNATURE_FOLDER'])
+    qr_path = os.path.join(app.config['SIGNATURE_FOLDER'], f"{doc_hash}_qr.png")
+    generate_qr_code("http://127.0.0.1:5000/signature/validate?token=cache", qr_path)
+
+    signature = Signature.create_signature(doc_hash, user.id, "cachetoken", user.email, "doc.pdf")
+    signature.qr_code_path = qr_path
+    signature.qr_position_x, signature.qr_position_y = 10.0, 10.0
+    signature.qr_width, signature.qr_height = 100.0, 100.0
+    signature.target_page = 0
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = user.id
+
+    return client, doc_hash
+
+
+def test_qr_code_has_etag_and_revalidates(signed_setup):
+    client, doc_hash = signed_setup
+
+    response = client.get(f'/signature/view-qr/{doc_hash}')
+    assert response.status_code == 200
+    etag = response.headers['ETag'].strip('"')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    response = client.get(f'/signature/view-qr/{doc_hash}', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+
+
+def test_versioned_qr_code_is_immutable(signed_setup):
+    client, doc_hash = signed_setup
+    etag = client.get(f'/signature/view-signature/{doc_hash}').headers['ETag'].strip('"')
+
+    response = client.get(f'/signature/view-signature/{doc_hash}?v={etag}')
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_signed_doc_url_is_versioned_and_immutable(signed_setup):
+    client, doc_hash = signed_setup
+    url = client.get(f'/signature/get-token/{doc_hash}').get_json()['signed_doc_url']
+    assert url.startswith(f'/signature/generate-signed-doc/{doc_hash}?v=')
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['ETag'].strip('"') == url.split('?v=')[1]
+    assert response.headers['Cache-Control'] == 'private, max-age=31536000, immutable'
+
+
+def test_moving_qr_changes_signed_doc_url(signed_setup):
+    client, doc_hash = signed_setup
+    before = client.get(f'/signature/get-token/{doc_hash}').get_json()['signed_doc_url']
+
+    response = client.post('/signature/save-qr-settings', json={
+        'document_hash': doc_hash, 'x': 20, 'y': 20, 'width': 100, 'height': 100, 'target_page': 0
+    })
+    assert response.status_code == 200
+    after = response.get_json()['signed_doc_url']
+    assert after != before
+    assert client.get(after).headers['Cache-Control'].endswith('immutable')
+
+
+def test_validation_page_links_versioned_qr_code(app, signed_setup, monkeypatch):
+    client, doc_hash = signed_setup
+    monkeypatch.setattr('app.routes.signature.verify_token', lambda token, message: True)
+
+    response = client.get('/signature/validate?token=cachetoken')
+    assert response.status_code == 200
+    assert f'/signature/view-signature/{doc_hash}?v='.encode() in response.data
+
+
+def test_signed_doc_is_reused_and_revalidated(app, signed_setup):
+    client, doc_hash = signed_setup
+
+    first = client.get(f'/signature/generate-signed-doc/{doc_hash}')
+    assert first.status_code == 200
+    assert first.mimetype == 'application/pdf'
+    etag = first.headers['ETag'].strip('"')
+    assert len(glob.glob(os.path.join(app.config['SIGNATURE_FOLDER'], f"{doc_hash}_*_signed.pdf"))) == 1
+
+    second = client.get(f'/signature/generate-signed-doc/{doc_hash}', headers={'If-None-Match': f'"{etag}"'})
+    assert second.status_code == 304
+
+
+def test_incremental_output_is_not_linearized(app, signed_setup, monkeypatch):
+    client, doc_hash = signed_setup
+    linearized = []
+    monkeypatch.setattr('app.utils.add_qr_to_pdf.linearize_pdf', linearized.append)
+
+    assert client.get(f'/signature/generate-signed-doc/{doc_hash}').status_code == 200
+    assert linearized == []
+
+
+def test_html_pages_stay_no_store(app):
+    response = app.test_client().get('/auth/login')
+    assert response.headers['Cache-Control'].startswith('no-store')
+
+
+def test_range_request_in_python_mode(signed_setup):
+    client, doc_hash = signed_setup
+    full = client.get(f'/signature/view-qr/{doc_hash}').data
+
+    response = client.get(f'/signature/view-qr/{doc_hash}', headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.data == full[:10]
+
+
+def test_x_accel_redirect_mode(app, signed_setup):
+    client, doc_hash = signed_setup
+    app.config['FILE_SERVING_MODE'] = 'x-accel-redirect'
+    app.config['FILE_SERVING_ACCEL_MAP'] = {app.config['SIGNATURE_FOLDER']: '/protected/signatures/'}
+
+    response = client.get(f'/signature/generate-signed-doc/{doc_hash}')
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'].startswith(f'/protected/signatures/{doc_hash}_')
+    assert 'attachment' in response.headers['Content-Disposition']
+    assert 'ETag' in response.headers
+
+
+def test_x_sendfile_mode(app, signed_setup):
+    client, doc_hash = signed_setup
+    app.config['FILE_SERVING_MODE'] = 'x-sendfile'
+
+    response = client.get(f'/signature/view-qr/{doc_hash}')
+    assert response.data == b''
+    assert response.headers['X-Sendfile'] == os.path.join(app.config['SIGNATURE_FOLDER'], f"{doc_hash}_qr.png")
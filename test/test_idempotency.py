@@ -0,0 +1,158 @@
+import base64
+from io import BytesIO
+from datetime import datetime, timedelta
+import pytest
+from PIL import Image
+from app import create_app, db
+from app.models import User, Document, Signature, IdempotencyRecord
+from app.utils.idempotency import claim_key, request_fingerprint, purge_expired_records
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', config_overrides={'SIGNATURE_NOTIFY_ENABLED': False})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='idemuser1', email='idem@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client
+
+
+@pytest.fixture
+def document(user):
+    return Document.create_document(user.id, 'idem.pdf', '/tmp/idem.pdf', 'f' * 64)
+
+
+@pytest.fixture
+def sign_calls(monkeypatch):
+    calls = []
+    def fake_sign_token(message):
+        calls.append(message)
+        return f'token-{len(calls)}'
+    monkeypatch.setattr('app.routes.signature.sign_token', fake_sign_token)
+    return calls
+
+
+def signature_payload(document):
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), 'white').save(buffer, format='PNG')
+    data = 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    return {'document_hash': document.doc_hash, 'signature': data}
+
+
+def test_retry_with_same_key_replays_first_response(client, document, sign_calls):
+    payload = signature_payload(document)
+    first = client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+    retry = client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert len(sign_calls) == 1
+    assert Signature.query.count() == 1
+
+
+def test_requests_without_key_are_not_deduplicated(client, document, sign_calls):
+    payload = signature_payload(document)
+    client.post('/signature/add-signature', json=payload)
+    client.post('/signature/add-signature', json=payload)
+    assert Signature.query.count() == 2
+
+
+def test_key_reused_for_different_request_is_rejected(client, document, sign_calls):
+    payload = signature_payload(document)
+    client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+    other = dict(payload, signature=payload['signature'] + '=')
+    response = client.post('/signature/add-signature', json=other, headers={'Idempotency-Key': 'abc'})
+    assert response.status_code == 422
+
+
+def test_server_error_releases_key(client, document, monkeypatch):
+    payload = signature_payload(document)
+    monkeypatch.setattr('app.routes.signature.sign_token', lambda message: 1 / 0)
+    failed = client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+    assert failed.status_code == 500
+    assert IdempotencyRecord.query.count() == 0
+
+    monkeypatch.setattr('app.routes.signature.sign_token', lambda message: 'token-ok')
+    retry = client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+
+
+def test_in_flight_key_returns_conflict(client, user, document, sign_calls):
+    with client.application.test_request_context('/signature/add-signature', method='POST',
+                                                 json=signature_payload(document)):
+        claim_key(user.id, 'abc', request_fingerprint())
+
+    response = client.post('/signature/add-signature', json=signature_payload(document),
+                           headers={'Idempotency-Key': 'abc'})
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert sign_calls == []
+
+
+def test_expired_key_runs_again(app, client, document, sign_calls):
+    payload = signature_payload(document)
+    client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+    record = IdempotencyRecord.query.one()
+    record.created_at = datetime.utcnow() - timedelta(seconds=app.config['IDEMPOTENCY_TTL'] + 1)
+    db.session.commit()
+
+    response = client.post('/signature/add-signature', json=payload, headers={'Idempotency-Key': 'abc'})
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(sign_calls) == 2
+
+
+def test_abandoned_pending_key_is_reclaimed_after_lease(app, client, user, document, sign_calls):
+    with client.application.test_request_context('/signature/add-signature', method='POST',
+                                                 json=signature_payload(document)):
+        record, _ = claim_key(user.id, 'abc', request_fingerprint())
+    # Proses yang mengklaim mati; lease pending jauh lebih pendek dari IDEMPOTENCY_TTL
+    record.created_at = datetime.utcnow() - timedelta(seconds=app.config['IDEMPOTENCY_PENDING_TTL'] + 1)
+    db.session.commit()
+
+    response = client.post('/signature/add-signature', json=signature_payload(document),
+                           headers={'Idempotency-Key': 'abc'})
+    assert response.status_code == 201
+    assert len(sign_calls) == 1
+    assert IdempotencyRecord.query.one().status_code == 201
+
+
+def test_expired_records_are_purged_in_batches(app, user):
+    old = datetime.utcnow() - timedelta(seconds=app.config['IDEMPOTENCY_TTL'] + 1)
+    for index in range(5):
+        db.session.add(IdempotencyRecord(user_id=user.id, key=f'lama{index}', request_hash='x', created_at=old))
+    db.session.add(IdempotencyRecord(user_id=user.id, key='baru', request_hash='x'))
+    db.session.commit()
+
+    assert purge_expired_records(batch_size=2) == 5
+    assert [record.key for record in IdempotencyRecord.query.all()] == ['baru']
+
+
+def test_upload_retry_is_replayed(client):
+    def upload():
+        return client.post('/documents/upload', data={'file': (BytesIO(b'%PDF-1.4 idem'), 'idem-upload.pdf')},
+                           content_type='multipart/form-data', headers={'Idempotency-Key': 'upload-1'})
+
+    first, retry = upload(), upload()
+    assert first.status_code == retry.status_code == 302
+    assert retry.headers['Location'] == first.headers['Location']
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert Document.query.count() == 1
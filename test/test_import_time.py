@@ -0,0 +1,39 @@
+import os
+import re
+import sys
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("PyPDF2", "reportlab", "qrcode", "pyseto", "nacl", "PIL")
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "3000"))
+
+
+def import_app_with_importtime():
+    """Import paket app di proses baru dengan -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            modules[match.group(3)] = int(match.group(1))
+    return result, modules
+
+
+def test_import_does_not_load_heavy_dependencies():
+    _, modules = import_app_with_importtime()
+    loaded = [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+    assert loaded == []
+
+
+def test_import_does_not_build_app():
+    result, _ = import_app_with_importtime()
+    assert "Routes available" not in result.stdout
+
+
+def test_import_time_budget():
+    _, modules = import_app_with_importtime()
+    cumulative_ms = modules["app"] / 1000
+    assert cumulative_ms < IMPORT_TIME_BUDGET_MS, f"import app butuh {cumulative_ms:.0f}ms"
@@ -0,0 +1,48 @@
+import json
+import logging
+import queue
+from app.utils.logging_setup import JsonFormatter, SamplingFilter, AsyncQueueHandler
+
+
+def make_record(name, level, msg, *args, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record("app.routes.signature", logging.INFO, "Dokumen %s ditandatangani", "abc", doc_hash="abc")
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Dokumen abc ditandatangani"
+    assert entry["logger"] == "app.routes.signature"
+    assert entry["level"] == "INFO"
+    assert entry["doc_hash"] == "abc"
+
+
+def test_sampling_filter_drops_info_but_keeps_warnings():
+    sampling = SamplingFilter({"app.routes.signature": 0.0})
+
+    assert not sampling.filter(make_record("app.routes.signature", logging.INFO, "info"))
+    assert sampling.filter(make_record("app.routes.signature", logging.WARNING, "warning"))
+    assert sampling.filter(make_record("app.routes.document", logging.INFO, "info"))
+
+
+def test_sampling_filter_uses_parent_logger_rate():
+    sampling = SamplingFilter({"app.utils": 0.0})
+    assert not sampling.filter(make_record("app.utils.qr_utils", logging.DEBUG, "debug"))
+
+
+def test_queue_handler_formats_message_on_calling_thread():
+    class Lazy:
+        value = "sebelum"
+        def __str__(self):
+            return self.value
+
+    lazy = Lazy()
+    log_queue = queue.SimpleQueue()
+    AsyncQueueHandler(log_queue).handle(make_record("app", logging.INFO, "nilai %s", lazy, doc_hash="abc"))
+    lazy.value = "sesudah"  # mis. session ORM sudah ditutup saat listener memformat
+
+    queued = log_queue.get_nowait()
+    assert (queued.getMessage(), queued.args, queued.doc_hash) == ("nilai sebelum", None, "abc")
@@ -0,0 +1,127 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from flask_mail import Message, email_dispatched
+from app import create_app, db
+from app.models import User
+from app.routes.signature import send_signature_notification
+from app.utils.mail_queue import enqueue_mail
+from app.utils.smtp_sink import SMTPSink
+
+
+@pytest.fixture
+def sink():
+    with SMTPSink() as sink:
+        yield sink
+
+
+def make_app(sink, **overrides):
+    config = {
+        'MAIL_SUPPRESS_SEND': False,
+        'MAIL_SERVER': sink.host,
+        'MAIL_PORT': sink.port,
+        'MAIL_USE_TLS': False,
+        'MAIL_DEFAULT_SENDER': 'noreply@example.com',
+        'MAIL_QUEUE_RETRY_BACKOFF': 0.01,
+    }
+    config.update(overrides)
+    return create_app('testing', config_overrides=config)
+
+
+@pytest.fixture
+def app(sink):
+    app = make_app(sink)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def queue_of(app):
+    return app.extensions['mail_queue']
+
+
+def test_forgot_password_sends_from_background_thread(app, sink):
+    user = User(username='mailuser1', email='mail@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+
+    sender_threads = []
+    def record_thread(app, message):
+        sender_threads.append(threading.current_thread().name)
+    email_dispatched.connect(record_thread)
+    try:
+        response = app.test_client().post('/auth/forgot-password', data={'email': 'mail@example.com'})
+        assert response.status_code == 302
+        assert queue_of(app).join(timeout=5)
+    finally:
+        email_dispatched.disconnect(record_thread)
+
+    assert sender_threads == ['mail-queue']
+    [received] = sink.parsed()
+    assert received['To'] == 'mail@example.com'
+    assert '/auth/reset-password/' in received.get_payload(decode=True).decode()
+
+
+def test_batch_reuses_one_connection(app, sink):
+    for index in range(5):
+        enqueue_mail(Message(subject=f'Batch {index}', recipients=[f'user{index}@example.com']))
+    assert queue_of(app).join(timeout=5)
+
+    assert sorted(message['Subject'] for message in sink.parsed()) == [f'Batch {index}' for index in range(5)]
+    assert sink.connections == 1
+
+
+def test_connection_failure_is_retried_with_backoff(app, sink):
+    sink.refuse_connections = 2
+    enqueue_mail(Message(subject='Retry', recipients=['retry@example.com']))
+    assert queue_of(app).join(timeout=5)
+
+    assert [message['Subject'] for message in sink.parsed()] == ['Retry']
+    assert sink.connections == 3
+
+
+def test_gives_up_after_max_retries(sink):
+    app = make_app(sink, MAIL_QUEUE_MAX_RETRIES=1)
+    sink.refuse_connections = 10
+    with app.app_context():
+        enqueue_mail(Message(subject='Hilang', recipients=['lost@example.com']))
+        assert queue_of(app).join(timeout=5)
+    assert sink.messages == []
+    assert sink.connections == 2
+
+
+def test_exit_drain_is_registered_and_bounded(sink, monkeypatch, caplog):
+    registered = []
+    monkeypatch.setattr('app.utils.mail_queue.atexit.register', registered.append)
+    app = make_app(sink, MAIL_QUEUE_MAX_RETRIES=1, MAIL_QUEUE_RETRY_BACKOFF=1.0, MAIL_QUEUE_DRAIN_TIMEOUT=0.1)
+    sink.refuse_connections = 10
+    with app.app_context():
+        enqueue_mail(Message(subject='Tertunda', recipients=['late@example.com']))
+        enqueue_mail(Message(subject='Tertunda 2', recipients=['late2@example.com']))
+    assert registered == [queue_of(app).drain]
+
+    # Server terus menolak: drain berhenti setelah batas waktu, tidak menggantung
+    registered[0]()
+    assert 'belum terkirim' in caplog.text
+
+
+def test_signature_notification_uses_queue(app, sink):
+    signature = SimpleNamespace(document_name='kontrak.pdf', signer_email='signer@example.com',
+                                timestamp='2024-01-01 10:00:00')
+    send_signature_notification(signature, 'http://localhost/signature/validate?token=abc')
+    assert queue_of(app).join(timeout=5)
+
+    [received] = sink.parsed()
+    assert received['To'] == 'signer@example.com'
+    assert 'kontrak.pdf' in received['Subject']
+    assert 'token=abc' in received.get_payload(decode=True).decode()
+
+
+def test_notification_can_be_disabled(app, sink):
+    app.config['SIGNATURE_NOTIFY_ENABLED'] = False
+    signature = SimpleNamespace(document_name='a.pdf', signer_email='signer@example.com', timestamp='-')
+    send_signature_notification(signature, 'http://localhost/validate')
+    assert queue_of(app).join(timeout=5)
+    assert sink.messages == []
@@ -0,0 +1,54 @@
+import pytest
+from app import create_app
+from app.utils import metrics
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', config_overrides={'METRICS_ENABLED': True})
+    yield app
+    metrics.reset_metrics()
+    metrics.set_enabled(False)
+
+
+def test_span_and_timed_record_stage(app):
+    @metrics.timed("unit_stage")
+    def work():
+        return 42
+
+    assert work() == 42
+    with metrics.span("unit_block"):
+        pass
+
+    output = metrics.render_prometheus()
+    assert 'app_stage_duration_seconds_count{stage="unit_stage"} 1' in output
+    assert 'app_stage_duration_seconds_count{stage="unit_block"} 1' in output
+
+
+def test_disabled_metrics_record_nothing(app):
+    metrics.set_enabled(False)
+
+    @metrics.timed("disabled_stage")
+    def work():
+        return 1
+
+    work()
+    with metrics.span("disabled_block"):
+        pass
+
+    output = metrics.render_prometheus()
+    assert "disabled_stage" not in output
+    assert "disabled_block" not in output
+
+
+def test_metrics_endpoint(app):
+    client = app.test_client()
+    client.get('/')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert b'app_http_request_duration_seconds_bucket{endpoint="dashboard.index"' in response.data
+
+    metrics.set_enabled(False)
+    assert client.get('/metrics').status_code == 404
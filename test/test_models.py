@@ -1,7 +1,8 @@
 import pytest
 from app.models import User, Document, Signature
 from app.extensions import db
-from werkzeug.security import check_password_hash
+from app.utils.password_hashing import verify_password
+from app.utils.query_profiler import record_queries
 from datetime import datetime, timezone
 
 def test_user_creation(app):
@@ -14,7 +15,8 @@ def test_user_creation(app):
 
         assert user.username == username
         assert user.email == email
-        assert check_password_hash(user.password, password)
+        assert user.password.startswith("$argon2")
+        assert verify_password(user.password, password)
         assert user.created_at is not None
         assert user.updated_at is not None
 
@@ -45,6 +47,17 @@ def test_user_duplicate_email(app):
             User.create_user(username2, email, password)
 
 
+def test_user_creation_is_single_insert(app):
+    with app.app_context():
+        User.create_user("user789", "user789@example.com", "password123")
+
+        with record_queries() as queries:
+            with pytest.raises(ValueError, match="Email sudah terdaftar."):
+                User.create_user("user790", "user789@example.com", "password123")
+
+        assert not any(statement.lstrip().upper().startswith("SELECT") for statement in queries.statements)
+
+
 def test_document_creation(app):
     with app.app_context():
         user = User.create_user("docuser123", "docuser@example.com", "password123")
@@ -0,0 +1,154 @@
+import os
+import sys
+import stat
+from io import BytesIO
+import pytest
+import qrcode
+from PyPDF2 import PdfReader, PdfWriter
+from app import create_app, db
+from app.models import User, Document, Signature
+from app.utils import office_convert
+from app.utils.office_convert import convert_to_pdf, schedule_conversion, ConversionUnavailable
+
+FAKE_SOFFICE = """#!{python}
+import os, sys, shutil
+args = sys.argv[1:]
+outdir = args[args.index("--outdir") + 1]
+source = args[-1]
+if os.environ.get("FAKE_SOFFICE_FAIL"):
+    sys.stderr.write("source file could not be loaded")
+    sys.exit(1)
+name = os.path.splitext(os.path.basename(source))[0] + ".pdf"
+shutil.copy(os.environ["FAKE_SOFFICE_PDF"], os.path.join(outdir, name))
+"""
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    """Konverter palsu di PATH yang 'mengonversi' dengan menyalin PDF dua halaman."""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    script = bin_dir / 'soffice'
+    script.write_text(FAKE_SOFFICE.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=595, height=842)
+    writer.add_blank_page(width=842, height=595)
+    pdf_path = tmp_path / 'rendition_source.pdf'
+    with open(pdf_path, 'wb') as pdf_file:
+        writer.write(pdf_file)
+
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv('FAKE_SOFFICE_PDF', str(pdf_path))
+    return script
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', config_overrides={'SIGNATURE_FOLDER': str(tmp_path / 'signatures')})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def docx_document(app, tmp_path):
+    user = User(username='officeuser1', email='office@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    source = tmp_path / 'laporan.docx'
+    source.write_bytes(b'PK fake docx')
+    document = Document.create_document(user.id, 'laporan.docx', str(source), 'e' * 64,
+                                        conversion_status='pending')
+    return user, document
+
+
+def test_convert_to_pdf_without_converter(tmp_path, monkeypatch):
+    monkeypatch.setattr(office_convert, 'find_converter', lambda: None)
+    with pytest.raises(ConversionUnavailable):
+        convert_to_pdf(str(tmp_path / 'a.docx'), str(tmp_path / 'a.docx.pdf'))
+
+
+def test_convert_to_pdf_reports_failure(tmp_path, fake_soffice, monkeypatch):
+    monkeypatch.setenv('FAKE_SOFFICE_FAIL', '1')
+    with pytest.raises(ValueError, match='could not be loaded'):
+        convert_to_pdf(str(tmp_path / 'a.docx'), str(tmp_path / 'a.docx.pdf'))
+    assert not (tmp_path / 'a.docx.pdf').exists()
+
+
+def test_scheduled_conversion_links_rendition(app, docx_document, fake_soffice):
+    user, document = docx_document
+
+    status = schedule_conversion(app, document.id, document.filepath).result(timeout=30)
+
+    assert status == 'done'
+    db.session.expire_all()
+    document = db.session.get(Document, document.id)
+    assert document.conversion_status == 'done'
+    assert document.pdf_path == document.filepath + '.pdf'
+    assert len(PdfReader(document.pdf_path).pages) == 2
+    assert document.page_count == 2
+    assert document.get_page(1).width == 842
+
+
+def test_docx_stamping_uses_pdf_rendition(app, docx_document, fake_soffice, tmp_path):
+    user, document = docx_document
+    schedule_conversion(app, document.id, document.filepath).result(timeout=30)
+    db.session.expire_all()
+
+    qr_path = tmp_path / 'qr.png'
+    qrcode.make('office').save(str(qr_path))
+    signature = Signature.create_signature(document.doc_hash, user.id, 'token', user.email, 'laporan.docx')
+    signature.qr_code_path = str(qr_path)
+    signature.qr_position_x, signature.qr_position_y = 10.0, 10.0
+    signature.qr_width, signature.qr_height, signature.target_page = 100.0, 100.0, 1
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+
+    response = client.get(f'/signature/generate-signed-doc/{document.doc_hash}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert len(PdfReader(BytesIO(response.data)).pages) == 2
+
+
+def test_content_and_preview_wait_for_conversion(app, docx_document):
+    user, document = docx_document
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+
+    response = client.get(f'/documents/content/{document.doc_hash}')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '2'
+
+    document.conversion_status = 'unavailable'
+    db.session.commit()
+    response = client.get(f'/documents/preview/{document.doc_hash}/0')
+    assert response.status_code == 409
+    assert response.json['conversion_status'] == 'unavailable'
+
+
+def test_upload_docx_without_converter_is_not_scheduled(app, monkeypatch):
+    user = User(username='officeuser2', email='office2@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    monkeypatch.setattr('app.routes.document.find_converter', lambda: None)
+    monkeypatch.setattr('app.routes.document.schedule_conversion',
+                        lambda *args: pytest.fail("konversi tidak boleh dijadwalkan"))
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+    client.post('/documents/upload', data={'file': (BytesIO(b'PK docx content'), 'surat.docx')},
+                content_type='multipart/form-data')
+
+    document = Document.query.filter_by(filename='surat.docx').first()
+    assert document.conversion_status == 'unavailable'
+    assert document.pdf_path is None
+    os.remove(document.filepath)
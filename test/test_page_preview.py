@@ -0,0 +1,103 @@
+import os
+import shutil
+import threading
+import pytest
+from app import create_app, db
+from app.models import User, Document
+from app.utils import page_preview
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', config_overrides={'PREVIEW_CACHE_FOLDER': str(tmp_path / 'previews')})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def document_client(app, tmp_path):
+    user = User(username='previewuser1', email='preview@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+
+    pdf_path = tmp_path / 'doc.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 dummy')
+    document = Document.create_document(user.id, 'doc.pdf', str(pdf_path), 'previewhash123')
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+    return client, document.doc_hash
+
+
+@pytest.fixture
+def fake_renderer(monkeypatch):
+    """Ganti pdftoppm dengan renderer palsu yang menghitung jumlah render."""
+    calls = []
+    release = threading.Event()
+
+    def _render(pdf_path, output_path, page, size, timeout=30):
+        calls.append((page, size))
+        release.wait(5)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as output_file:
+            output_file.write(b'\x89PNG fake')
+        return output_path
+
+    monkeypatch.setattr(page_preview, 'render_preview', _render)
+    return calls, release
+
+
+def test_concurrent_requests_share_one_render(tmp_path, fake_renderer):
+    calls, release = fake_renderer
+    cache_folder = str(tmp_path / 'cache')
+
+    first = page_preview.request_preview('doc.pdf', 'abc', 0, 300, cache_folder)
+    second = page_preview.request_preview('doc.pdf', 'abc', 0, 300, cache_folder)
+    assert first is second
+
+    release.set()
+    assert first.result(5) == page_preview.preview_path(cache_folder, 'abc', 0, 300)
+
+    # Setelah selesai, hasil diambil dari cache tanpa render ulang
+    page_preview.request_preview('doc.pdf', 'abc', 0, 300, cache_folder).result(5)
+    assert calls == [(0, 300)]
+
+
+def test_preview_endpoint_serves_cached_png(document_client, fake_renderer):
+    client, doc_hash = document_client
+    calls, release = fake_renderer
+    release.set()
+
+    response = client.get(f'/documents/preview/{doc_hash}/0?size=150')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+
+    response = client.get(f'/documents/preview/{doc_hash}/0?size=150',
+                          headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert calls == [(0, 150)]
+
+
+def test_preview_rejects_unknown_size(document_client):
+    client, doc_hash = document_client
+    assert client.get(f'/documents/preview/{doc_hash}/0?size=123').status_code == 400
+
+
+def test_render_timeout_is_reported_as_value_error(tmp_path, monkeypatch):
+    def too_slow(args, **kwargs):
+        raise page_preview.subprocess.TimeoutExpired(args, kwargs['timeout'])
+
+    monkeypatch.setattr(shutil, 'which', lambda name: '/usr/bin/pdftoppm')
+    monkeypatch.setattr(page_preview.subprocess, 'run', too_slow)
+    with pytest.raises(ValueError, match='batas waktu'):
+        page_preview.render_preview(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out' / '0_300.png'), 0, 300, timeout=1)
+
+
+def test_preview_without_renderer_returns_503(document_client, monkeypatch):
+    client, doc_hash = document_client
+    monkeypatch.setattr(shutil, 'which', lambda name: None)
+    assert client.get(f'/documents/preview/{doc_hash}/0').status_code == 503
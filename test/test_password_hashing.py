@@ -0,0 +1,109 @@
+import threading
+import time
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User
+from app.utils import password_hashing
+from app.utils.password_hashing import (
+    hash_password, verify_password, needs_rehash, calibrate, current_settings
+)
+
+FAST_ARGON2 = {'PASSWORD_HASH_TIME_COST': 1, 'PASSWORD_HASH_MEMORY_COST': 1024, 'PASSWORD_HASH_PARALLELISM': 1}
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', config_overrides=dict(FAST_ARGON2, SECRET_KEY='test'))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_argon2_hash_and_verify(app):
+    stored = hash_password('password123')
+    assert stored.startswith('$argon2id$')
+    assert 'm=1024,t=1,p=1' in stored
+    assert verify_password(stored, 'password123')
+    assert not verify_password(stored, 'wrong-password1')
+    assert not needs_rehash(stored)
+
+
+def test_legacy_werkzeug_hash_still_verifies(app):
+    legacy = generate_password_hash('password123')
+    assert verify_password(legacy, 'password123')
+    assert needs_rehash(legacy)
+
+
+def test_cost_change_requires_rehash(app):
+    stored = hash_password('password123')
+    app.config['PASSWORD_HASH_TIME_COST'] = 2
+    assert needs_rehash(stored)
+    assert verify_password(stored, 'password123')
+
+
+def test_pbkdf2_algorithm(app):
+    app.config.update(PASSWORD_HASH_ALGORITHM='pbkdf2', PASSWORD_HASH_ITERATIONS=1000)
+    stored = hash_password('password123')
+    assert stored.startswith('pbkdf2:sha256:1000$')
+    assert not needs_rehash(stored)
+    app.config['PASSWORD_HASH_ITERATIONS'] = 2000
+    assert needs_rehash(stored)
+
+
+def test_login_rehashes_outdated_hash(app):
+    user = User(username='hashuser1', email='hash@example.com',
+                password=generate_password_hash('password123'))
+    db.session.add(user)
+    db.session.commit()
+
+    response = app.test_client().post('/auth/login', data={'email': 'hash@example.com', 'password': 'password123'})
+    assert response.status_code == 302
+
+    db.session.expire_all()
+    upgraded = db.session.get(User, user.id).password
+    assert upgraded.startswith('$argon2id$')
+    assert verify_password(upgraded, 'password123')
+
+
+def test_hashing_runs_in_bounded_pool(app, monkeypatch):
+    app.config['PASSWORD_HASH_WORKERS'] = 2
+    monkeypatch.setattr(password_hashing, '_executor', None)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow_hash(password, settings):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return threading.current_thread().name
+
+    monkeypatch.setattr(password_hashing, '_hash', slow_hash)
+    results = []
+
+    def login_burst():
+        with app.app_context():
+            results.append(hash_password('password123'))
+
+    threads = [threading.Thread(target=login_burst) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    assert all(name.startswith('password-hash') for name in results)
+    password_hashing._executor.shutdown()
+    monkeypatch.setattr(password_hashing, '_executor', None)
+
+
+def test_calibrate_reaches_target():
+    settings, duration = calibrate(target_ms=0.1, memory_cost=1024, parallelism=1)
+    assert settings.algorithm == 'argon2'
+    assert settings.time_cost == 1
+    assert duration > 0
+    assert current_settings().algorithm == 'argon2'
@@ -0,0 +1,215 @@
+import os
+import re
+import shutil
+from io import BytesIO
+import pytest
+import qrcode
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import NameObject, NumberObject
+from app.utils.add_qr_to_pdf import add_qr_to_pdf, STAMP_INCREMENTAL, STAMP_REWRITTEN
+from app.utils import pdf_incremental
+from app.utils.pdf_incremental import stamp_image, read_page_size
+from app.utils.linearize_pdf import linearize_pdf
+
+
+def write_pdf(path, pages, rotation=0):
+    writer = PdfWriter()
+    for width, height in pages:
+        writer.add_blank_page(width=width, height=height)
+        if rotation:
+            writer.pages[-1][NameObject('/Rotate')] = NumberObject(rotation)
+    with open(path, 'wb') as pdf_file:
+        writer.write(pdf_file)
+    return path
+
+
+def xref_stream_pdf():
+    """PDF 1.5 minimal dengan xref stream dan MediaBox/Resources turunan dari /Pages."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 /MediaBox [0 0 300 400] /Resources << >> >>",
+        b"<< /Type /Page /Parent 2 0 R /Contents 4 0 R >>",
+        b"<< /Length 8 >>\nstream\n0 0 m S\n\nendstream",
+    ]
+    out = b"%PDF-1.5\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    rows = b"\x00\x00\x00\x00\x00\xff\xff"
+    rows += b"".join(b"\x01" + offset.to_bytes(4, "big") + b"\x00\x00" for offset in offsets + [xref_offset])
+    out += b"5 0 obj\n<< /Type /XRef /Size 6 /W [1 4 2] /Root 1 0 R /Length %d >>\nstream\n" % len(rows)
+    out += rows + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+    return out
+
+
+def page_content(page):
+    contents = page['/Contents'].get_object()
+    streams = contents if isinstance(contents, list) else [contents]
+    return b"".join(stream.get_object().get_data() for stream in streams)
+
+
+@pytest.fixture
+def qr_png(tmp_path):
+    path = tmp_path / 'qr.png'
+    qrcode.make('incremental').save(str(path))
+    return str(path)
+
+
+def test_stamp_appends_incremental_update(tmp_path, qr_png):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)] * 3)
+    output = str(tmp_path / 'signed.pdf')
+
+    stamp_image(source, output, 1, qr_png, 10, 20, 100, 100)
+
+    original = open(source, 'rb').read()
+    signed = open(output, 'rb').read()
+    assert signed.startswith(original)
+
+    reader = PdfReader(output, strict=True)
+    assert len(reader.pages) == 3
+    assert '/QrSig' in reader.pages[1]['/Resources']['/XObject']
+    assert b'/QrSig Do' in page_content(reader.pages[1])
+    assert '/XObject' not in reader.pages[0].get('/Resources', {})
+
+
+def test_stamp_xref_stream_pdf_with_inherited_attributes(tmp_path, qr_png):
+    source = tmp_path / 'xref_stream.pdf'
+    source.write_bytes(xref_stream_pdf())
+    output = str(tmp_path / 'signed.pdf')
+
+    assert read_page_size(str(source), 0) == (300, 400)
+    stamp_image(str(source), output, 0, qr_png, 10, 20, 100, 100)
+
+    page = PdfReader(output, strict=True).pages[0]
+    assert list(page.mediabox) == [0, 0, 300, 400]
+    assert '/QrSig' in page['/Resources']['/XObject']
+    assert b'0 0 m S' in page_content(page)
+
+
+def test_restamp_keeps_previous_stamp(tmp_path, qr_png):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)])
+    first = str(tmp_path / 'first.pdf')
+    second = str(tmp_path / 'second.pdf')
+
+    stamp_image(source, first, 0, qr_png, 10, 20, 100, 100)
+    stamp_image(first, second, 0, qr_png, 200, 20, 100, 100)
+
+    xobjects = PdfReader(second, strict=True).pages[0]['/Resources']['/XObject']
+    assert set(xobjects) == {'/QrSig', '/QrSig1'}
+
+
+def test_only_target_page_is_resolved(tmp_path, monkeypatch):
+    source = write_pdf(str(tmp_path / 'big.pdf'), [(595, 842)] * 200)
+    readers = []
+    original_find_page = pdf_incremental._find_page
+
+    def tracking_find_page(reader, page_index):
+        readers.append(reader)
+        return original_find_page(reader, page_index)
+
+    monkeypatch.setattr(pdf_incremental, '_find_page', tracking_find_page)
+    assert read_page_size(source, 150) == (595, 842)
+    # Katalog, /Pages dan satu halaman; 199 halaman lain tidak pernah diparse
+    assert len(readers[0].resolved_objects) <= 4
+
+
+def test_invalid_page_raises(tmp_path, qr_png):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)])
+    with pytest.raises(ValueError):
+        stamp_image(source, str(tmp_path / 'out.pdf'), 1, qr_png, 10, 20, 100, 100)
+    assert not (tmp_path / 'out.pdf').exists()
+
+
+def test_add_qr_to_pdf_uses_indexed_page_size(tmp_path, qr_png, monkeypatch):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)] * 2)
+    output = str(tmp_path / 'signed.pdf')
+    monkeypatch.setattr('app.utils.add_qr_to_pdf.read_page_geometry',
+                        lambda *args: pytest.fail("geometri seharusnya dari indeks"))
+
+    assert add_qr_to_pdf(source, qr_png, output, 10, 20, 100, 100, target_page=1,
+                         page_size=(595, 842)) == STAMP_INCREMENTAL
+    content = page_content(PdfReader(output).pages[1])
+    assert b'100.0000 0 0 100.0000 10.0000 722.0000 cm' in content
+
+
+def test_add_qr_to_pdf_falls_back_to_full_rewrite(tmp_path, qr_png, monkeypatch):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)])
+    output = str(tmp_path / 'signed.pdf')
+
+    def unsupported(*args, **kwargs):
+        raise pdf_incremental.IncrementalUpdateUnsupported("test")
+
+    monkeypatch.setattr('app.utils.add_qr_to_pdf.stamp_image', unsupported)
+    assert add_qr_to_pdf(source, qr_png, output, 10, 20, 100, 100) == STAMP_REWRITTEN
+    assert len(PdfReader(BytesIO(open(output, 'rb').read())).pages) == 1
+
+
+def test_full_rewrite_is_linearized_before_publishing(tmp_path, qr_png, monkeypatch):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)])
+    output = str(tmp_path / 'signed.pdf')
+    linearized = []
+
+    def unsupported(*args, **kwargs):
+        raise pdf_incremental.IncrementalUpdateUnsupported("test")
+
+    def fake_linearize(path):
+        # Output belum boleh terlihat selama file masih ditulis
+        assert not os.path.exists(output)
+        linearized.append(path)
+
+    monkeypatch.setattr('app.utils.add_qr_to_pdf.stamp_image', unsupported)
+    monkeypatch.setattr('app.utils.add_qr_to_pdf.linearize_pdf', fake_linearize)
+    assert add_qr_to_pdf(source, qr_png, output, 10, 20, 100, 100, linearize=True) == STAMP_REWRITTEN
+    assert len(linearized) == 1 and linearized[0] != output
+    assert sorted(os.listdir(tmp_path)) == ['doc.pdf', 'qr.png', 'signed.pdf']
+
+
+def test_linearize_uses_unique_temp_file(tmp_path, monkeypatch):
+    source = write_pdf(str(tmp_path / 'doc.pdf'), [(595, 842)])
+    targets = []
+
+    def fake_qpdf(args, **kwargs):
+        targets.append(args[-1])
+        shutil.copyfile(args[-2], args[-1])
+
+    monkeypatch.setattr('app.utils.linearize_pdf.shutil.which', lambda name: '/usr/bin/qpdf')
+    monkeypatch.setattr('app.utils.linearize_pdf.subprocess.run', fake_qpdf)
+    assert linearize_pdf(source) and linearize_pdf(source)
+    assert len(set(targets)) == 2 and f"{source}.linearized" not in targets
+    assert os.listdir(tmp_path) == ['doc.pdf']
+
+
+def stamped_display_rect(output, rotation, width, height):
+    """Persegi QR (x, y dari kiri atas, lebar, tinggi) sebagaimana ditampilkan viewer."""
+    content = page_content(PdfReader(output).pages[0])
+    match = re.search(rb'([-\d. ]+) cm\n(?:q\n1 0 0 1 0 0 cm\n)?/\S+ Do', content)
+    a, b, c, d, e, f = map(float, match.group(1).split())
+    to_display = {
+        0: lambda ux, uy: (ux, uy),
+        90: lambda ux, uy: (uy, width - ux),
+        180: lambda ux, uy: (width - ux, height - uy),
+        270: lambda ux, uy: (height - uy, ux),
+    }[rotation]
+    corners = [to_display(a * u + c * v + e, b * u + d * v + f) for u, v in ((0, 0), (1, 0), (0, 1), (1, 1))]
+    xs, ys = [x for x, _ in corners], [y for _, y in corners]
+    display_height = width if rotation in (90, 270) else height
+    return (round(min(xs), 4), round(display_height - max(ys), 4),
+            round(max(xs) - min(xs), 4), round(max(ys) - min(ys), 4))
+
+
+@pytest.mark.parametrize('incremental', [True, False])
+@pytest.mark.parametrize('rotation', [0, 90, 180, 270])
+def test_stamp_lands_where_rotated_page_was_validated(tmp_path, qr_png, monkeypatch, rotation, incremental):
+    source = write_pdf(str(tmp_path / 'rotated.pdf'), [(595, 842)], rotation=rotation)
+    output = str(tmp_path / 'signed.pdf')
+    if not incremental:
+        def unsupported(*args, **kwargs):
+            raise pdf_incremental.IncrementalUpdateUnsupported("test")
+        monkeypatch.setattr('app.utils.add_qr_to_pdf.stamp_image', unsupported)
+
+    # Koordinat dari ruang tampilan, seperti yang divalidasi save_qr_settings
+    x = 700 if rotation in (90, 270) else 400
+    assert add_qr_to_pdf(source, qr_png, output, x, 10, 120, 80, page_size=(595, 842), rotation=rotation)
+    assert stamped_display_rect(output, rotation, 595, 842) == (x, 10, 120, 80)
@@ -0,0 +1,36 @@
+import pytest
+from app import create_app, db
+from app.models import User
+from app.utils.query_profiler import assert_max_queries, record_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', config_overrides={'QUERY_PROFILER_ENABLED': True})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_record_queries_flags_repeated_statements(app):
+    with record_queries() as queries:
+        for username in ("user1", "user2", "user3"):
+            User.query.filter_by(username=username).first()
+
+    assert queries.count == 3
+    assert list(queries.repeated(threshold=3).values()) == [3]
+
+
+def test_assert_max_queries_fails_over_budget(app):
+    with pytest.raises(AssertionError, match="maksimal 1 query"):
+        with assert_max_queries(1):
+            User.query.first()
+            User.query.first()
+
+
+def test_profiler_headers(app):
+    response = app.test_client().get('/auth/login')
+    assert response.headers['X-Query-Count'] == '0'
+    assert 'X-Query-Time-Ms' in response.headers
@@ -0,0 +1,148 @@
+import pytest
+from app import create_app, db
+from app.models import User
+from app.utils.rate_limit import MemoryBucketStore, Budget, parse_budget
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', config_overrides={
+        'RATE_LIMITS': {'login': '2/minute', 'validate': '3/minute', 'check': '2/minute'},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_parse_budget():
+    assert parse_budget('10/minute') == Budget(10, 10 / 60)
+    assert parse_budget('30/10s') == Budget(30, 3.0)
+    with pytest.raises(ValueError):
+        parse_budget('ten per minute')
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr('app.utils.rate_limit.monotonic', lambda: now[0])
+    store = MemoryBucketStore()
+    budget = Budget(capacity=2, rate=1.0)
+
+    assert store.consume('k', budget) == (True, 0.0)
+    assert store.consume('k', budget) == (True, 0.0)
+    allowed, retry_after = store.consume('k', budget)
+    assert not allowed and retry_after == pytest.approx(1.0)
+
+    now[0] += 1.0
+    assert store.consume('k', budget)[0]
+    assert store.consume('other', budget)[0]
+
+
+def test_bucket_store_is_bounded():
+    store = MemoryBucketStore(max_keys=2)
+    for key in ('a', 'b', 'c'):
+        store.consume(key, Budget(1, 1.0))
+    assert list(store._buckets) == ['b', 'c']
+
+
+def test_validate_returns_429_with_retry_after(client):
+    statuses = [client.get('/signature/validate?token=missing').status_code for _ in range(4)]
+    assert 429 not in statuses[:3]
+    assert statuses[3] == 429
+
+    response = client.get('/signature/validate?token=missing')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_limits_are_per_client_ip(client):
+    for _ in range(3):
+        client.get('/signature/validate', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert client.get('/signature/validate', environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 429
+    assert client.get('/signature/validate', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 400
+
+
+def test_spoofed_forwarded_for_is_ignored_without_trusted_proxy(client):
+    for ip in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+        client.get('/signature/validate', headers={'X-Forwarded-For': ip})
+    assert client.get('/signature/validate', headers={'X-Forwarded-For': '4.4.4.4'}).status_code == 429
+
+
+def test_limits_use_forwarded_client_ip_behind_trusted_proxy():
+    app = create_app('testing', config_overrides={'RATE_LIMITS': {'validate': '1/minute'}, 'PROXY_FIX_X_FOR': 1})
+    client = app.test_client()
+    proxy = {'REMOTE_ADDR': '10.0.0.254'}
+
+    assert client.get('/signature/validate', headers={'X-Forwarded-For': '1.1.1.1'}, environ_base=proxy).status_code == 400
+    assert client.get('/signature/validate', headers={'X-Forwarded-For': '1.1.1.1'}, environ_base=proxy).status_code == 429
+    # Hanya hop terakhir yang dipercaya; entri palsu di depannya diabaikan
+    assert client.get('/signature/validate', headers={'X-Forwarded-For': '9.9.9.9, 1.1.1.1'},
+                      environ_base=proxy).status_code == 429
+    assert client.get('/signature/validate', headers={'X-Forwarded-For': '2.2.2.2'}, environ_base=proxy).status_code == 400
+
+
+def test_consume_all_is_all_or_nothing():
+    store = MemoryBucketStore()
+    budget = Budget(capacity=1, rate=1.0)
+    assert store.consume('a', budget)[0]
+
+    allowed, retry_after = store.consume_all(['b', 'a'], budget)
+    assert not allowed and retry_after > 0
+    assert store.consume('b', budget)[0]
+
+
+def test_check_limited_per_token_across_ips(client):
+    for address in ('10.0.0.1', '10.0.0.2'):
+        client.post('/signature/check', json={'token': 'guessed'}, environ_base={'REMOTE_ADDR': address})
+    response = client.post('/signature/check', json={'token': 'guessed'}, environ_base={'REMOTE_ADDR': '10.0.0.3'})
+    assert response.status_code == 429
+
+
+def test_rejected_request_does_not_drain_other_buckets(client):
+    for address in ('10.0.0.1', '10.0.0.2'):
+        client.post('/signature/check', json={'token': 'guessed'}, environ_base={'REMOTE_ADDR': address})
+    assert client.post('/signature/check', json={'token': 'guessed'},
+                       environ_base={'REMOTE_ADDR': '10.0.0.3'}).status_code == 429
+
+    # Bucket IP 10.0.0.3 tidak terpotong oleh request yang ditolak di atas
+    statuses = [client.post('/signature/check', json={'token': f'lain{index}'},
+                            environ_base={'REMOTE_ADDR': '10.0.0.3'}).status_code for index in range(3)]
+    assert 429 not in statuses[:2]
+    assert statuses[2] == 429
+
+
+def test_login_limited_per_ip_and_account_before_hashing(client, monkeypatch):
+    user = User(username='limituser1', email='limit@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+
+    calls = []
+    monkeypatch.setattr(User, 'check_password', lambda self, password: calls.append(password) or False)
+
+    for _ in range(2):
+        client.post('/auth/login', data={'email': 'limit@example.com', 'password': 'guess1234'},
+                    environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    response = client.post('/auth/login', data={'email': 'LIMIT@example.com', 'password': 'guess1234'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.status_code == 429
+    assert len(calls) == 2
+
+    # Penyerang dari IP lain tidak bisa mengunci login pemilik akun
+    response = client.post('/auth/login', data={'email': 'limit@example.com', 'password': 'guess1234'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code != 429
+
+    # Halaman login (GET) tidak dihitung
+    assert client.get('/auth/login', environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 200
+
+
+def test_rate_limit_can_be_disabled(app, client):
+    app.config['RATE_LIMIT_ENABLED'] = False
+    statuses = {client.get('/signature/validate').status_code for _ in range(6)}
+    assert 429 not in statuses
@@ -0,0 +1,262 @@
+import os
+import hashlib
+from datetime import datetime, timedelta
+from io import BytesIO
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.attributes import set_committed_value
+from app import create_app, db
+from app.models import User, Document, UploadSession
+from app.utils import resumable_upload
+from app.utils.resumable_upload import write_chunk, UploadOffsetMismatch, UploadBusy
+
+CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 40
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', config_overrides={
+        'UPLOAD_STAGING_FOLDER': str(tmp_path / 'staging'),
+        'RESUMABLE_MAX_FILE_SIZE_MB': 1,
+        'RESUMABLE_MAX_CHUNK_MB': 1,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='bigscan1', email='scan@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client
+
+
+def start_upload(client, filename='kontrak-scan.pdf', size=len(CONTENT)):
+    response = client.post('/documents/uploads', json={'filename': filename, 'size': size})
+    assert response.status_code == 201
+    return response.get_json()['upload_id']
+
+
+def put_chunk(client, upload_id, offset, data):
+    return client.put(f'/documents/uploads/{upload_id}', data=data, headers={'Upload-Offset': str(offset)})
+
+
+def upload_in_chunks(client, upload_id, content=CONTENT, chunk_size=4000):
+    for offset in range(0, len(content), chunk_size):
+        response = put_chunk(client, upload_id, offset, content[offset:offset + chunk_size])
+        assert response.status_code == 200
+    return response
+
+
+def test_chunked_upload_finalizes_into_document(client):
+    upload_id = start_upload(client)
+    last = upload_in_chunks(client, upload_id)
+    assert last.get_json()['offset'] == len(CONTENT)
+
+    response = client.post(f'/documents/uploads/{upload_id}/finalize',
+                           headers={'X-Content-SHA256': hashlib.sha256(CONTENT).hexdigest()})
+    assert response.status_code == 201
+    document = Document.query.filter_by(doc_hash=response.get_json()['doc_hash']).one()
+    assert document.file_hash == hashlib.sha256(CONTENT).hexdigest()
+    with open(document.filepath, 'rb') as stored:
+        assert stored.read() == CONTENT
+
+    upload = db.session.get(UploadSession, upload_id)
+    assert not os.path.exists(upload.staging_path)
+
+    # Finalisasi ulang (retry) mengembalikan dokumen yang sama
+    again = client.post(f'/documents/uploads/{upload_id}/finalize')
+    assert again.status_code == 200
+    assert again.get_json()['doc_hash'] == document.doc_hash
+    os.remove(document.filepath)
+
+
+def test_resume_after_offset_mismatch(client):
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT[:5000])
+
+    conflict = put_chunk(client, upload_id, 8000, CONTENT[8000:9000])
+    assert conflict.status_code == 409
+    assert conflict.get_json()['offset'] == 5000
+
+    status = client.get(f'/documents/uploads/{upload_id}').get_json()
+    assert (status['offset'], status['size'], status['complete']) == (5000, len(CONTENT), False)
+
+    assert client.post(f'/documents/uploads/{upload_id}/finalize').status_code == 409
+    assert put_chunk(client, upload_id, 5000, CONTENT[5000:]).status_code == 200
+    response = client.post(f'/documents/uploads/{upload_id}/finalize')
+    assert response.status_code == 201
+    os.remove(Document.query.one().filepath)
+
+
+def test_hash_rebuilt_when_chunks_arrive_at_another_worker(client):
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT[:3000])
+    resumable_upload._hashers.clear()  # seolah chunk berikutnya diterima proses lain
+    put_chunk(client, upload_id, 3000, CONTENT[3000:])
+
+    response = client.post(f'/documents/uploads/{upload_id}/finalize')
+    document = Document.query.filter_by(doc_hash=response.get_json()['doc_hash']).one()
+    assert document.file_hash == hashlib.sha256(CONTENT).hexdigest()
+    os.remove(document.filepath)
+
+
+def test_finalize_rejects_hash_mismatch_and_duplicates(client):
+    upload_id = start_upload(client)
+    upload_in_chunks(client, upload_id)
+    response = client.post(f'/documents/uploads/{upload_id}/finalize', headers={'X-Content-SHA256': 'e' * 64})
+    assert response.status_code == 400
+    assert db.session.get(UploadSession, upload_id) is None
+
+    first = start_upload(client)
+    upload_in_chunks(client, first)
+    document_path = Document.query.filter_by(
+        doc_hash=client.post(f'/documents/uploads/{first}/finalize').get_json()['doc_hash']).one().filepath
+
+    duplicate = start_upload(client, filename='salinan.pdf')
+    upload_in_chunks(client, duplicate)
+    response = client.post(f'/documents/uploads/{duplicate}/finalize')
+    assert response.status_code == 409
+    assert Document.query.count() == 1
+    os.remove(document_path)
+
+
+def test_concurrent_finalize_does_not_discard_the_winner(client):
+    upload_id = start_upload(client)
+    upload_in_chunks(client, upload_id)
+    upload = db.session.get(UploadSession, upload_id)
+    lease = resumable_upload.claim_finalize(upload)  # request lain sedang memfinalisasi
+    assert lease is not None
+
+    # Request kedua (bahkan dengan hash yang salah) tidak boleh membuang sesi
+    response = client.post(f'/documents/uploads/{upload_id}/finalize', headers={'X-Content-SHA256': 'e' * 64})
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert client.delete(f'/documents/uploads/{upload_id}').status_code == 409
+    assert os.path.exists(upload.staging_path)
+
+    resumable_upload.release(upload, lease)
+    response = client.post(f'/documents/uploads/{upload_id}/finalize')
+    assert response.status_code == 201
+    again = client.post(f'/documents/uploads/{upload_id}/finalize')
+    assert again.status_code == 200
+    assert again.get_json()['doc_hash'] == response.get_json()['doc_hash']
+    os.remove(Document.query.one().filepath)
+
+
+def test_finalize_is_retryable_after_database_error(client, monkeypatch):
+    upload_id = start_upload(client)
+    upload_in_chunks(client, upload_id)
+
+    original = Document.create_document
+    failures = []
+    def flaky_create(**kwargs):
+        if not failures:
+            failures.append(kwargs['filename'])
+            raise OperationalError('INSERT INTO document', {}, Exception('database is locked'))
+        return original(**kwargs)
+    monkeypatch.setattr(Document, 'create_document', flaky_create)
+
+    with pytest.raises(OperationalError):
+        client.post(f'/documents/uploads/{upload_id}/finalize')
+    assert os.path.exists(db.session.get(UploadSession, upload_id).staging_path)
+
+    response = client.post(f'/documents/uploads/{upload_id}/finalize')
+    assert response.status_code == 201
+    document = Document.query.one()
+    with open(document.filepath, 'rb') as stored:
+        assert stored.read() == CONTENT
+    os.remove(document.filepath)
+
+
+def test_limits_and_validation(client):
+    assert client.post('/documents/uploads', json={'filename': 'a.exe', 'size': 10}).status_code == 400
+    assert client.post('/documents/uploads', json={'filename': 'a.pdf', 'size': 2 * 1024 * 1024}).status_code == 413
+
+    upload_id = start_upload(client, size=10)
+    assert put_chunk(client, upload_id, 0, b'x' * 11).status_code == 400
+    assert client.put(f'/documents/uploads/{upload_id}', data=b'x').status_code == 400
+
+
+def test_uploads_are_private_and_abortable(app, client):
+    upload_id = start_upload(client)
+    staging_path = db.session.get(UploadSession, upload_id).staging_path
+
+    other = User(username='other123', email='other@example.com', password='x')
+    db.session.add(other)
+    db.session.commit()
+    other_client = app.test_client()
+    with other_client.session_transaction() as session:
+        session['_user_id'] = str(other.id)
+    g.pop('_login_user', None)  # app context fixture dipakai bersama oleh kedua client
+    assert other_client.get(f'/documents/uploads/{upload_id}').status_code == 404
+    g.pop('_login_user', None)
+
+    assert client.delete(f'/documents/uploads/{upload_id}').status_code == 204
+    assert not os.path.exists(staging_path)
+    assert client.get(f'/documents/uploads/{upload_id}').status_code == 404
+
+
+def test_write_chunk_claims_range_atomically(app, user):
+    upload = resumable_upload.create_session(user.id, 'race.pdf', 100, app.config['UPLOAD_STAGING_FOLDER'])
+
+    # Worker lain sudah mengklaim offset 0 di database
+    UploadSession.query.filter_by(id=upload.id).update({'received_size': 10})
+    db.session.commit()
+    set_committed_value(upload, 'received_size', 0)  # salinan lama di proses ini
+    with pytest.raises(UploadOffsetMismatch) as error:
+        write_chunk(upload, 0, BytesIO(b'y' * 10), 10)
+    assert error.value.offset == 10
+
+
+def test_offset_advances_only_after_chunk_is_written(app, user):
+    upload = resumable_upload.create_session(user.id, 'flight.pdf', 100, app.config['UPLOAD_STAGING_FOLDER'])
+    observed = []
+
+    class SlowStream:
+        """Stream yang, di tengah penulisan, meniru request paralel pada offset yang sama."""
+        def __init__(self):
+            self.data = BytesIO(b'w' * 20)
+
+        def read(self, size):
+            if not observed:
+                row = db.session.get(UploadSession, upload.id)
+                db.session.refresh(row)
+                observed.append(row.received_size)
+                with pytest.raises(UploadBusy):
+                    write_chunk(row, 0, BytesIO(b'v' * 20), 20)
+            return self.data.read(size)
+
+    assert write_chunk(upload, 0, SlowStream(), 20) == 20
+    assert observed == [0]
+    assert upload.received_size == 20 and upload.locked_until is None
+    with open(upload.staging_path, 'rb') as staged:
+        assert staged.read() == b'w' * 20
+
+
+def test_abandoned_chunk_lease_expires(app, user):
+    upload = resumable_upload.create_session(user.id, 'mati.pdf', 100, app.config['UPLOAD_STAGING_FOLDER'])
+    # Worker yang mengklaim chunk mati sebelum melepas lease
+    upload.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert write_chunk(upload, 0, BytesIO(b'q' * 10), 10) == 10
+
+
+def test_interrupted_chunk_keeps_received_bytes(app, user):
+    upload = resumable_upload.create_session(user.id, 'cut.pdf', 100, app.config['UPLOAD_STAGING_FOLDER'])
+    assert write_chunk(upload, 0, BytesIO(b'z' * 30), 50) == 30
+    assert upload.received_size == 30
+    assert os.path.getsize(upload.staging_path) == 30
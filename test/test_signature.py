@@ -4,8 +4,8 @@ from app import create_app, db
 from app.models import User, Document, Signature
 
 @pytest.fixture
-def app():
-    app = create_app("testing")
+def app(tmp_path):
+    app = create_app("testing", config_overrides={"SIGNATURE_FOLDER": str(tmp_path / "signatures")})
     with app.app_context():
         db.create_all()
         yield app
@@ -0,0 +1,229 @@
+import os
+import time
+import hashlib
+from io import BytesIO
+from datetime import datetime
+import pytest
+from app import create_app, db
+from app.models import User, Document, DocumentPage, Signature, UploadSession
+from app.utils.query_profiler import assert_max_queries
+from app.utils.storage_cleanup import purge_deleted_documents, purge_all_deleted, collect_orphans
+
+
+def make_app(tmp_path, **overrides):
+    config = {'PREVIEW_CACHE_FOLDER': str(tmp_path / 'previews'), 'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+              'SIGNATURE_FOLDER': str(tmp_path / 'signatures'), 'SIGNATURE_NOTIFY_ENABLED': False}
+    config.update(overrides)
+    return create_app('testing', config_overrides=config)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='cleaner1', email='cleaner@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client
+
+
+def touch(path, content=b'x', age=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as output:
+        output.write(content)
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+    return path
+
+
+def stored_document(app, user, name, signed=True):
+    """Dokumen beserta file upload, tanda tangan, hasil stamping dan pratinjaunya."""
+    file_hash = hashlib.sha256(name.encode()).hexdigest()
+    signature_folder = app.config['SIGNATURE_FOLDER']
+    filepath = touch(os.path.join(app.config['UPLOAD_FOLDER'], name))
+    document = Document.create_document(user.id, name, filepath, file_hash, page_geometry=[(612, 792, 0)])
+    paths = [filepath, touch(os.path.join(app.config['PREVIEW_CACHE_FOLDER'], file_hash, '0_300.png'))]
+    if signed:
+        qr_path = touch(os.path.join(signature_folder, f'{document.doc_hash}_qr.png'))
+        paths += [qr_path,
+                  touch(os.path.join(signature_folder, f'{document.doc_hash}_signature.png')),
+                  touch(os.path.join(signature_folder, f'{document.doc_hash}_0123456789abcdef_signed.pdf'))]
+        signature = Signature.create_signature(document.doc_hash, user.id, f'token-{name}', user.email, name)
+        signature.qr_code_path = qr_path
+        db.session.commit()
+    return document, paths
+
+
+def test_delete_hides_document_and_purges_rows_and_files(app, client, user):
+    document, paths = stored_document(app, user, 'hapus.pdf')
+    doc_hash = document.doc_hash
+
+    response = client.post(f'/documents/document/delete/{doc_hash}')
+    assert response.status_code == 302
+
+    assert client.get(f'/documents/view_document/{doc_hash}').status_code == 404
+    assert Document.query.count() == Signature.query.count() == DocumentPage.query.count() == 0
+    assert not [path for path in paths if os.path.exists(path)]
+
+
+def test_purge_runs_in_background_thread(tmp_path):
+    app = make_app(tmp_path, PURGE_IN_BACKGROUND=True,
+                   SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'purge.db'}")
+    with app.app_context():
+        db.create_all()
+        try:
+            user = User(username='cleaner2', email='bg@example.com', password='x')
+            db.session.add(user)
+            db.session.commit()
+            document, paths = stored_document(app, user, 'latar.pdf')
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user.id)
+
+            client.post(f'/documents/document/delete/{document.doc_hash}')
+            purger = app.extensions['document_purge']
+            assert purger._thread.name == 'document-purge'
+            assert purger.join(timeout=5)
+            purger.stop(timeout=5)
+
+            db.session.expire_all()
+            assert Document.query.count() == 0
+            assert not [path for path in paths if os.path.exists(path)]
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+def test_background_worker_sweeps_periodically(tmp_path):
+    database = f"sqlite:///{tmp_path / 'sweep.db'}"
+    setup_app = make_app(tmp_path, SQLALCHEMY_DATABASE_URI=database)
+    with setup_app.app_context():
+        db.create_all()
+        user = User(username='cleaner3', email='sweep@example.com', password='x')
+        db.session.add(user)
+        db.session.commit()
+        # Sisa proses yang mati sebelum purge: tidak ada wake(), hanya pemeriksaan periodik
+        document, paths = stored_document(setup_app, user, 'sisa.pdf')
+        document.deleted_at = datetime.utcnow()
+        db.session.commit()
+        db.session.remove()
+
+    app = make_app(tmp_path, SQLALCHEMY_DATABASE_URI=database, PURGE_IN_BACKGROUND=True, PURGE_INTERVAL=0.05)
+    purger = app.extensions['document_purge']
+    try:
+        assert purger._thread.is_alive()
+        with app.app_context():
+            # File dihapus setelah commit purge; tunggu baris dan file sekaligus
+            deadline = time.time() + 5
+            while (Document.query.count() or any(map(os.path.exists, paths))) and time.time() < deadline:
+                db.session.remove()
+                time.sleep(0.05)
+            assert Document.query.count() == 0
+            assert not [path for path in paths if os.path.exists(path)]
+    finally:
+        purger.stop(timeout=5)
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+def test_purge_deletes_in_bulk_batches(app, user):
+    for index in range(5):
+        document, _ = stored_document(app, user, f'batch{index}.pdf')
+        document.deleted_at = datetime.utcnow()
+    db.session.commit()
+
+    # Jumlah query per batch tetap, tidak bergantung pada jumlah dokumen/tanda tangan
+    with assert_max_queries(8):
+        assert purge_deleted_documents(batch_size=3, signature_folder=app.config['SIGNATURE_FOLDER'],
+                                       preview_folder=app.config['PREVIEW_CACHE_FOLDER']) == 3
+    assert Document.query.count() == 2
+    assert purge_all_deleted(app, batch_size=3) == 2
+    assert Document.query.count() == Signature.query.count() == 0
+
+
+def test_reupload_after_delete_does_not_wait_for_purge(app, client, user):
+    content = b'%PDF-1.4 muncul lagi'
+    document = Document.create_document(user.id, 'lagi.pdf', os.path.join(app.config['UPLOAD_FOLDER'], 'lagi.pdf'),
+                                        hashlib.sha256(content).hexdigest())
+    document.deleted_at = datetime.utcnow()  # belum di-purge
+    db.session.commit()
+    db.session.expunge(document)  # sesi request memakai sesi fixture yang sama
+
+    response = client.post('/documents/upload', data={'file': (BytesIO(content), 'lagi.pdf')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+    [current] = Document.query.all()
+    assert current.deleted_at is None
+    with open(current.filepath, 'rb') as stored:
+        assert stored.read() == content
+
+
+def test_delete_signatures_bulk_deletes_and_removes_files(app, client, user):
+    _, first = stored_document(app, user, 'ttd1.pdf')
+    _, second = stored_document(app, user, 'ttd2.pdf')
+
+    response = client.post('/signature/delete-signatures')
+    assert response.status_code == 200
+    assert Signature.query.count() == 0
+    assert not [path for path in first[2:] + second[2:] if os.path.exists(path)]
+
+
+def test_gc_removes_only_unreferenced_files(app, user, tmp_path):
+    folders = {name: str(tmp_path / name) for name in ('uploads', 'signatures', 'previews', 'staging')}
+    old = 7200
+
+    kept_upload = touch(os.path.join(folders['uploads'], 'dipakai.pdf'), age=old)
+    document = Document.create_document(user.id, 'dipakai.pdf', kept_upload, 'a' * 64)
+    Signature.create_signature(document.doc_hash, user.id, 'token-gc', user.email, 'dipakai.pdf')
+    upload = UploadSession(id='b' * 32, user_id=user.id, filename='besar.pdf', total_size=10,
+                           staging_path=touch(os.path.join(folders['staging'], f"{'b' * 32}.part"), age=old))
+    db.session.add(upload)
+    db.session.commit()
+
+    kept = [
+        kept_upload,
+        upload.staging_path,
+        touch(os.path.join(folders['signatures'], f'{document.doc_hash}_qr.png'), age=old),
+        touch(os.path.join(folders['previews'], 'a' * 64, '0_300.png')),
+        touch(os.path.join(folders['signatures'], 'catatan.txt'), age=old),    # nama tidak dikenal
+        touch(os.path.join(folders['uploads'], 'baru-diunggah.pdf')),         # masih terlalu baru
+    ]
+    orphan_preview = os.path.join(folders['previews'], 'c' * 64)
+    orphans = [
+        touch(os.path.join(folders['uploads'], 'yatim.pdf'), age=old),
+        touch(os.path.join(folders['uploads'], 'tmpabc.upload'), age=old),
+        touch(os.path.join(folders['signatures'], f"{'d' * 64}_signature.png"), age=old),
+        touch(os.path.join(folders['signatures'], f"{'d' * 64}_0123456789abcdef_signed.docx"), age=old),
+        touch(os.path.join(folders['staging'], f"{'e' * 32}.part"), age=old),
+        touch(os.path.join(orphan_preview, '0_300.png')),
+    ]
+    for path in (os.path.join(folders['previews'], 'a' * 64), orphan_preview):
+        os.utime(path, (time.time() - old, time.time() - old))
+
+    stats = collect_orphans(folders, min_age=3600, batch_size=2, dry_run=True)
+    assert sum(counts['removed'] for counts in stats.values()) == len(orphans)
+    assert all(os.path.exists(path) for path in kept + orphans)
+
+    stats = collect_orphans(folders, min_age=3600, batch_size=2)
+    assert stats['uploads'] == {'scanned': 3, 'removed': 2, 'bytes': 2}
+    assert all(os.path.exists(path) for path in kept)
+    assert not [path for path in orphans if os.path.exists(path)]
+    assert not os.path.exists(orphan_preview)
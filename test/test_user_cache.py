@@ -0,0 +1,106 @@
+import pytest
+from app import create_app, db
+from app.models import User, Document
+from app.utils.query_profiler import record_queries
+from app.utils.user_cache import (UserCache, UserSnapshot, load_user_snapshot, invalidate_user,
+                                  clear_user_cache)
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', config_overrides={'USER_CACHE_TTL': 60})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='cacheuser1', email='cache@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_snapshot_is_read_only(user):
+    snapshot = UserSnapshot.from_user(user)
+    assert (snapshot.id, snapshot.email, snapshot.is_authenticated) == (user.id, 'cache@example.com', True)
+    assert snapshot.get_id() == str(user.id)
+    with pytest.raises(AttributeError):
+        snapshot.email = 'other@example.com'
+
+
+def test_loader_queries_once_within_ttl(app, user):
+    with record_queries() as collector:
+        first = load_user_snapshot(user.id)
+        second = load_user_snapshot(user.id)
+    assert first is second
+    assert collector.count == 1
+
+
+def test_authenticated_requests_skip_user_query(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+
+    client.get('/documents/documents')
+    with record_queries() as collector:
+        client.get('/documents/documents')
+    assert not any('FROM user' in statement for statement in collector.statements)
+
+
+def test_commit_invalidates_changed_user(app, user):
+    load_user_snapshot(user.id)
+    user.email = 'changed@example.com'
+    db.session.commit()
+    assert load_user_snapshot(user.id).email == 'changed@example.com'
+
+
+def test_rollback_keeps_cached_snapshot(app, user):
+    cached = load_user_snapshot(user.id)
+    user.email = 'rolled-back@example.com'
+    db.session.flush()
+    db.session.rollback()
+    assert load_user_snapshot(user.id) is cached
+
+
+def test_deleted_user_is_evicted(app, user):
+    user_id = user.id
+    load_user_snapshot(user_id)
+    db.session.delete(user)
+    db.session.commit()
+    assert load_user_snapshot(user_id) is None
+
+
+def test_bulk_delete_requires_clearing_cache(app, user):
+    user_id = user.id
+    load_user_snapshot(user_id)
+    User.query.delete()
+    db.session.commit()
+    clear_user_cache()
+    assert load_user_snapshot(user_id) is None
+
+
+def test_explicit_invalidation(app, user):
+    cached = load_user_snapshot(user.id)
+    invalidate_user(user.id)
+    assert load_user_snapshot(user.id) is not cached
+
+
+def test_cache_ttl_and_size_limits(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('app.utils.user_cache.monotonic', lambda: now[0])
+    cache = UserCache(ttl=5, max_size=2)
+    for user_id in (1, 2, 3):
+        cache.set(user_id, UserSnapshot(user_id, f'user{user_id}', f'{user_id}@example.com'))
+    assert cache.get(1) is None
+    assert len(cache) == 2
+
+    now[0] += 6
+    assert cache.get(2) is None
+
+    disabled = UserCache(ttl=0)
+    disabled.set(1, UserSnapshot(1, 'user1', '1@example.com'))
+    assert disabled.get(1) is None